@@ -1,16 +1,27 @@
 from flask import Flask, redirect, jsonify, session, url_for, request, send_from_directory
-from pymongo import MongoClient, errors
+from pymongo import errors
 from flask_login import LoginManager
 from flask_login import logout_user, login_required, login_user, current_user
 from flask_session import Session
-from flask_bcrypt import Bcrypt
 from bson.objectid import ObjectId  # Import ObjectId to work with MongoDB Object IDs
 from models.jobSeeker_model import JobSeeker
 from models.employer_model import Employer
 from models.config import Config
 from flask_cors import CORS
+from utils.compression_utils import init_compression, BINARY_CONTENT_TYPES
+from utils.metrics import init_metrics, flush as flush_metrics
+from utils.tracing import init_tracing, TracedBcrypt, flush as flush_traces
+from utils.profiling import init_profiling
+from utils.index_utils import ensure_indexes
+from utils.mongo_utils import ForkSafeDatabase
+from utils.archive_utils import archive_expired_jobs
+from utils.job_search import home_feed
+from utils.task_queue import run_worker
+from utils.tasks import schedule_search_warming
+from repositories import user_repository, employer_repository, job_repository
 import logging
 import os
+import time
 import awsgi 
 
 """
@@ -24,7 +35,7 @@ if not os.path.exists(LOG_DIR):
 # Set up logging
 log_file_path = os.path.join(LOG_DIR, 'app.log')
 handlers = [logging.FileHandler(filename=log_file_path), logging.StreamHandler()]
-# logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s', handlers=handlers)
+logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(process)d:%(levelname)s:%(message)s', handlers=handlers)
 
 
 """
@@ -36,6 +47,10 @@ app = Flask(__name__)
 CORS(app, supports_credentials=True)
 app.config.from_object(Config)
 server_session = Session(app)
+init_compression(app)
+init_metrics(app)
+init_tracing(app)
+init_profiling(app)
 
 
 SECRET_KEY = os.environ.get('SECRET_KEY')
@@ -52,9 +67,9 @@ MongoDB Connection
 # MongoDB databse
 try:
     # Try to establish a connection with MongoDB
-    client = MongoClient(app.config["MONGO_URI"], serverSelectionTimeoutMS=5000)
-    client.server_info()  # Force an immediate connection attempt
-    db = client['jobsnearby']
+    # Every process opens its own client on first use, see ForkSafeDatabase
+    db = ForkSafeDatabase(app.config["MONGO_URI"], 'jobsnearby')
+    db.client.server_info()  # Force an immediate connection attempt
 except errors.ServerSelectionTimeoutError as err:
     logging.error("Timeout error while connecting to MongoDB:", err)
     raise err
@@ -72,22 +87,10 @@ except Exception as e:
     raise e
 
 #creating Index
-db.user.create_index("jobSeekerEmail", unique = True)
-db.employer.create_index("employerEmail", unique = True)
-db.jobs.create_index([
-    ("jobTitle", "text"),
-    ("jobDescription", "text"),
-    ("jobQualifications", "text"),
-    ("jobSkills", "text"),
-    ("companyName", "text"),
-    ("companyDescription", "text"),
-    ("jobCategory", "text"),
-    ("employmentType", "text"),
-    ("companyIndustry", "text")
-])
+ensure_indexes(db)
 
 app.secret_key = app.config["SECRET_KEY"]
-bcrypt = Bcrypt(app)
+bcrypt = TracedBcrypt(app)
 login_manager = LoginManager(app)
 
 login_manager.login_view = "login"
@@ -111,18 +114,19 @@ def unauthorized():
 @login_manager.user_loader
 def load_user(id):
     if session.get('user_type') == 'jobSeeker':
-        user_data = db.user.find_one({'_id': ObjectId(id)})
+        user_data = user_repository.find_by_id(db, id, user_repository.SESSION_PROJECTION)
         if user_data:
-            return JobSeeker(user_data)
+            return JobSeeker(user_data, db)
     elif session.get('user_type') == 'employer':
-        employer_data = db.employer.find_one({'_id': ObjectId(id)})
+        employer_data = employer_repository.find_by_id(db, id, employer_repository.SESSION_PROJECTION)
         if employer_data:
-            return Employer(employer_data)
+            return Employer(employer_data, db)
     return None
 
 
 #routes
-from routes import user_routes, em_routes
+from routes import user_routes, em_routes, admin_routes
+import commands  # registers the flask CLI commands
 
     
 
@@ -156,8 +160,7 @@ def get_current_user():
 
 @app.route('/api/')
 def home():
-    latest_jobs = db.jobs.find().limit(10)
-    job_list = [job for job in latest_jobs]
+    job_list = home_feed(db, limit=10)
 
     return jsonify(jobs=job_list), 200
 
@@ -167,11 +170,11 @@ def dashboard():
     user_type = session.get('user_type')
 
     if user_type == 'jobSeeker':
-        applied_jobs = db.user.find()
+        applied_jobs = user_repository.find_all(db)
         return jsonify(applied_jobs = [job for job in applied_jobs]), 200
     
     elif user_type == 'employer':
-        posted_jobs = db.jobs.find()
+        posted_jobs = job_repository.find_all(db)
         return jsonify(posted_jobs = [job for job in posted_jobs]), 200
 
 
@@ -187,11 +190,28 @@ def health_check():
     
 
 def lambda_handler(event, context):
+    # Scheduled EventBridge rules invoke the same function to run the archive job
+    # and to work through the queued background tasks in the remaining time
+    if event.get('source') == 'aws.events':
+        # Archiving gets half of the invocation time at most, the next run picks up
+        # the jobs left over, and the tasks get the time remaining after it
+        remaining = context.get_remaining_time_in_millis() / 1000 if context else 60
+        jobs, applications = archive_expired_jobs(db, stop_at=time.time() + remaining * 0.5)
+        schedule_search_warming(periodic=True)
+        remaining = context.get_remaining_time_in_millis() / 1000 if context else 30
+        tasks = run_worker(db, stop_at=time.time() + remaining * 0.8, poll_timeout=1)
+        flush_metrics()
+        return {"archived_jobs": jobs, "archived_applications": applications, "tasks": tasks}
+
     # Pass Lambda event and context to awsgi.response() function
     # This function adapts the Lambda event into a WSGI environment dictionary
-    # and invokes the Flask application (app) to handle the request
-    print("Received event:", event)
-    return awsgi.response(app, event, context)
+    # and invokes the Flask application (app) to handle the request. Compressed
+    # bodies are bytes, so they go back to API Gateway base64 encoded
+    logging.debug(f"Received event: {event}")
+    response = awsgi.response(app, event, context, base64_content_types=BINARY_CONTENT_TYPES)
+    # The container may be frozen once the response is returned, export its traces first
+    flush_traces()
+    return response
     
 
 # if __name__ == '__main__':
@@ -0,0 +1,78 @@
+"""
+Benchmark the cache codecs on pages of search results.
+
+Reports the size of a cached page and the time to encode and decode it for
+the JSON text the search cache used to store (encoded twice), plain JSON, and
+MessagePack with and without compression.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_cache_codec --limit 20 --repeat 500
+    python -m benchmarks.bench_cache_codec --redis
+
+With --redis every encoded page is also written to REDIS_URL and the memory
+Redis reports for the key (MEMORY USAGE) is printed next to its length.
+"""
+import argparse
+import json
+import uuid
+from models.config import Config
+from utils import cache_codec
+from utils.job_utils import serialize_job
+from utils.redis_utils import get_redis_connection
+from benchmarks.bench_search import synthetic_jobs, timed, report
+
+# (name, CACHE_CODEC, CACHE_COMPRESSION)
+CODECS = (
+    ('msgpack', 'msgpack', 'none'),
+    ('msgpack + zlib', 'msgpack', 'zlib'),
+    ('msgpack + zstd', 'msgpack', 'zstd'),
+)
+
+
+def search_page(limit):
+    jobs = [serialize_job(job) for job in synthetic_jobs(limit)]
+    return {"total": 1000, "page": 1, "limit": limit, "has_more": True, "search_job_data": jobs,
+            "facets": {"jobCategory": [{"value": "Retail", "count": 120}, {"value": "Food", "count": 80}]}}
+
+
+def memory_usage(r, data):
+    key = f"bench:codec:{uuid.uuid4().hex}"
+    r.set(key, data)
+    try:
+        return r.memory_usage(key)
+    finally:
+        r.delete(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--limit', type=int, default=20, help="Jobs per page.")
+    parser.add_argument('--repeat', type=int, default=500)
+    parser.add_argument('--redis', action='store_true', help="Also measure the memory of each page in Redis.")
+    args = parser.parse_args()
+
+    page = search_page(args.limit)
+    r = get_redis_connection() if args.redis else None
+
+    def show(name, encode, decode):
+        data = encode()
+        usage = f"   redis {memory_usage(r, data):>8} B" if r is not None else ''
+        print(f"{name} ({len(data)} bytes{usage})")
+        report('encode', *timed(encode, args.repeat))
+        report('decode', *timed(lambda: decode(data), args.repeat))
+
+    print(f"Search page of {args.limit} jobs")
+    show('json, encoded twice (before)', lambda: json.dumps(json.dumps(page)).encode('utf-8'),
+         lambda data: json.loads(json.loads(data)))
+    show('json', lambda: json.dumps(page).encode('utf-8'), json.loads)
+
+    for name, codec, compression in CODECS:
+        if compression == 'zstd' and cache_codec.zstandard is None:
+            print(f"{name}: skipped, zstandard is not installed")
+            continue
+        Config.CACHE_CODEC, Config.CACHE_COMPRESSION = codec, compression
+        show(name, lambda: cache_codec.encode(page), cache_codec.decode)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark sequential against concurrent reads of the job pages.
+
+Times the reads of get_single_job (job + application) and of the employer job
+overview (job + first applicants + applicant count), once one after the other
+and once through run_concurrently.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_concurrency --repeat 200
+    python -m benchmarks.bench_concurrency --job-id 65f0c0ffee... --repeat 200
+    python -m benchmarks.bench_concurrency --simulated-latency 5
+
+Against MongoDB the job with the most applications is used unless --job-id is
+given; run it from the same region as the application to get realistic round
+trips. With --simulated-latency every read is replaced by a sleep of that many
+milliseconds, which shows the upper bound of the win without a database.
+"""
+import argparse
+import time
+from bson import ObjectId
+from pymongo import MongoClient
+from models.config import Config
+from utils.concurrency_utils import run_concurrently
+from benchmarks.bench_search import timed, report
+
+
+def sequentially(*calls):
+    return [call() for call in calls]
+
+
+def mongo_reads(db, job_id, limit):
+    job_id = ObjectId(job_id)
+    application = db.applications.find_one({'job_id': job_id}) or {}
+    user_id = application.get('user_id')
+    single_job = (
+        lambda: db.jobs.find_one({'_id': job_id}),
+        lambda: db.applications.find_one({'user_id': user_id, 'job_id': job_id}),
+    )
+    overview = (
+        lambda: db.jobs.find_one({'_id': job_id}),
+        lambda: list(db.applications.find({'job_id': job_id}).sort('applied_on', 1).limit(limit)),
+        lambda: db.applications.count_documents({'job_id': job_id}),
+    )
+    return single_job, overview
+
+
+def simulated_reads(latency_ms):
+    def read():
+        time.sleep(latency_ms / 1000)
+    return (read, read), (read, read, read)
+
+
+def busiest_job(db):
+    busiest = next(db.applications.aggregate([
+        {"$group": {"_id": "$job_id", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": 1}
+    ]), None)
+    if busiest:
+        return busiest['_id']
+    job = db.jobs.find_one({}, {'_id': 1})
+    return job and job['_id']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--job-id', help="Job to read, defaults to the job with the most applications.")
+    parser.add_argument('--simulated-latency', type=float, default=0, help="Sleep this many ms per read instead of using MongoDB.")
+    parser.add_argument('--limit', type=int, default=20, help="Applicants on the first overview page.")
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    if args.simulated_latency:
+        single_job, overview = simulated_reads(args.simulated_latency)
+    else:
+        db = MongoClient(Config.MONGO_URI)['jobsnearby']
+        job_id = args.job_id or busiest_job(db)
+        if job_id is None:
+            parser.error("No jobs found, pass --simulated-latency to run without data.")
+        single_job, overview = mongo_reads(db, job_id, args.limit)
+
+    # Start the pool threads before timing
+    run_concurrently(*overview)
+
+    for name, calls in (('get_single_job', single_job), ('employer job overview', overview)):
+        print(f"\n{name} ({len(calls)} reads)")
+        sequential = timed(lambda: sequentially(*calls), args.repeat)
+        concurrent = timed(lambda: run_concurrently(*calls), args.repeat)
+        report('sequential', *sequential)
+        report('concurrent', *concurrent)
+        print(f"  p50 speedup {sequential[0] / concurrent[0]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark the in-process BM25 search index against the MongoDB $text search.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_search --synthetic 20000
+    python -m benchmarks.bench_search --queries "barista,python developer,cashier" --repeat 50
+
+With --synthetic the index is built from generated jobs and MongoDB is not
+needed. Otherwise jobs are read from MONGO_URI and both search paths are timed.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from bson import ObjectId
+from pymongo import MongoClient
+from models.config import Config
+from utils.search_engine import BM25Index, INDEXED_FIELDS
+
+WORDS = (
+    'barista cashier cook server driver cleaner nurse tutor retail warehouse python flask react '
+    'customer service coffee espresso kitchen delivery inventory sales support weekend evening '
+    'part time flexible hours lifting forklift register food safety communication teamwork'
+).split()
+DEFAULT_QUERIES = 'barista,python developer,customer service,warehouse forklift,part time weekend'
+
+
+def synthetic_jobs(count, seed=42):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {
+            '_id': ObjectId(),
+            'jobTitle': ' '.join(rng.choices(WORDS, k=3)),
+            'jobSkills': ', '.join(rng.choices(WORDS, k=6)),
+            'jobQualifications': ' '.join(rng.choices(WORDS, k=30)),
+            'jobDescription': ' '.join(rng.choices(WORDS, k=150)),
+        }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def report(name, p50, p95):
+    print(f"  {name:<28} p50 {p50:8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--synthetic', type=int, default=0, help="Index this many generated jobs instead of MongoDB data.")
+    parser.add_argument('--queries', default=DEFAULT_QUERIES, help="Comma separated keyword queries.")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=10, help="Page size of the $text query.")
+    args = parser.parse_args()
+
+    collection = None
+    if args.synthetic:
+        jobs = list(synthetic_jobs(args.synthetic))
+    else:
+        collection = MongoClient(Config.MONGO_URI)['jobsnearby'].jobs
+        jobs = list(collection.find({}, {field: 1 for field in INDEXED_FIELDS}))
+
+    start = time.perf_counter()
+    index = BM25Index.from_documents(jobs)
+    print(f"Built index over {len(index)} jobs in {time.perf_counter() - start:.2f} s")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'index')
+        index.save(path)
+        start = time.perf_counter()
+        index = BM25Index.load(path)
+        print(f"Loaded memory-mapped snapshot in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        for query in args.queries.split(','):
+            print(f"\nquery: {query!r}")
+            report('bm25 index', *timed(lambda: index.search(query, limit=None), args.repeat))
+            if collection is not None:
+                text_query = {"$text": {"$search": query}}
+                report('mongo $text find + count', *timed(
+                    lambda: (list(collection.find(text_query).sort([("createdAt", -1)]).limit(args.limit)),
+                             collection.count_documents(text_query)),
+                    args.repeat
+                ))
+
+
+if __name__ == '__main__':
+    main()
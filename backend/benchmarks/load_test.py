@@ -0,0 +1,120 @@
+"""
+Load test a running server, to compare gunicorn worker models.
+
+Runs --concurrency clients, each sending requests one after the other over a
+kept-alive connection, for --duration seconds, cycling through --paths. Reports
+the throughput, the latency percentiles and the throughput per core of the
+server.
+
+Usage (from the backend directory, with the server started separately):
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --concurrency 32 --duration 30 --cores 2
+    python -m benchmarks.load_test --paths "/api/user/searchjobs?keyword=barista" \\
+        --email user@example.com --password secret
+
+With --email and --password every client logs in as that job seeker first, so
+the authenticated endpoints (search, job pages) can be loaded. Run the client on
+another machine than the server, or pin the server to --cores cores (e.g. with
+taskset), so the client does not compete for the cores that are measured.
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = '/,/api/'
+
+
+class Client:
+    def __init__(self, url):
+        parts = urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=30)
+        self.cookie = None
+
+    def request(self, method, path, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        try:
+            self.connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            # Reconnect on the next request
+            self.connection.close()
+            raise
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status
+
+    def login(self, email, password):
+        status = self.request('POST', '/api/user/login', {'jobSeekerEmail': email, 'jobSeekerPassword': password})
+        if status != 200:
+            raise SystemExit(f"Login failed with status {status}")
+
+
+def run_client(args, paths, stop_at, results, lock):
+    client = Client(args.url)
+    if args.email:
+        client.login(args.email, args.password)
+    latencies, errors, i = [], 0, 0
+    while time.perf_counter() < stop_at:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            status = client.request('GET', path)
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        if status >= 400:
+            errors += 1
+    with lock:
+        results['latencies'].extend(latencies)
+        results['errors'] += errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--paths', default=DEFAULT_PATHS, help="Comma separated paths requested in turn.")
+    parser.add_argument('--concurrency', type=int, default=16, help="Number of concurrent clients.")
+    parser.add_argument('--duration', type=float, default=20, help="Seconds to run for.")
+    parser.add_argument('--cores', type=int, default=1, help="Cores available to the server, to report throughput per core.")
+    parser.add_argument('--email', help="Log every client in as this job seeker.")
+    parser.add_argument('--password')
+    args = parser.parse_args()
+
+    paths = [path for path in args.paths.split(',') if path]
+    results, lock = {'latencies': [], 'errors': 0}, threading.Lock()
+    stop_at = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=run_client, args=(args, paths, stop_at, results, lock))
+        for _ in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(results['latencies'])
+    if not latencies:
+        raise SystemExit("No request completed")
+    throughput = len(latencies) / elapsed
+    print(f"{len(latencies)} requests in {elapsed:.1f} s, {results['errors']} errors, concurrency {args.concurrency}")
+    print(f"  throughput      {throughput:10.1f} req/s")
+    print(f"  per core        {throughput / args.cores:10.1f} req/s ({args.cores} cores)")
+    print(f"  latency p50     {statistics.median(latencies):10.2f} ms")
+    print(f"  latency p95     {latencies[int(len(latencies) * 0.95) - 1]:10.2f} ms")
+    print(f"  latency p99     {latencies[int(len(latencies) * 0.99) - 1]:10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
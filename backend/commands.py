@@ -0,0 +1,100 @@
+"""
+Flask CLI commands for maintenance tasks, e.g. `flask rebuild-text-index`.
+"""
+import click
+from app import app, db
+from utils.index_utils import rebuild_text_index, dedupe_applications
+from utils.search_engine import build_search_index
+from utils.suggest_utils import rebuild_suggestions
+from utils.salary_utils import backfill_salaries
+from utils.archive_utils import archive_expired_jobs
+from utils.saved_jobs_utils import migrate_saved_jobs
+from utils.tasks import purge_job
+from utils.search_warmer import warm_search_cache
+from utils.tracing import find_trace, format_timeline
+from repositories import job_repository
+
+
+@app.cli.command('rebuild-text-index')
+def rebuild_text_index_command():
+    """Rebuild the jobs text index when the configured weights changed."""
+    if rebuild_text_index(db):
+        click.echo("Text index rebuilt.")
+    else:
+        click.echo("Text index is already up to date.")
+
+
+@app.cli.command('build-search-index')
+@click.option('--path', default=None, help="Snapshot directory, defaults to SEARCH_INDEX_PATH.")
+def build_search_index_command(path):
+    """Build the in-process BM25 search index from the jobs collection."""
+    index = build_search_index(db, path)
+    click.echo(f"Indexed {len(index)} jobs.")
+
+
+@app.cli.command('rebuild-suggestions')
+def rebuild_suggestions_command():
+    """Rebuild the search box suggestions from the jobs collection."""
+    count = rebuild_suggestions(db)
+    click.echo(f"Stored {count} suggestions.")
+
+
+@app.cli.command('backfill-salaries')
+@click.option('--batch-size', default=500, show_default=True)
+def backfill_salaries_command(batch_size):
+    """Parse the salary text of existing jobs into numeric fields."""
+    count = backfill_salaries(db, batch_size)
+    click.echo(f"Parsed the salary of {count} jobs.")
+
+
+@app.cli.command('archive-expired-jobs')
+@click.option('--batch-size', default=None, type=int, help="Defaults to ARCHIVE_BATCH_SIZE.")
+@click.option('--grace-days', default=None, type=int, help="Defaults to ARCHIVE_GRACE_DAYS.")
+@click.option('--max-batches', default=None, type=int, help="Stop after this many batches.")
+def archive_expired_jobs_command(batch_size, grace_days, max_batches):
+    """Move expired jobs and their applications to the archive collections."""
+    jobs, applications = archive_expired_jobs(db, batch_size, grace_days, max_batches=max_batches)
+    click.echo(f"Archived {jobs} jobs and {applications} applications.")
+
+
+@app.cli.command('migrate-saved-jobs')
+@click.option('--batch-size', default=500, show_default=True)
+def migrate_saved_jobs_command(batch_size):
+    """Move the saved job arrays of the user documents into the saved_jobs collection."""
+    count = migrate_saved_jobs(db, batch_size)
+    click.echo(f"Migrated the saved jobs of {count} users.")
+
+
+@app.cli.command('dedupe-applications')
+def dedupe_applications_command():
+    """Remove duplicate applications and add the unique (user_id, job_id) index."""
+    removed = dedupe_applications(db)
+    click.echo(f"Removed {removed} duplicate applications.")
+
+
+@app.cli.command('purge-deleted-jobs')
+def purge_deleted_jobs_command():
+    """Purge the deleted jobs right away, e.g. those whose purge task could not be queued."""
+    job_ids = job_repository.find_deleted_ids(db)
+    for job_id in job_ids:
+        purge_job(db, str(job_id))
+    click.echo(f"Purged {len(job_ids)} deleted jobs.")
+
+
+@app.cli.command('warm-search-cache')
+@click.option('--top', default=None, type=int, help="Number of searches, defaults to SEARCH_WARM_TOP_N.")
+def warm_search_cache_command(top):
+    """Cache the first page of the most popular searches again."""
+    warmed = warm_search_cache(db, top)
+    click.echo(f"Warmed {warmed} popular searches.")
+
+
+@app.cli.command('show-trace')
+@click.argument('trace_id')
+@click.option('--path', default=None, help="Trace file, defaults to TRACE_FILE.")
+def show_trace_command(trace_id, path):
+    """Print a trace written by the jsonl exporter as a timeline, e.g. the X-Trace-Id of a slow response."""
+    record = find_trace(trace_id, path)
+    if record is None:
+        raise click.ClickException(f"Trace {trace_id} not found, it may not have been sampled.")
+    click.echo(format_timeline(record))
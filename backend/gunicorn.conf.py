@@ -0,0 +1,68 @@
+"""
+Production gunicorn profile.
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py app:app
+
+Every setting can be overridden with the environment variables below or on
+the command line. See "Production server" in the README for choosing a
+worker model.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+
+# "gthread" runs GUNICORN_THREADS requests per worker on threads, which suits the
+# MongoDB and Redis round trips of most requests. "sync" serves one request per
+# worker. "gevent" needs the gevent package and runs many requests per worker on
+# greenlets.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))  # gevent only
+
+# Import the application once in the master, so startup work (index checks, the
+# search index snapshot) is done once and its memory is shared copy on write.
+# MongoDB and Redis clients are opened by every worker after the fork, see
+# post_fork below.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Recycle workers after a number of requests, jittered so they do not all
+# restart at once, to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+
+def when_ready(server):
+    # The master does not serve requests: close the MongoDB client the preloaded
+    # application opened, workers must not inherit its sockets
+    if server.cfg.preload_app:
+        from app import db
+        db.close()
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    # Connect the worker's own clients now rather than on its first request. The
+    # MongoDB handle and the Redis clients notice the new process and open new
+    # connections, redis-py connection pools do so after a fork by themselves.
+    from app import db
+    from utils.redis_utils import get_redis_connection
+    try:
+        db.command('ping')
+        get_redis_connection()
+    except Exception as e:
+        server.log.warning(f"Worker {worker.pid} could not connect on start, connecting on first request: {e}")
+
+
+def worker_exit(server, worker):
+    # Add the request metrics counted since the last flush before the worker is gone,
+    # e.g. when it is recycled after max_requests
+    from utils.metrics import flush
+    flush()
@@ -9,6 +9,19 @@ class Config(object):
     MONGO_URI = os.environ.get('MONGO_URI')
     REDIS_URL = os.environ.get('SESSION_REDIS')
 
+    # MongoDB connection pool per process, see the README for sizing. Idle connections
+    # are closed after MONGO_MAX_IDLE_TIME_MS milliseconds, 0 keeps them open
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 0))
+    # Wire compressors in order of preference, those whose package is not installed are skipped
+    MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', 'zstd,snappy,zlib')
+    MONGO_ZLIB_COMPRESSION_LEVEL = int(os.environ.get('MONGO_ZLIB_COMPRESSION_LEVEL', 1))
+    # Read preference of searches and the home feed, and the replication lag in
+    # seconds tolerated from secondaries (-1 for no bound, at least 90 otherwise)
+    MONGO_SEARCH_READ_PREFERENCE = os.environ.get('MONGO_SEARCH_READ_PREFERENCE', 'secondaryPreferred')
+    MONGO_SEARCH_MAX_STALENESS_SECONDS = int(os.environ.get('MONGO_SEARCH_MAX_STALENESS_SECONDS', 90))
+
 
 
     SESSION_TYPE = os.environ.get('SESSION_TYPE')
@@ -18,3 +31,134 @@ class Config(object):
     SESSION_COOKIE_SAMESITE = os.environ.get('SESSION_COOKIE_SAMESITE')
     SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE') == 'True'
 
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True') == 'True'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+
+    # Comma separated field:weight pairs, e.g. "jobTitle:10,jobSkills:8"
+    TEXT_INDEX_WEIGHTS = os.environ.get('TEXT_INDEX_WEIGHTS')
+    SEARCH_RECENCY_HALF_LIFE_DAYS = float(os.environ.get('SEARCH_RECENCY_HALF_LIFE_DAYS', 14))
+
+    # "mongo" searches keywords with the text index, "bm25" with the in-process index
+    SEARCH_ENGINE = os.environ.get('SEARCH_ENGINE', 'mongo')
+    SEARCH_INDEX_PATH = os.environ.get('SEARCH_INDEX_PATH', '/tmp/search_index')
+    SEARCH_INDEX_RELOAD_SECONDS = int(os.environ.get('SEARCH_INDEX_RELOAD_SECONDS', 60))
+    # Seconds between two reads of the index changes made by other processes
+    SEARCH_INDEX_SYNC_SECONDS = float(os.environ.get('SEARCH_INDEX_SYNC_SECONDS', 2))
+    # Approximate number of index changes kept in Redis for processes catching up
+    SEARCH_INDEX_CHANGES_MAXLEN = int(os.environ.get('SEARCH_INDEX_CHANGES_MAXLEN', 100000))
+    # Number of keyword matches filtered by one MongoDB query
+    SEARCH_INDEX_FILTER_BATCH_SIZE = int(os.environ.get('SEARCH_INDEX_FILTER_BATCH_SIZE', 1000))
+
+    FACET_CACHE_EXPIRE_TIME = int(os.environ.get('FACET_CACHE_EXPIRE_TIME', 600))
+
+
+    # Expired jobs are moved to jobs_archive ARCHIVE_GRACE_DAYS days after their deadline,
+    # with their accepted and rejected applications when ARCHIVE_APPLICATIONS is set
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+    ARCHIVE_GRACE_DAYS = int(os.environ.get('ARCHIVE_GRACE_DAYS', 30))
+    ARCHIVE_APPLICATIONS = os.environ.get('ARCHIVE_APPLICATIONS', 'True') == 'True'
+
+    # Threads running independent MongoDB and Redis reads of a request concurrently
+    IO_POOL_SIZE = int(os.environ.get('IO_POOL_SIZE', 16))
+
+    # Largest page size of the paginated list endpoints
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 100))
+
+    # Maximum number of saved jobs applied to by one bulk apply request
+    BULK_APPLY_LIMIT = int(os.environ.get('BULK_APPLY_LIMIT', 50))
+
+    # Background task queue: seconds a worker holds a task before it is retried,
+    # attempts before a task moves to the dead letter list, and base retry delay in seconds
+    TASK_VISIBILITY_TIMEOUT = int(os.environ.get('TASK_VISIBILITY_TIMEOUT', 300))
+    TASK_MAX_ATTEMPTS = int(os.environ.get('TASK_MAX_ATTEMPTS', 5))
+    TASK_RETRY_DELAY = int(os.environ.get('TASK_RETRY_DELAY', 30))
+
+    # Applications removed per batch when a deleted job is purged
+    PURGE_BATCH_SIZE = int(os.environ.get('PURGE_BATCH_SIZE', 1000))
+
+    # Seconds a page of search results is cached, shared by all users
+    SEARCH_CACHE_EXPIRE_TIME = int(os.environ.get('SEARCH_CACHE_EXPIRE_TIME', 3600))
+    # Seconds searches without results are cached, short so new jobs show up soon
+    SEARCH_EMPTY_CACHE_EXPIRE_TIME = int(os.environ.get('SEARCH_EMPTY_CACHE_EXPIRE_TIME', 60))
+    # Popular searches: hours after which a search counts half, and number of searches tracked
+    POPULAR_SEARCH_HALF_LIFE_HOURS = float(os.environ.get('POPULAR_SEARCH_HALF_LIFE_HOURS', 24))
+    POPULAR_SEARCH_TRACKED = int(os.environ.get('POPULAR_SEARCH_TRACKED', 1000))
+    # Cache warming: number of popular searches kept warm, seconds between periodic runs
+    # (below SEARCH_CACHE_EXPIRE_TIME so they never expire) and seconds job writes are batched
+    SEARCH_WARM_TOP_N = int(os.environ.get('SEARCH_WARM_TOP_N', 50))
+    SEARCH_WARM_INTERVAL = int(os.environ.get('SEARCH_WARM_INTERVAL', 600))
+    SEARCH_WARM_DEBOUNCE = int(os.environ.get('SEARCH_WARM_DEBOUNCE', 30))
+
+    # Token expected in the X-Admin-Token header of the admin endpoints, which are disabled when unset
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+    # Cache stampede protection: seconds a recomputation holds its lock, seconds other
+    # requests wait for it on a miss, and seconds an expired value is still served
+    # while it is recomputed
+    CACHE_LOCK_LEASE = float(os.environ.get('CACHE_LOCK_LEASE', 10))
+    CACHE_LOCK_WAIT = float(os.environ.get('CACHE_LOCK_WAIT', 5))
+    CACHE_STALE_TTL = int(os.environ.get('CACHE_STALE_TTL', 300))
+    # How eagerly values are recomputed ahead of their expiry, 0 disables early recomputation
+    CACHE_EARLY_EXPIRY_BETA = float(os.environ.get('CACHE_EARLY_EXPIRY_BETA', 1.0))
+
+    # In-process cache tier in front of Redis, per worker process: entry and size
+    # bounds, and seconds a value is kept, bounding how stale it gets after other
+    # processes change it
+    LOCAL_CACHE_ENABLED = os.environ.get('LOCAL_CACHE_ENABLED', 'True') == 'True'
+    LOCAL_CACHE_MAX_ENTRIES = int(os.environ.get('LOCAL_CACHE_MAX_ENTRIES', 1000))
+    LOCAL_CACHE_MAX_BYTES = int(os.environ.get('LOCAL_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    LOCAL_CACHE_TTL = float(os.environ.get('LOCAL_CACHE_TTL', 10))
+    # Seconds between checks that no cache invalidation broadcast was missed
+    LOCAL_CACHE_VERSION_CHECK = float(os.environ.get('LOCAL_CACHE_VERSION_CHECK', 1))
+
+    # Encoding of cached values: "msgpack", or "json" to keep writing JSON text, and
+    # compression of values from CACHE_COMPRESSION_MIN_SIZE bytes: "zstd" (when the
+    # zstandard package is installed, zlib otherwise), "zlib" or "none"
+    CACHE_CODEC = os.environ.get('CACHE_CODEC', 'msgpack')
+    CACHE_COMPRESSION = os.environ.get('CACHE_COMPRESSION', 'zlib')
+    CACHE_COMPRESSION_MIN_SIZE = int(os.environ.get('CACHE_COMPRESSION_MIN_SIZE', 2048))
+    CACHE_COMPRESSION_LEVEL = int(os.environ.get('CACHE_COMPRESSION_LEVEL', 3))
+
+    # Seconds the home page feed of the latest jobs is cached
+    HOME_CACHE_EXPIRE_TIME = int(os.environ.get('HOME_CACHE_EXPIRE_TIME', 60))
+    # Seconds a job document is cached, updates and deletes write through before that
+    JOB_CACHE_EXPIRE_TIME = int(os.environ.get('JOB_CACHE_EXPIRE_TIME', 3600))
+
+    # Request metrics served by /api/admin/metrics: seconds between flushes of each
+    # process's counts to Redis, and latency in milliseconds above which a request is
+    # logged with its MongoDB and Redis costs (0 logs none)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 10))
+    SLOW_REQUEST_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 1000))
+
+    # Request tracing: share of requests traced, whether requests slower than
+    # SLOW_REQUEST_THRESHOLD_MS are traced too, and where traces go: "jsonl" appends
+    # them to TRACE_FILE, "otlp" posts them to an OpenTelemetry collector
+    TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'True') == 'True'
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.01))
+    # Follow the sampled flag of inbound traceparent headers, only when a trusted proxy sets them
+    TRACE_TRUST_TRACEPARENT = os.environ.get('TRACE_TRUST_TRACEPARENT', 'False') == 'True'
+    TRACE_SLOW_REQUESTS = os.environ.get('TRACE_SLOW_REQUESTS', 'True') == 'True'
+    TRACE_EXPORTER = os.environ.get('TRACE_EXPORTER', 'jsonl')
+    TRACE_FILE = os.environ.get('TRACE_FILE', '/tmp/logs/traces.jsonl')
+    # Size at which TRACE_FILE is rotated, and rotated files kept
+    TRACE_FILE_MAX_BYTES = int(os.environ.get('TRACE_FILE_MAX_BYTES', 50 * 1024 * 1024))
+    TRACE_FILE_BACKUP_COUNT = int(os.environ.get('TRACE_FILE_BACKUP_COUNT', 3))
+    TRACE_OTLP_ENDPOINT = os.environ.get('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+    # Spans kept per trace, and times one command shape has to repeat in a request
+    # to be reported as a likely N+1 query
+    TRACE_MAX_SPANS = int(os.environ.get('TRACE_MAX_SPANS', 1000))
+    TRACE_REPEAT_THRESHOLD = int(os.environ.get('TRACE_REPEAT_THRESHOLD', 10))
+
+    # On-demand profiling of single requests, off by default. Requests are profiled
+    # when they carry a signed X-Profile header, or sampled per route with
+    # PROFILE_SAMPLE_RATES, e.g. "/api/user/searchjobs=0.01". PROFILER is "cprofile"
+    # or "sampling". Profiles are kept in Redis for PROFILE_TTL seconds, the latest
+    # PROFILE_MAX_KEPT of them
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+    PROFILE_SAMPLE_RATES = os.environ.get('PROFILE_SAMPLE_RATES', '')
+    PROFILER = os.environ.get('PROFILER', 'cprofile')
+    PROFILE_SAMPLING_INTERVAL_MS = float(os.environ.get('PROFILE_SAMPLING_INTERVAL_MS', 5))
+    PROFILE_TTL = int(os.environ.get('PROFILE_TTL', 86400))
+    PROFILE_MAX_KEPT = int(os.environ.get('PROFILE_MAX_KEPT', 100))
@@ -0,0 +1,99 @@
+class LazyUserModel:
+    """
+    Base of the JobSeeker and Employer models.
+
+    Fields live in __slots__ rather than a per-instance __dict__, and only the
+    fields of the document the model was built from are set. Any other field is
+    read from MongoDB on first access: the missing FIELDS together in one query,
+    each of the HEAVY_FIELDS lists on its own. Assigned fields are tracked so
+    save_to_db only writes what changed. Reads and writes go through the
+    REPOSITORY of the subclass.
+
+    Lists changed in place are not tracked, assign the list back to save it.
+    """
+    __slots__ = ('_id', '_db', '_dirty')
+
+    REPOSITORY = None   # Repository module of the collection
+    FIELDS = ()         # Scalar fields, default to ''
+    HEAVY_FIELDS = ()   # List fields, default to []
+
+    # Flask-Login user interface. UserMixin is not used as a base since a base
+    # without __slots__ would give every instance a __dict__ again.
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._ALL_FIELDS = frozenset(cls.FIELDS + cls.HEAVY_FIELDS)
+
+    def __init__(self, data=None, db=None):
+        object.__setattr__(self, '_db', db)
+        object.__setattr__(self, '_dirty', None)
+        data = data or {}
+        object.__setattr__(self, '_id', str(data['_id']) if data.get('_id') else None)
+        for name in self._ALL_FIELDS.intersection(data):
+            object.__setattr__(self, name, data[name])
+
+    def __getattr__(self, name):
+        # Only called for fields whose slot was never set, i.e. not loaded yet
+        if name in self.HEAVY_FIELDS:
+            self._hydrate((name,))
+        elif name in self.FIELDS:
+            self._hydrate(tuple(field for field in self.FIELDS if not self._is_loaded(field)))
+        else:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in self._ALL_FIELDS:
+            if self._dirty is None:
+                object.__setattr__(self, '_dirty', set())
+            self._dirty.add(name)
+
+    def _is_loaded(self, name):
+        try:
+            object.__getattribute__(self, name)
+            return True
+        except AttributeError:
+            return False
+
+    def _default(self, name):
+        return [] if name in self.HEAVY_FIELDS else ''
+
+    def _hydrate(self, names):
+        """Load fields from the stored document, or use their defaults for an unsaved model."""
+        document = None
+        if self._id and self._db is not None:
+            document = self.REPOSITORY.find_fields(self._db, self._id, names)
+        for name in names:
+            object.__setattr__(self, name, (document or {}).get(name, self._default(name)))
+
+    def save_to_db(self, db=None):
+        """
+        Insert a new model with all of its fields, or write only the changed fields
+        of a stored one with $set.
+        """
+        db = self._db if db is None else db
+        if self._id:
+            if self._dirty:
+                changes = {name: getattr(self, name) for name in self._dirty}
+                self.REPOSITORY.update_fields(db, self._id, changes)
+        else:
+            document = {name: getattr(self, name) for name in self.FIELDS + self.HEAVY_FIELDS}
+            object.__setattr__(self, '_id', str(self.REPOSITORY.insert(db, document)))
+        object.__setattr__(self, '_dirty', None)
+        return self
+
+    def get_id(self):
+        return str(self._id)  # Return a unique identifier for the user
+
+    def __eq__(self, other):
+        if isinstance(other, LazyUserModel):
+            return self.get_id() == other.get_id()
+        return NotImplemented
+
+    def __hash__(self):
+        # Consistent with __eq__: equal users hash the same in sets and dict keys
+        return hash(self.get_id())
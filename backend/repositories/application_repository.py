@@ -0,0 +1,141 @@
+"""
+Query shapes of the applications collection and its archive.
+
+Every read names the fields it needs.
+"""
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from utils.archive_utils import ARCHIVED_APPLICATIONS
+from utils.job_utils import APPLICATION_STATUS_FIELDS
+
+# Application state shown to the applicant, with the timestamps its validator is derived from
+STATUS_PROJECTION = {
+    **{field: 1 for field in APPLICATION_STATUS_FIELDS},
+    'job_id': 1, 'applied_on': 1, 'status_updated_on': 1
+}
+# Applications listed to the employer
+APPLICANT_PROJECTION = {**STATUS_PROJECTION, 'user_id': 1}
+REFERENCE_PROJECTION = {'user_id': 1, 'job_id': 1}
+
+DUPLICATE_KEY = 11000
+
+
+def _collection(db, archived):
+    return db[ARCHIVED_APPLICATIONS] if archived else db.applications
+
+
+def find_for_job_seeker(db, user_id, job_id, projection=STATUS_PROJECTION):
+    """Find the application of a job seeker to a job, None if they did not apply."""
+    return db.applications.find_one({'user_id': ObjectId(user_id), 'job_id': ObjectId(job_id)}, projection)
+
+
+def find_for_jobs(db, user_id, job_ids, projection=STATUS_PROJECTION):
+    """Return the applications of a job seeker to the given jobs, keyed by job id."""
+    applications = db.applications.find(
+        {'user_id': ObjectId(user_id), 'job_id': {'$in': [ObjectId(job_id) for job_id in job_ids]}}, projection
+    )
+    return {application['job_id']: application for application in applications}
+
+
+def find_by_user(db, user_id, projection=STATUS_PROJECTION, include_archived=False):
+    applications = list(db.applications.find({'user_id': ObjectId(user_id)}, projection))
+    if include_archived:
+        applications.extend(_collection(db, True).find({'user_id': ObjectId(user_id)}, projection))
+    return applications
+
+
+def find_by_job(db, job_id, projection=APPLICANT_PROJECTION, archived=False, limit=0):
+    """List the applications of a job by application date, up to limit (0 for all)."""
+    return list(_collection(db, archived).find({'job_id': ObjectId(job_id)}, projection)
+                .sort('applied_on', 1).limit(limit))
+
+
+def count_by_job(db, job_id, archived=False):
+    return _collection(db, archived).count_documents({'job_id': ObjectId(job_id)})
+
+
+def find_by_id(db, application_id, projection=REFERENCE_PROJECTION):
+    """Find an application, in the archive if it was closed and archived with its job."""
+    query = {'_id': ObjectId(application_id)}
+    return db.applications.find_one(query, projection) or _collection(db, True).find_one(query, projection)
+
+
+def _new_application(applied_on):
+    return {
+        "applied_on": applied_on,
+        "applied_status": True,  # User has applied
+        "under_review_status": False,  # Initially not under review
+        "rejected_status": False,  # Initially not rejected
+        "accepted_status": False
+    }
+
+
+def apply(db, user_id, job_id):
+    """
+    Apply a job seeker to a job in a single write.
+
+    The upsert only inserts when no application exists, and the unique
+    (user_id, job_id) index turns a concurrent duplicate into a no-op, so
+    double submits and retried requests never create a second application.
+
+    Returns:
+        bool: True if the application was created, False if it already existed.
+    """
+    try:
+        result = db.applications.update_one(
+            {'user_id': ObjectId(user_id), 'job_id': ObjectId(job_id)},
+            {'$setOnInsert': _new_application(datetime.now(timezone.utc))},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Another request inserted the same application between our match and insert
+        return False
+    return result.upserted_id is not None
+
+
+def apply_many(db, user_id, job_ids):
+    """
+    Apply a job seeker to several jobs with one bulk write.
+
+    Returns:
+        list: The job ids whose application was created, the others already existed.
+    """
+    if not job_ids:
+        return []
+    applied_on = datetime.now(timezone.utc)
+    job_ids = [ObjectId(job_id) for job_id in job_ids]
+    try:
+        result = db.applications.bulk_write([
+            UpdateOne({'user_id': ObjectId(user_id), 'job_id': job_id},
+                      {'$setOnInsert': _new_application(applied_on)}, upsert=True)
+            for job_id in job_ids
+        ], ordered=False)
+        upserted = result.upserted_ids
+    except BulkWriteError as e:
+        # Duplicates raced in by a concurrent request are already applied, anything else is a real failure
+        if any(error['code'] != DUPLICATE_KEY for error in e.details['writeErrors']):
+            raise
+        upserted = {upsert['index']: upsert['_id'] for upsert in e.details.get('upserted', [])}
+    return [job_ids[index] for index in sorted(upserted)]
+
+
+def set_status(db, application_id, status_field, status_updates):
+    """
+    Update the statuses of an application unless status_field is already set.
+    Archived applications are updated in the archive.
+    """
+    query = {'_id': ObjectId(application_id), status_field: {'$ne': True}}
+    result = db.applications.update_one(query, {'$set': status_updates})
+    if result.matched_count == 0:
+        result = _collection(db, True).update_one(query, {'$set': status_updates})
+    return result
+
+
+def delete_by_job(db, job_id):
+    return db.applications.delete_many({'job_id': ObjectId(job_id)})
+
+
+def delete_by_ids(db, application_ids):
+    return db.applications.delete_many({'_id': {'$in': list(application_ids)}})
@@ -0,0 +1,53 @@
+"""
+Query shapes of the employer collection.
+
+Every read names the fields it needs, so password hashes and unused profile
+data never leave MongoDB.
+"""
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+# Fields loaded with the logged in employer on every request
+SESSION_PROJECTION = {'employerFirstName': 1, 'employerLastName': 1, 'employerEmail': 1}
+LOGIN_PROJECTION = {**SESSION_PROJECTION, 'employerPassword': 1}
+PASSWORD_PROJECTION = {'employerPassword': 1}
+PROFILE_PROJECTION = {'_id': 0, 'employerPassword': 0}
+UPDATED_PROFILE_PROJECTION = {'employerPassword': 0}
+CURRENT_USER_PROJECTION = {'employerEmail': 1}
+
+# The model without its list fields, which are loaded on first access
+MODEL_PROJECTION = {'employerEducation': 0, 'employerWorkExperience': 0}
+
+
+def find_by_id(db, employer_id, projection=PROFILE_PROJECTION):
+    return db.employer.find_one({'_id': ObjectId(employer_id)}, projection)
+
+
+def find_by_email(db, email, projection=LOGIN_PROJECTION):
+    return db.employer.find_one({'employerEmail': email}, projection)
+
+
+def update_profile(db, employer_id, changes):
+    """Apply profile changes and return the updated profile, or None if the employer does not exist."""
+    return db.employer.find_one_and_update(
+        {'_id': ObjectId(employer_id)}, {'$set': changes},
+        projection=UPDATED_PROFILE_PROJECTION, return_document=ReturnDocument.AFTER
+    )
+
+
+def update_password(db, email, password_hash):
+    return db.employer.update_one({'employerEmail': email}, {'$set': {'employerPassword': password_hash}})
+
+
+def find_fields(db, employer_id, fields):
+    """Return only the given fields of the employer, used to load model fields on first access."""
+    return find_by_id(db, employer_id, {field: 1 for field in fields})
+
+
+def insert(db, document):
+    """Insert a new employer and return its id."""
+    return db.employer.insert_one(document).inserted_id
+
+
+def update_fields(db, employer_id, changes):
+    return db.employer.update_one({'_id': ObjectId(employer_id)}, {'$set': changes})
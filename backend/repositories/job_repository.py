@@ -0,0 +1,156 @@
+"""
+Query shapes of the jobs collection and its archive.
+
+Every read names the fields it needs. Search and batch maintenance queries
+live in utils/job_search.py, utils/search_engine.py and utils/archive_utils.py.
+"""
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import ReturnDocument
+from utils import job_cache
+from utils.archive_utils import ARCHIVED_JOBS
+from utils.job_utils import build_projection
+from utils.search_utils import open_jobs_query
+from utils.suggest_utils import SUGGEST_FIELDS
+
+# Job pages: every job field plus the timestamps their validators are derived from
+DETAIL_PROJECTION = {**build_projection(), 'updatedAt': 1}
+# Job returned to the employer after an update, and cached by the job document cache
+UPDATED_JOB_PROJECTION = {**DETAIL_PROJECTION, 'employer_id': 1}
+CACHED_PROJECTION = UPDATED_JOB_PROJECTION
+# Existence and ownership checks
+ID_PROJECTION = {'_id': 1}
+# Fields the search suggestions are built from
+SUGGESTION_PROJECTION = {field: 1 for field in SUGGEST_FIELDS.values()}
+# Soft deleted jobs stay in the collection until the background purge removes them
+NOT_DELETED = {'deleted': {'$ne': True}}
+
+
+def _owned_query(job_id, employer_id=None):
+    query = {'_id': ObjectId(job_id), **NOT_DELETED}
+    if employer_id is not None:
+        query['employer_id'] = ObjectId(employer_id)
+    return query
+
+
+def find_by_id(db, job_id, projection=DETAIL_PROJECTION):
+    return db.jobs.find_one(_owned_query(job_id), projection)
+
+
+def find_owned(db, job_id, employer_id, projection=ID_PROJECTION):
+    """Find a job of the given employer, None if it does not exist or belongs to someone else."""
+    return db.jobs.find_one(_owned_query(job_id, employer_id), projection)
+
+
+def find_with_archive(db, job_id, projection=DETAIL_PROJECTION, employer_id=None):
+    """
+    Find a job in the jobs collection or, failing that, in the archive.
+
+    Returns:
+        tuple: (job document or None, whether the job is archived)
+    """
+    query = _owned_query(job_id, employer_id)
+    job = db.jobs.find_one(query, projection)
+    if job:
+        return job, False
+    job = db[ARCHIVED_JOBS].find_one(query, projection)
+    return job, job is not None
+
+
+def find_cached(db, job_ids, include_archived=False):
+    """
+    Read jobs through the job document cache, loading the missing ones with one query.
+
+    Returns:
+        dict: job ObjectId -> (job with the CACHED_PROJECTION fields, whether it is archived)
+    """
+    found, missing = job_cache.get_jobs([ObjectId(job_id) for job_id in job_ids])
+    if missing:
+        loaded = {job['_id']: (job, False)
+                  for job in db.jobs.find({'_id': {'$in': missing}, **NOT_DELETED}, CACHED_PROJECTION)}
+        not_found = [job_id for job_id in missing if job_id not in loaded]
+        if include_archived and not_found:
+            loaded.update((job['_id'], (job, True))
+                          for job in db[ARCHIVED_JOBS].find({'_id': {'$in': not_found}}, CACHED_PROJECTION))
+        job_cache.fill(loaded.values())
+        found.update(loaded)
+    if not include_archived:
+        found = {job_id: entry for job_id, entry in found.items() if not entry[1]}
+    return found
+
+
+def find_cached_with_archive(db, job_id):
+    """Cached counterpart of find_with_archive, returns (job or None, whether the job is archived)."""
+    return find_cached(db, [job_id], include_archived=True).get(ObjectId(job_id), (None, False))
+
+
+def find_cached_by_id(db, job_id):
+    """Cached counterpart of find_by_id, archived jobs are not returned."""
+    return find_cached(db, [job_id]).get(ObjectId(job_id), (None, False))[0]
+
+
+def find_open_by_id(db, job_id, projection=ID_PROJECTION):
+    """Find a job that still takes applications, None if it does not exist or its deadline passed."""
+    return db.jobs.find_one({'$and': [{'_id': ObjectId(job_id)}, open_jobs_query()]}, projection)
+
+
+def find_open_by_ids(db, job_ids, projection=ID_PROJECTION):
+    return db.jobs.find({'$and': [{'_id': {'$in': [ObjectId(job_id) for job_id in job_ids]}}, open_jobs_query()]},
+                        projection)
+
+
+def find_by_ids(db, job_ids, projection):
+    return db.jobs.find({'_id': {'$in': [ObjectId(job_id) for job_id in job_ids]}, **NOT_DELETED}, projection)
+
+
+def find_by_employer(db, employer_id, projection, archived=False):
+    collection = db[ARCHIVED_JOBS] if archived else db.jobs
+    return collection.find({'employer_id': ObjectId(employer_id), **NOT_DELETED}, projection)
+
+
+def find_open(db, projection=DETAIL_PROJECTION, limit=10):
+    return db.jobs.find(open_jobs_query(), projection).limit(limit)
+
+
+def find_all(db, projection=DETAIL_PROJECTION):
+    return db.jobs.find(NOT_DELETED, projection)
+
+
+def insert(db, job):
+    return db.jobs.insert_one(job).inserted_id
+
+
+def update(db, job_id, changes, projection=UPDATED_JOB_PROJECTION):
+    """
+    Apply changes to a job and return the updated job in the same round trip.
+    None if the job was deleted in the meantime.
+    """
+    return db.jobs.find_one_and_update(
+        _owned_query(job_id), {'$set': changes},
+        projection=projection, return_document=ReturnDocument.AFTER
+    )
+
+
+def delete(db, job_id):
+    return db.jobs.delete_one({'_id': ObjectId(job_id)})
+
+
+def soft_delete(db, job_id, employer_id):
+    """
+    Flag a job of the given employer as deleted, hiding it from every read.
+
+    Returns:
+        bool: False if the job does not exist, is already deleted or belongs to someone else.
+    """
+    now = datetime.now(timezone.utc)
+    result = db.jobs.update_one(_owned_query(job_id, employer_id),
+                                {'$set': {'deleted': True, 'deletedAt': now, 'updatedAt': now}})
+    return result.matched_count == 1
+
+
+def find_deleted(db, job_id, projection=ID_PROJECTION):
+    return db.jobs.find_one({'_id': ObjectId(job_id), 'deleted': True}, projection)
+
+
+def find_deleted_ids(db):
+    return [job['_id'] for job in db.jobs.find({'deleted': True}, ID_PROJECTION)]
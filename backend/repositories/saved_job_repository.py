@@ -0,0 +1,62 @@
+"""
+Query shapes of the saved_jobs collection.
+
+Every saved job is its own document, unique per (user_id, job_id), so saving
+and unsaving are single idempotent writes and the list is read a page at a time.
+"""
+from datetime import datetime, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+
+JOB_ID_PROJECTION = {'_id': 0, 'job_id': 1}
+
+
+def save(db, user_id, job_id):
+    """Save a job for a user. Returns True if it was not saved yet."""
+    result = db.saved_jobs.update_one(
+        {'user_id': ObjectId(user_id), 'job_id': ObjectId(job_id)},
+        {'$setOnInsert': {'savedAt': datetime.now(timezone.utc)}},
+        upsert=True
+    )
+    return result.upserted_id is not None
+
+
+def unsave(db, user_id, job_id):
+    """Remove a saved job. Returns True if it was saved."""
+    return db.saved_jobs.delete_one({'user_id': ObjectId(user_id), 'job_id': ObjectId(job_id)}).deleted_count > 0
+
+
+def find_page(db, user_id, skip, limit):
+    """Return the job ids of one page of a user's saved jobs, most recently saved first."""
+    cursor = db.saved_jobs.find({'user_id': ObjectId(user_id)}, JOB_ID_PROJECTION).sort('savedAt', -1).skip(skip).limit(limit)
+    return [saved['job_id'] for saved in cursor]
+
+
+def find_job_ids(db, user_id):
+    return [saved['job_id'] for saved in db.saved_jobs.find({'user_id': ObjectId(user_id)}, JOB_ID_PROJECTION)]
+
+
+def find_saved(db, user_id, job_ids):
+    """Return which of the given jobs the user has saved."""
+    saved = db.saved_jobs.find(
+        {'user_id': ObjectId(user_id), 'job_id': {'$in': [ObjectId(job_id) for job_id in job_ids]}}, JOB_ID_PROJECTION
+    )
+    return {saved_job['job_id'] for saved_job in saved}
+
+
+def count(db, user_id):
+    return db.saved_jobs.count_documents({'user_id': ObjectId(user_id)})
+
+
+def delete_by_jobs(db, job_ids):
+    return db.saved_jobs.delete_many({'job_id': {'$in': [ObjectId(job_id) for job_id in job_ids]}})
+
+
+def save_many(db, user_id, saved_at_by_job):
+    """Save several jobs for a user at once, given as job id -> savedAt. Jobs already saved are kept."""
+    if saved_at_by_job:
+        db.saved_jobs.bulk_write([
+            UpdateOne({'user_id': ObjectId(user_id), 'job_id': ObjectId(job_id)},
+                      {'$setOnInsert': {'savedAt': saved_at}}, upsert=True)
+            for job_id, saved_at in saved_at_by_job.items()
+        ], ordered=False)
@@ -0,0 +1,65 @@
+"""
+Query shapes of the job seeker collection (db.user).
+
+Every read names the fields it needs, so password hashes and unused profile
+data never leave MongoDB.
+"""
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+# Fields loaded with the logged in user on every request
+SESSION_PROJECTION = {'jobSeekerFirstName': 1, 'jobSeekerLastName': 1, 'jobSeekerEmail': 1}
+LOGIN_PROJECTION = {**SESSION_PROJECTION, 'jobSeekerPassword': 1}
+PASSWORD_PROJECTION = {'jobSeekerPassword': 1}
+PROFILE_PROJECTION = {'_id': 0, 'jobSeekerPassword': 0}
+UPDATED_PROFILE_PROJECTION = {'jobSeekerPassword': 0}
+APPLICANT_PROJECTION = {
+    'jobSeekerFirstName': 1, 'jobSeekerLastName': 1, 'jobSeekerEmail': 1,
+    'jobSeekerPhoneNumber': 1, 'jobSeekerLocation': 1
+}
+
+# The model without its list fields, which are loaded on first access
+MODEL_PROJECTION = {'jobSeekerEducation': 0, 'jobSeekerWorkExperience': 0}
+
+
+def find_by_id(db, user_id, projection=PROFILE_PROJECTION):
+    return db.user.find_one({'_id': ObjectId(user_id)}, projection)
+
+
+def find_by_email(db, email, projection=LOGIN_PROJECTION):
+    return db.user.find_one({'jobSeekerEmail': email}, projection)
+
+
+def find_by_ids(db, user_ids, projection=APPLICANT_PROJECTION):
+    """Return the users with the given ids, keyed by _id."""
+    return {user['_id']: user for user in db.user.find({'_id': {'$in': list(user_ids)}}, projection)}
+
+
+def find_all(db, projection=PROFILE_PROJECTION):
+    return db.user.find({}, projection)
+
+
+def update_profile(db, user_id, changes):
+    """Apply profile changes and return the updated profile, or None if the user does not exist."""
+    return db.user.find_one_and_update(
+        {'_id': ObjectId(user_id)}, {'$set': changes},
+        projection=UPDATED_PROFILE_PROJECTION, return_document=ReturnDocument.AFTER
+    )
+
+
+def update_password(db, email, password_hash):
+    return db.user.update_one({'jobSeekerEmail': email}, {'$set': {'jobSeekerPassword': password_hash}})
+
+
+def find_fields(db, user_id, fields):
+    """Return only the given fields of the user, used to load model fields on first access."""
+    return find_by_id(db, user_id, {field: 1 for field in fields})
+
+
+def insert(db, document):
+    """Insert a new user and return its id."""
+    return db.user.insert_one(document).inserted_id
+
+
+def update_fields(db, user_id, changes):
+    return db.user.update_one({'_id': ObjectId(user_id)}, {'$set': changes})
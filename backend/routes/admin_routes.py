@@ -0,0 +1,144 @@
+from flask import request, jsonify, Response
+from app import app
+from app import db
+import logging
+import os
+import pstats
+import redis
+from utils.admin_utils import admin_required
+from utils.search_warmer import popular_searches, warm_search_cache
+from utils.local_cache import get_local_cache
+from utils import invalidation_bus
+from utils import metrics
+from utils import profiling
+
+
+@app.route('/api/admin/popular-searches', methods=['GET'])
+@admin_required
+def get_popular_searches():
+    """
+    List the most popular searches, with how long their first page stays cached.
+
+    Query parameters:
+        limit (int): The maximum number of searches to return (default is 20, from 1 to 100).
+    """
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    try:
+        return jsonify({"searches": popular_searches(limit)}), 200
+    except redis.RedisError as e:
+        logging.error(f"Failed to read the popular searches: {e}")
+        return jsonify({"error": "Popular searches are unavailable"}), 503
+
+
+@app.route('/api/admin/search-cache/warm', methods=['POST'])
+@admin_required
+def warm_popular_searches():
+    """
+    Warm the search cache right away instead of waiting for the next scheduled run.
+
+    Query parameters:
+        top (int): Number of popular searches to warm (default is SEARCH_WARM_TOP_N).
+    """
+    top = request.args.get('top', type=int)
+    try:
+        return jsonify({"warmed": warm_search_cache(db, top)}), 200
+    except redis.RedisError as e:
+        logging.error(f"Failed to warm the search cache: {e}")
+        return jsonify({"error": "The search cache is unavailable"}), 503
+
+
+@app.route('/api/admin/local-cache', methods=['GET'])
+@admin_required
+def get_local_cache_stats():
+    """
+    Report the size and hit ratio of the in-process cache of the worker serving the request.
+    Each worker process has its own cache, so repeated calls may report different workers.
+    """
+    local = get_local_cache()
+    return jsonify({
+        "pid": os.getpid(),
+        "enabled": local is not None,
+        "stats": local.stats() if local else None,
+        "invalidations": invalidation_bus.status()
+    }), 200
+
+
+@app.route('/api/admin/metrics', methods=['GET'])
+@admin_required
+def get_metrics():
+    """
+    Request, MongoDB, Redis and cache metrics of all processes, in the Prometheus text format.
+    """
+    try:
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4'), 200
+    except redis.RedisError as e:
+        logging.error(f"Failed to read the metrics: {e}")
+        return jsonify({"error": "Metrics are unavailable"}), 503
+
+
+@app.route('/api/admin/profiles/token', methods=['POST'])
+@admin_required
+def create_profile_token():
+    """
+    Sign an X-Profile header value that profiles the requests sending it, see utils/profiling.py.
+
+    Query parameters:
+        ttl (int): Seconds the value stays valid (default is 300, at most 3600).
+    """
+    ttl = min(request.args.get('ttl', 300, type=int), 3600)
+    value, expires = profiling.sign_profile_header(ttl)
+    return jsonify({
+        "enabled": app.config.get('PROFILING_ENABLED', False),
+        "header": profiling.PROFILE_HEADER,
+        "value": value,
+        "expires": expires
+    }), 200
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@admin_required
+def get_profiles():
+    """
+    List the stored request profiles, newest first.
+
+    Query parameters:
+        limit (int): The maximum number of profiles to return (default is 50, at most 100).
+    """
+    limit = max(1, min(request.args.get('limit', 50, type=int), 100))
+    try:
+        return jsonify({"profiles": profiling.list_profiles(limit)}), 200
+    except redis.RedisError as e:
+        logging.error(f"Failed to list the profiles: {e}")
+        return jsonify({"error": "Profiles are unavailable"}), 503
+
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+@admin_required
+def get_profile(profile_id):
+    """
+    Download a profile: a pstats file for cProfile profiles, collapsed stacks for sampled ones.
+
+    Query parameters:
+        format (str): "text" to return the pstats report of a cProfile profile instead of the file.
+        sort (str): Sort order of the report (default is "cumulative").
+        limit (int): Number of functions in the report (default is 50).
+    """
+    try:
+        meta, data = profiling.get_profile(profile_id)
+    except redis.RedisError as e:
+        logging.error(f"Failed to fetch profile {profile_id}: {e}")
+        return jsonify({"error": "Profiles are unavailable"}), 503
+    if meta is None:
+        return jsonify({"error": "Profile not found"}), 404
+
+    if meta["profiler"] == 'cprofile' and request.args.get('format') == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            return jsonify({"error": f"Invalid sort: {sort}"}), 400
+        report = profiling.format_pstats(data, sort, request.args.get('limit', 50, type=int))
+        return Response(report, mimetype='text/plain'), 200
+
+    mimetype = 'text/plain' if meta["profiler"] == 'sampling' else 'application/octet-stream'
+    response = Response(data, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{profile_id}.{meta["extension"]}"'
+    return response, 200
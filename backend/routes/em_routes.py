@@ -5,13 +5,29 @@ from models.jobschema import JobPostSchema
 from flask_login import logout_user, login_required, login_user, current_user
 from app import bcrypt
 from app import db
+from models.config import Config
 import pymongo
 from bson import ObjectId
-import traceback
 from utils.utils import validate_password, is_valid_email
 from marshmallow import ValidationError
 from datetime import datetime, timezone
 import logging
+from utils.job_utils import parse_fields, build_projection, serialize_job
+from utils.search_engine import index_job
+from utils.suggest_utils import update_suggestions
+from utils.salary_utils import parse_salary
+from utils.concurrency_utils import run_concurrently
+from utils.tracing import span
+from utils.tasks import enqueue_purge_job, schedule_search_warming
+from utils.job_search import invalidate_home_feed
+from utils import job_cache
+from repositories import (
+    employer_repository, user_repository, job_repository, application_repository
+)
+from utils.http_utils import (
+    job_validator, build_etag, store_validators, get_cached_etag, invalidate_job_validator,
+    invalidate_application_validator, request_is_fresh, add_validators, not_modified
+)
 
 
 
@@ -115,7 +131,7 @@ def em_login():
         return jsonify({"error": "Email and password are required"}), 400
     
     # Find the employer based on the email
-    em_data = db.employer.find_one({"employerEmail": email})
+    em_data = employer_repository.find_by_email(db, email)
 
     if not em_data:
         return jsonify({"error": "Invalid credentials"}), 401
@@ -156,15 +172,14 @@ def em_current_user_info():
             return jsonify({"error": "Unauthorized"})
         
         # Find the current user in the database
-        em_data = db.employer.find_one({'_id': ObjectId(em_id)})
+        em_data = employer_repository.find_by_id(db, em_id, employer_repository.CURRENT_USER_PROJECTION)
         return jsonify({
             "_id": str(em_data["_id"]),
-            "email": em_data["email"]
+            "email": em_data["employerEmail"]
         })
         
     except Exception as e:
-        print("Unexpected error: ", e)
-        traceback.print_exc()
+        logging.exception(f"Unexpected error: {e}")
         return jsonify({"error": "An error occurred while fetching user info. Please try again later"}), 500
 
 
@@ -182,11 +197,9 @@ def get_employer_profile():
     """
      
     # Get employer data from the database
-    employer_data = db.employer.find_one({'_id': ObjectId(current_user._id)})
+    # The projection leaves out the password and the _id
+    employer_data = employer_repository.find_by_id(db, current_user._id)
     if employer_data:
-        # Remove sensitive data from the employer data
-        employer_data.pop('employerPassword', None)
-        employer_data.pop('_id', None)
         return jsonify(employer_data), 200
     else:
         return jsonify({"error": "Employer not found"}), 404
@@ -214,18 +227,13 @@ def update_employer_profile():
         data.pop('_id', None)
 
         try:
-            # Update the document in MongoDB
-            result = db.employer.update_one(
-                {'_id': ObjectId(current_user._id)},
-                {'$set': data}
-            )
+            # Update the document in MongoDB and fetch the updated employer data, excluding sensitive information
+            updated_employer_data = employer_repository.update_profile(db, current_user._id, data)
 
-            if result.matched_count == 0:
+            if updated_employer_data is None:
                 # No document found to update
                 return jsonify({"error": "Employer not found"}), 404
 
-            # Fetch the updated employer data, excluding sensitive information
-            updated_employer_data = db.employer.find_one({'_id': ObjectId(current_user._id)}, {'employerPassword': 0})
             updated_employer_data['_id'] = str(updated_employer_data['_id'])
 
             # Return the updated employer data
@@ -280,7 +288,7 @@ def update_employer_password():
             return jsonify({"error": "Email, old and new passwords are required"}), 400
 
         # Find the employer in the database by email
-        existing_employer_data = db.employer.find_one({'employerEmail': email})
+        existing_employer_data = employer_repository.find_by_email(db, email, employer_repository.PASSWORD_PROJECTION)
 
         if existing_employer_data:
             # Check if the old password is correct
@@ -291,17 +299,13 @@ def update_employer_password():
             new_pass_hash = bcrypt.generate_password_hash(new_password, rounds=12).decode('utf-8')
 
             # Update the employer's password in the database
-            db.employer.update_one(
-                {'employerEmail': email},
-                {'$set': {'employerPassword': new_pass_hash}}
-            )
+            employer_repository.update_password(db, email, new_pass_hash)
             return jsonify({"message": "Employer password updated successfully"}), 200
         else:
             return jsonify({"error": "Employer not found"}), 404
     except pymongo.errors.PyMongoError as e:
         # Handle unexpected errors
-        print("Unexpected error: ", e)
-        traceback.print_exc()
+        logging.exception(f"Unexpected error: {e}")
         return jsonify({"error": "An error occurred while updating employer password. Please try again later"}), 500
     
 
@@ -372,11 +376,17 @@ def post_jobs():
         "employer_id": ObjectId(current_user._id),
         "createdAt": job_creation_time
     }
+    # Store the salary as numbers next to the original text for filtering and sorting
+    job_data.update(parse_salary(job_data['jobSalary']))
 
     try:
-        result = db.jobs.insert_one(job_data)
+        job_id = job_repository.insert(db, job_data)
+        index_job(job_data)
+        update_suggestions(None, job_data)
+        schedule_search_warming()
+        invalidate_home_feed()
         
-        job_data['_id'] = str(result.inserted_id)  # Convert ObjectId to string
+        job_data['_id'] = str(job_id)  # Convert ObjectId to string
         job_data['employer_id'] = str(job_data['employer_id'])  # Convert this ObjectId to string if necessary
 
 
@@ -384,7 +394,7 @@ def post_jobs():
     except pymongo.errors.DuplicateKeyError:
         return jsonify({'error':'You have already posted a job with this ID'}), 400
     except pymongo.errors.PyMongoError as e:
-        print("pymongo error", e)
+        logging.error(f"Failed to post job: {e}")
         return jsonify({"error": "An error occured while posting the job. Please try again later"}), 500
 
 @app.route('/api/employer/updatejob/<job_id>', methods=['PATCH'])
@@ -407,7 +417,7 @@ def update_job(job_id):
         return jsonify({"error": "Access denied! Only employers can update jobs."}), 403
 
     # Fetch the job to ensure it exists and belongs to the current employer
-    job = db.jobs.find_one({"_id": ObjectId(job_id), "employer_id": ObjectId(current_user._id)})
+    job = job_repository.find_owned(db, job_id, current_user._id, job_repository.SUGGESTION_PROJECTION)
     if not job:
         return jsonify({"error": "Job not found or you do not have permission to edit this job"}), 404
 
@@ -429,16 +439,28 @@ def update_job(job_id):
         update_data['startDate'] = datetime.combine(update_data['startDate'], datetime.min.time())
     if 'appDeadline' in update_data:
         update_data['appDeadline'] = datetime.combine(update_data['appDeadline'], datetime.min.time())
+    if 'jobSalary' in update_data:
+        update_data.update(parse_salary(update_data['jobSalary']))
 
 
     # Include the update time
     update_data['updatedAt'] = datetime.now(timezone.utc)
 
     try:
-        db.jobs.update_one({"_id": ObjectId(job_id)}, {"$set": update_data})
+        # Update the job and fetch the updated job document in one round trip
+        updated_job = job_repository.update(db, job_id, update_data)
+        if updated_job is None:
+            # Deleted since it was read above
+            return jsonify({"error": "Job not found or you do not have permission to edit this job"}), 404
+        job_cache.write_through(updated_job)
+
+        # Write the new validator through so cached copies of the job are revalidated
+        invalidate_job_validator(job_id, job_validator(update_data)[1])
 
-        # Fetch the updated job document
-        updated_job = db.jobs.find_one({"_id": ObjectId(job_id)})
+        index_job(updated_job)
+        update_suggestions(job, updated_job)
+        schedule_search_warming()
+        invalidate_home_feed()
 
         # Convert the ObjectId to string
         updated_job["_id"] = str(updated_job["_id"])
@@ -447,7 +469,7 @@ def update_job(job_id):
 
         return jsonify({"message": "Job updated successfully", "job": updated_job}), 200
     except pymongo.errors.PyMongoError as e:
-        print(e)
+        logging.error(f"Failed to update job {job_id}: {e}")
         return jsonify({"error": "An error occurred while updating the job. Please try again later"}), 500
 
 @app.route('/api/employer/viewjobs', methods = ['GET'])
@@ -456,14 +478,24 @@ def view_all_jobs():
     """
     This function returns all the jobs posted by the employer who is currently logged in.
     It only sends necessary data to the front end.
+
+    Query parameters:
+        fields (str): Comma separated job fields to return (default is all fields).
+        view (str): "full" (default) or "list" to truncate long text fields to snippets.
+        archived (str): "true" (default) to also return the expired jobs moved to the
+            archive, flagged with "archived": true, or "false" for active jobs only.
     """
     if session.get('user_type') != 'employer':
         # If the user is not an employer, return an error message with status code 403.
         return jsonify({"error": "Access denied! Only employers can view their posted jobs"}), 403
+
+    fields, view = parse_fields(request.args)
+    include_archived = request.args.get('archived', 'true').lower() != 'false'
     
     try:
-        # Find all the jobs posted by the current employer.
-        jobs_cursor = db.jobs.find({'employer_id': ObjectId(current_user._id)})
+        # Find all the jobs posted by the current employer, projecting only the selected fields.
+        projection = build_projection(fields, view)
+        jobs_cursor = job_repository.find_by_employer(db, current_user._id, projection)
         
         if not jobs_cursor:
             # If no jobs are found, return an error message with status code 404.
@@ -471,32 +503,12 @@ def view_all_jobs():
 
 
         # only send necesary data to the front end
-        job_data_list= []
-        for job in jobs_cursor:
-            # Extract only the necessary data from each job and append it to the job_list.
-            job_data = {
-                "_id" : str(job.get("_id")),
-                "reqId": job.get('reqId'),
-                "jobTitle": job.get('jobTitle'),
-                "jobCategory": job.get('jobCategory'),
-                "employmentType": job.get('employmentType'),
-                "noOfopening": job.get('noOfopening'),
-                "jobAdress": job.get('jobAdress'),
-                "jobCity": job.get('jobCity'),
-                "jobState": job.get('jobState'),
-                "jobZip": job.get('jobZip'),
-                "jobDescription": job.get('jobDescription'),
-                "jobQualifications": job.get('jobQualifications'),
-                "jobSkills": job.get('jobSkills'),
-                "jobSalary": job.get('jobSalary'),
-                "companyName": job.get('companyName'),
-                "companyDescription": job.get('companyDescription'),
-                "companyIndustry": job.get('companyIndustry'),
-                "startDate": job.get("startDate"),
-                "appDeadline": job.get("appDeadline"),
-                "createdAt": job.get('createdAt')
-            }
-            job_data_list.append(job_data)
+        job_data_list = [dict(serialize_job(job, fields, serialize_dates=False), archived=False) for job in jobs_cursor]
+
+        if include_archived:
+            archived_cursor = job_repository.find_by_employer(db, current_user._id, projection, archived=True)
+            job_data_list.extend(dict(serialize_job(job, fields, serialize_dates=False), archived=True)
+                                 for job in archived_cursor)
         
         # Return the job_list with status code 200.
         return jsonify({"jobs": job_data_list}), 200
@@ -506,6 +518,50 @@ def view_all_jobs():
         return jsonify({"error": f"An error occured while fetching jobs. Please try again later: {str(e)}"}), 500
 
 
+def _employer_job_data(job, archived):
+    """Convert a job to the JSON serializable format of the employer job page."""
+    return {
+        "_id": str(job.get('_id')),
+        "reqId": job.get('reqId'),
+        "companyName": job.get('companyName'),
+        "jobTitle": job.get('jobTitle'),
+        "jobCity": job.get('jobCity'),
+        "jobState": job.get('jobState'),
+        "jobAddress": job.get('jobAdress'),  # Make sure the key matches the DB field
+        "jobSalary": job.get('jobSalary'),
+        "employmentType": job.get('employmentType'),
+        "noOfopening": job.get('noOfopening'),
+        "jobDescription": job.get('jobDescription'),
+        "jobSkills": job.get('jobSkills'),
+        "companyDescription": job.get('companyDescription'),
+        "companyIndustry": job.get('companyIndustry'),
+        "jobQualifications": job.get('jobQualifications'),
+        "startDate": job.get('startDate').isoformat() if job.get('startDate') else None,
+        "appDeadline": job.get('appDeadline').isoformat() if job.get('appDeadline') else None,
+        "createdAt": job.get('createdAt').isoformat() if job.get('createdAt') else None,
+        "archived": archived,
+    }
+
+
+def _applicant_data(application, applicant_user):
+    """Convert an application and its applicant to the format of the applicants list."""
+    # Determine the application's current status
+    status = ('accepted' if application['accepted_status'] else
+              'rejected' if application['rejected_status'] else
+              'under_review' if application['under_review_status'] else
+              'applied')
+    return {
+        "application_id": str(application['_id']),
+        "user_id": str(applicant_user['_id']),
+        "name": f"{applicant_user.get('jobSeekerFirstName', '')} {applicant_user.get('jobSeekerLastName', '')}",
+        "email": applicant_user.get('jobSeekerEmail', ''),
+        "phone": applicant_user.get('jobSeekerPhoneNumber', ''),
+        "location": applicant_user.get('jobSeekerLocation', ''),
+        "status": status,
+        "applied_on": application['applied_on'].isoformat() if 'applied_on' in application else 'Unknown'
+    }
+
+
 @app.route('/api/employer/job/<job_id>', methods = ['GET'])
 @login_required
 def employer_job(job_id):
@@ -518,37 +574,28 @@ def employer_job(job_id):
 
     Returns:
         A JSON response containing the job details and the list of applicants who have applied for the job.
+        Responds with 304 Not Modified when the client's cached copy is still current.
     """
     
     if session.get('user_type') != 'employer':
         return jsonify({"error": "Access denied! Only employers can view their posted jobs"}), 403
+
+    # Answer revalidations from the cached validator without touching MongoDB
+    if request.if_none_match:
+        cached_etag = get_cached_etag('employer', job_id)
+        if cached_etag and request.if_none_match.contains_weak(cached_etag):
+            return not_modified(cached_etag)
     
     try:
-        job = db.jobs.find_one({'_id': ObjectId(job_id)})
+        job, archived = job_repository.find_cached_with_archive(db, job_id)
         if job:
-            # Convert the job to a JSON serializable format
-            job_data = {
-                "_id": str(job.get('_id')),
-                "reqId": job.get('reqId'),
-                "companyName": job.get('companyName'),
-                "jobTitle": job.get('jobTitle'),
-                "jobCity": job.get('jobCity'),
-                "jobState": job.get('jobState'),
-                "jobAddress": job.get('jobAdress'),  # Make sure the key matches the DB field
-                "jobSalary": job.get('jobSalary'),
-                "employmentType": job.get('employmentType'),
-                "noOfopening": job.get('noOfopening'),
-                "jobDescription": job.get('jobDescription'),
-                "jobSkills": job.get('jobSkills'),
-                "companyDescription": job.get('companyDescription'),
-                "companyIndustry": job.get('companyIndustry'),
-                "jobQualifications": job.get('jobQualifications'),
-                "startDate": job.get('startDate').isoformat() if job.get('startDate') else None,
-                "appDeadline": job.get('appDeadline').isoformat() if job.get('appDeadline') else None,
-                "createdAt": job.get('createdAt').isoformat() if job.get('createdAt') else None,
-            }
-        
-            return jsonify(job_data), 200
+            last_modified, job_token = job_validator(job)
+            store_validators(job_id, job_token)
+            etag = build_etag('employer', job_token)
+            if request_is_fresh(etag, last_modified):
+                return not_modified(etag, last_modified)
+
+            return add_validators(jsonify(_employer_job_data(job, archived)), etag, last_modified), 200
         else:
             return jsonify({"error": "Job not found"}), 404
     except pymongo.errors.PyMongoError as e:
@@ -562,6 +609,10 @@ def delete_jobs(job_id):
     """
     This function deletes a job and its related applications from the database.
 
+    The job is flagged as deleted, which hides it from every read right away, and
+    a background task removes it together with its applications and saved entries.
+    The response does not wait for that, however many applications the job has.
+
     Args:
         job_id (str): The ID of the job to be deleted.
 
@@ -579,29 +630,31 @@ def delete_jobs(job_id):
         return jsonify({"error": "Access Denied, Only employers can delete jobs"}), 403
     
     # Check if job_id is provided
-    if not job_id:
+    if not job_id or not ObjectId.is_valid(job_id):
         return jsonify({"error": "Job ID Required"}), 400
     
     try:
-        # Find the job with the given job_id and employer_id
-        job = db.jobs.find_one({'_id': ObjectId(job_id), 'employer_id': ObjectId(current_user._id) })
-        
-        # If job is not found, return 404 Not Found error
-        if not job:
+        # Flag the job of this employer as deleted, if it is not found return 404 Not Found error
+        if not job_repository.soft_delete(db, job_id, current_user._id):
             return jsonify({"error": "Job not found"}), 404
-        
-        # Delete the job from the database
-        db.jobs.delete_one({'_id': ObjectId(job_id)})
-        
-        # Delete all the applications related to the job from the database
-        db.applications.delete_many({'job_id': ObjectId(job_id)})
+
+        job_cache.mark_deleted(job_id)
+        invalidate_job_validator(job_id)
+        schedule_search_warming()
+        invalidate_home_feed()
+
+        # Applications, saved entries, the search index and suggestions are cleaned up
+        # by the worker. A job whose task could not be queued is picked up by the
+        # purge-deleted-jobs command.
+        if not enqueue_purge_job(job_id):
+            logging.warning(f"Purge of deleted job {job_id} could not be queued")
         
         # Return success message
         return jsonify({"message": "Job and its related applications are deleted sucessfully!"}), 200
     
     except pymongo.errors.PyMongoError as e:
         # Return 500 Internal Server Error if an error occurs while deleting the job
-        print(e)
+        logging.error(f"Failed to delete job {job_id}: {e}")
         return jsonify({"error": "An error occured while deleting the job. Please try again later"}), 500 
     
 
@@ -621,33 +674,24 @@ def get_job_applicants(job_id):
         return jsonify({"error": "Access Denied! Only employers can view applicants."}), 403
 
     try:
-        job = db.jobs.find_one({'_id': ObjectId(job_id), 'employer_id': ObjectId(current_user._id)})
+        job, archived = job_repository.find_with_archive(db, job_id, job_repository.ID_PROJECTION, current_user._id)
         if not job:
             return jsonify({"error": "Job not found"}), 404
         
-        applications = db.applications.find({'job_id': ObjectId(job_id)})
+        # The applications of an archived job may have been archived along with it
+        applications = application_repository.find_by_job(db, job_id)
+        if archived:
+            applications.extend(application_repository.find_by_job(db, job_id, archived=True))
         
+        # Load the applicants with a single query
+        users = user_repository.find_by_ids(db, {app['user_id'] for app in applications})
         
-        applicants_list = []
-        for app in applications:
-           applicant_user = db.user.find_one({'_id': app['user_id']})
-           if applicant_user:
-                # Determine the application's current status
-                # status = 'rejected' if app['rejected_status'] else ('under_review' if app['under_review_status'] else 'applied')
-                status = ('accepted' if app['accepted_status'] else 
-                        'rejected' if app['rejected_status'] else 
-                        'under_review' if app['under_review_status'] else 
-                        'applied')
-                applicants_list.append({
-                    "application_id": str(app['_id']),
-                    "user_id": str(applicant_user['_id']),
-                    "name": f"{applicant_user.get('jobSeekerFirstName', '')} {applicant_user.get('jobSeekerLastName', '')}",
-                    "email": applicant_user.get('jobSeekerEmail', ''),
-                    "phone": applicant_user.get('jobSeekerPhoneNumber', ''),
-                    "location": applicant_user.get('jobSeekerLocation', ''),
-                    "status": status,
-                    "applied_on": app['applied_on'].isoformat() if 'applied_on' in app else 'Unknown'
-                })
+        with span('serialize.applicants', applications=len(applications)):
+            applicants_list = []
+            for app in applications:
+                applicant_user = users.get(app['user_id'])
+                if applicant_user:
+                    applicants_list.append(_applicant_data(app, applicant_user))
         
         return jsonify({"applicants": applicants_list}), 200
 
@@ -656,6 +700,65 @@ def get_job_applicants(job_id):
         return jsonify({"error": "An error occurred while fetching applicants. Please try again later."}), 500
 
 
+@app.route('/api/employer/job/<job_id>/overview', methods=['GET'])
+@login_required
+def employer_job_overview(job_id):
+    """
+    Fetch a job together with the first page of its applicants.
+
+    Replaces the employer_job + get_job_applicants round trips of the job page.
+    The job, the first applications and their count are read concurrently, and
+    the applicants of the page are loaded with a single query.
+
+    Query parameters:
+        limit (int): The number of applicants to return (default is 20, at most MAX_PAGE_SIZE).
+
+    Returns:
+        A JSON object with the job, the first applicants by application date, the
+        total number of applicants and whether more applicants follow.
+    """
+    if session.get('user_type') != 'employer':
+        return jsonify({"error": "Access denied! Only employers can view their posted jobs"}), 403
+
+    # Invalid values fall back to the default, out of range ones are clamped
+    limit = min(max(request.args.get('limit', 20, type=int), 1), Config.MAX_PAGE_SIZE)
+
+    try:
+        # Applications are only returned once the job is known to belong to the employer
+        (job, archived), applications, total = run_concurrently(
+            lambda: job_repository.find_with_archive(db, job_id, employer_id=current_user._id),
+            lambda: application_repository.find_by_job(db, job_id, limit=limit),
+            lambda: application_repository.count_by_job(db, job_id)
+        )
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+
+        if archived:
+            # The closed applications were archived along with the job, the open ones were not
+            archived_applications, archived_total = run_concurrently(
+                lambda: application_repository.find_by_job(db, job_id, archived=True, limit=limit),
+                lambda: application_repository.count_by_job(db, job_id, archived=True)
+            )
+            applications = sorted(applications + archived_applications,
+                                  key=lambda application: application['applied_on'])[:limit]
+            total += archived_total
+
+        users = user_repository.find_by_ids(db, {application['user_id'] for application in applications})
+        applicants_list = [_applicant_data(application, users[application['user_id']])
+                           for application in applications if application['user_id'] in users]
+
+        return jsonify({
+            "job": _employer_job_data(job, archived),
+            "applicants": applicants_list,
+            "total_applicants": total,
+            "has_more": limit < total
+        }), 200
+
+    except Exception as e:
+        logging.error(f"An error occurred while fetching the job overview: {e}")
+        return jsonify({"error": "An error occurred while fetching the job. Please try again later."}), 500
+
+
 @app.route('/api/employer/applicant/<application_id>/status', methods=['PUT'])
 @login_required
 def update_applicant_status(application_id):
@@ -680,15 +783,18 @@ def update_applicant_status(application_id):
     try:
         status_updates = {f"{status}_status": False for status in valid_statuses if status != status_type}
         status_updates[f"{status_type}_status"] = True
+        status_updates["status_updated_on"] = datetime.now(timezone.utc)
 
-        result = db.applications.update_one(
-            {'_id': ObjectId(application_id)},
-            {'$set': status_updates}
-        )
+        result = application_repository.set_status(db, application_id, f"{status_type}_status", status_updates)
 
         if result.modified_count == 0:
             return jsonify({"error": "No changes made or application not found"}), 404
 
+        # The applicant's cached view of the job now carries a stale application state
+        application = application_repository.find_by_id(db, application_id)
+        if application:
+            invalidate_application_validator(application['user_id'], application['job_id'])
+
         return jsonify({"success": True, "message": f"Application status updated to {status_type}"}), 200
 
     except Exception as e:
@@ -712,11 +818,9 @@ def get_user_details(user_id):
         return jsonify({"error": "Invalid user ID"}), 400
 
     # Fetch user data from the database
-    user_profile_data = db.user.find_one({'_id': ObjectId(user_id)})
+    # The projection leaves out the password and the _id
+    user_profile_data = user_repository.find_by_id(db, user_id)
     if user_profile_data:
-        # Remove sensitive information from the user data
-        user_profile_data.pop('jobSeekerPassword', None)  # Assume 'userPassword' is the sensitive field
-        user_profile_data.pop('_id', None)
         return jsonify(user_profile_data), 200
     else:
         return jsonify({"error": "User not found"}), 404
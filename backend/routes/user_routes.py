@@ -1,20 +1,27 @@
 from flask import Flask, request, jsonify, session
 from app import app
 from models.jobSeeker_model import JobSeeker
+from models.config import Config
 from flask_login import logout_user, login_required, login_user, current_user
 from app import bcrypt
 from app import db
 import pymongo
-from datetime import datetime, timezone
 from bson import ObjectId, json_util
-import traceback
 from utils.utils import validate_password, is_valid_email
 import logging
-import json
-from utils.date_utils import serialize_date
+from utils.job_utils import parse_fields, serialize_job, application_statuses, apply_view
+from utils.job_search import search_results
+from utils.search_utils import parse_sort, parse_filters
+from utils.search_warmer import record_search
+from utils.suggest_utils import suggest, MAX_SUGGESTIONS
+from utils.concurrency_utils import run_concurrently
+from repositories import user_repository, job_repository, application_repository, saved_job_repository
 
 
-from utils.redis_utils import cache_data, get_cached_data
+from utils.http_utils import (
+    job_validator, application_validator, build_etag, store_validators, get_cached_etag,
+    invalidate_application_validator, request_is_fresh, add_validators, not_modified, latest
+)
 
 
 @app.route('/api/user/register', methods = ['POST'])
@@ -119,7 +126,7 @@ def user_login():
         return jsonify({"error": "Email and password are required"}), 400
     
     #Find the user based on the email
-    user_data = db.user.find_one({"jobSeekerEmail": email})
+    user_data = user_repository.find_by_email(db, email)
 
     if not user_data:
         return jsonify({"error": "Invalid credentials"}), 401
@@ -156,11 +163,9 @@ def get_user_profile():
     """
        
     # Get user data from the database
-    user_data = db.user.find_one({'_id': ObjectId(current_user._id)})
+    # The projection leaves out the password and the _id
+    user_data = user_repository.find_by_id(db, current_user._id)
     if user_data:
-        # Remove sensitive information from the user data
-        user_data.pop('jobSeekerPassword', None)
-        user_data.pop('_id', None)
         return jsonify(user_data), 200
     else:
         return jsonify({"error": "Job Seeker not found"}), 404
@@ -193,20 +198,16 @@ def update_user_profile():
 
     data.pop('jobSeekerPassword', None)
     data.pop('_id', None)
+    # Saved jobs are changed through the saved-jobs endpoints
+    data.pop('jobSeekerSavedJobs', None)
 
     try:
-        # Update the document in MongoDB
-        result = db.user.update_one(
-            {'_id': ObjectId(current_user._id)},
-            {'$set': data}
-        )
+        # Update the document in MongoDB and read back the updated user data
+        updated_user_data = user_repository.update_profile(db, current_user._id, data)
 
-        if result.matched_count == 0:
+        if updated_user_data is None:
             return jsonify({"error": "Job Seeker not found"}), 404
         
-        
-        # Return the updated user data
-        updated_user_data = db.user.find_one({'_id': ObjectId(current_user._id)}, {'jobSeekerPassword': 0})
         updated_user_data['_id'] = str(updated_user_data['_id'])
         
         response_data = {'success': True, 'data': updated_user_data}
@@ -288,7 +289,7 @@ def update_user_password():
             return jsonify({"error": "Email, old and new passwords are required"}), 400
 
         # Find the user in the database by email
-        existing_user_data = db.user.find_one({'jobSeekerEmail': email})
+        existing_user_data = user_repository.find_by_email(db, email, user_repository.PASSWORD_PROJECTION)
 
         if existing_user_data:
             # Check if the old password is correct
@@ -299,17 +300,13 @@ def update_user_password():
             new_pass_hash = bcrypt.generate_password_hash(new_password, rounds=12).decode('utf-8')
 
             # Update the user's password in the database
-            db.user.update_one(
-                {'jobSeekerEmail': email},
-                {'$set': {'jobSeekerPassword': new_pass_hash}}
-            )
+            user_repository.update_password(db, email, new_pass_hash)
             return jsonify({"message": "User password updated successfully"}), 200
         else:
             return jsonify({"error": "User not found"}), 404
     except pymongo.errors.PyMongoError as e:
         # Handle unexpected errors
-        print("Unexpected error: ", e)
-        traceback.print_exc()
+        logging.exception(f"Unexpected error: {e}")
         return jsonify({"error": "An error occurred while updating user password. Please try again later"}), 500
 
 
@@ -424,93 +421,68 @@ def update_user_password():
 @app.route('/api/user/searchjobs', methods=['GET'])
 @login_required
 def search_jobs():
-    keyword = request.args.get('keyword')
-    location = request.args.get('location')
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 5))
-
-    # Generate a unique cache key based on search criteria
-    cache_key = f"jobs:user_id={current_user._id}:keyword={keyword or ''}:location={location or ''}:page={page}:limit={limit}"
-
-    # Attempt to fetch cached data
-    cached_result = get_cached_data(cache_key)
-    if cached_result:
-        # Since data is stored as JSON in Redis, parse it before sending it to the client
-        return jsonify(json.loads(cached_result)), 200
-   
-    # If no cache hit, proceed with the database query
-    query = {}
-    if keyword:
-        query["$text"] = {"$search": keyword}
-
-    location_conditions = []
-    if location:
-        location = location.strip()
-        if location:
-            location_conditions = [
-                {"jobAddress": {"$regex": location, "$options": "i"}},
-                {"jobCity": {"$regex": location, "$options": "i"}},
-                {"jobState": {"$regex": location, "$options": "i"}},
-                {"jobZip": {"$regex": location, "$options": "i"}}
-            ]
-
-    if location_conditions:
-        if "keyword" in query:
-            query = {"$and": [query, {"$or": location_conditions}]}
-        else:
-            query["$or"] = location_conditions
+    """
+    Search jobs by keyword and location and return a paginated list of jobs.
+
+    Query parameters:
+        keyword (str): Text searched in the job text index.
+        location (str): Matched against the job address, city, state and zip.
+        page (int): The page number of the results to return (default is 1).
+        limit (int): The maximum number of results to return per page (default is 5, at most MAX_PAGE_SIZE).
+        fields (str): Comma separated job fields to return (default is all fields).
+        view (str): "full" (default) or "list" to truncate long text fields to snippets.
+        sort (str): "date" (default) for newest first, "relevance" for the text score,
+            "best" for the text score decayed by the age of the job, or "salary_desc"
+            / "salary_asc" for the yearly salary. Relevance based orders only apply
+            when a keyword is given.
+        jobCategory, employmentType, companyIndustry, jobState (str): Comma separated
+            values to filter on.
+        salary_min, salary_max (float): Salary range the job's salary must overlap.
+        salary_period (str): Period salary_min and salary_max are quoted in: hour,
+            day, week, biweekly, semimonthly, month or year (default is year). Other
+            values return 400.
 
+    Returns:
+        A JSON object with the page of jobs, the total number of matches and the
+        facet counts of jobCategory, employmentType, companyIndustry and jobState.
+        First pages count towards the popular searches the cache warmer keeps fresh.
+    """
+    keyword = request.args.get('keyword')
+    # Invalid values fall back to the defaults, out of range ones are clamped, so
+    # every page is a valid query and junk limits do not become popular searches
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = min(max(request.args.get('limit', 5, type=int), 1), Config.MAX_PAGE_SIZE)
+    fields, view = parse_fields(request.args)
     try:
-        jobs_cursor = db.jobs.find(query).sort([("createdAt", -1)]).skip((page - 1) * limit).limit(limit)
-        total_jobs = db.jobs.count_documents(query)
-        has_more = (page * limit) < total_jobs
-
-        job_data_list = []
-        for job in jobs_cursor:
-            application = db.applications.find_one({
-                "user_id": ObjectId(current_user._id),
-                "job_id": job.get('_id')
-            })
-            job_data = {
-                "_id": str(job.get('_id')),
-                "reqId": job.get('reqId'),
-                "jobTitle": job.get('jobTitle'),
-                "jobCategory": job.get('jobCategory'),
-                "employmentType": job.get('employmentType'),
-                "noOfopening": job.get('noOfopening'),
-                "jobAdress": job.get('jobAdress'),
-                "jobCity": job.get('jobCity'),
-                "jobState": job.get('jobState'),
-                "jobZip": job.get('jobZip'),
-                "jobDescription": job.get('jobDescription'),
-                "jobQualifications": job.get('jobQualifications'),
-                "jobSkills": job.get('jobSkills'),
-                "jobSalary": job.get('jobSalary'),
-                "companyName": job.get('companyName'),
-                "companyDescription": job.get('companyDescription'),
-                "companyIndustry": job.get('companyIndustry'),
-                "startDate": serialize_date(job.get("startDate")),
-                "appDeadline": serialize_date(job.get("appDeadline")),
-                "createdAt": serialize_date(job.get('createdAt')),
-                "applied_status": bool(application and application.get('applied_status')),
-                "under_review_status": bool(application and application.get('under_review_status')),
-                "rejected_status": bool(application and application.get('rejected_status')),
-                "accepted_status": bool(application and application.get('accepted_status'))
-            }
-            job_data_list.append(job_data)
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    search = {
+        "keyword": keyword,
+        "location": request.args.get('location'),
+        "filters": filters,
+        "sort": parse_sort(request.args, keyword),
+        "fields": list(fields),
+        "view": view
+    }
 
-        # Package results
-        result = {
-            "total": total_jobs,
-            "page": page,
-            "limit": limit,
-            "has_more": has_more,
-            "search_job_data": job_data_list
-        }
+    try:
+        # Pages of results are cached for all users, only the application statuses are per user
+        result = search_results(db, search, page, limit)
+        if page == 1:
+            record_search(search, limit)
+
+        # Read the user's applications to the whole page at once. The cached page
+        # may be shared with other requests, so it is copied rather than modified
+        applications = application_repository.find_for_jobs(
+            db, current_user._id, [job_data["_id"] for job_data in result["search_job_data"]]
+        )
+        job_data_list = [
+            {**job_data, **application_statuses(applications.get(ObjectId(job_data["_id"])))}
+            for job_data in result["search_job_data"]
+        ]
 
-        # Cache the result before returning, convert dict to JSON string for Redis
-        cache_data(cache_key, json.dumps(result), expire_time=3600)  # Cache for 1 hour
-        return jsonify(result), 200
+        return jsonify({**result, "search_job_data": job_data_list}), 200
 
     except pymongo.errors.PyMongoError  as e:
         return jsonify({"error": "Database operation failed", "details": str(e)}), 500
@@ -518,6 +490,32 @@ def search_jobs():
         return jsonify({"error": "An unexpected error occurred", "details": str(e)}), 500    
 
 
+@app.route('/api/user/suggest', methods=['GET'])
+def suggest_search_terms():
+    """
+    Suggest job titles, skills, companies and cities for the search box.
+
+    Public: suggestions are the same for every user, and loading the session
+    user would add a MongoDB query to every keystroke.
+
+    Query parameters:
+        q (str): What the user typed so far.
+        type (str): Comma separated suggestion types among title, skill, company
+            and city (default is all of them).
+        limit (int): The maximum number of suggestions (default is 8).
+
+    Returns:
+        A JSON object with the suggestions, most frequent first. Suggestions are
+        served from Redis without querying MongoDB.
+    """
+    prefix = request.args.get('q', '')
+    types = request.args.get('type')
+    limit = max(1, min(request.args.get('limit', 8, type=int), MAX_SUGGESTIONS))
+
+    suggestions = suggest(prefix, types.split(',') if types else None, limit)
+    return jsonify({"suggestions": suggestions}), 200
+
+
 @app.route('/api/user/job/<job_id>', methods=['GET'])
 @login_required
 def get_single_job(job_id):
@@ -529,10 +527,24 @@ def get_single_job(job_id):
 
     Returns:
         A JSON response containing the job data if found, otherwise an error message.
+        Responds with 304 Not Modified when the client's cached copy is still current.
     """
+    # Get the current user's ID
+    user_id = current_user.get_id()
+
+    # Answer revalidations from the cached validators without touching MongoDB
+    if request.if_none_match:
+        cached_etag = get_cached_etag('user', job_id, user_id)
+        if cached_etag and request.if_none_match.contains_weak(cached_etag):
+            return not_modified(cached_etag)
+
     try:
-        # Find the job in the database using the job_id
-        job = db.jobs.find_one({'_id': ObjectId(job_id)})
+        # Read the job, shared by all viewers and usually cached, and the current
+        # user's application for it at the same time
+        job, application = run_concurrently(
+            lambda: job_repository.find_cached_by_id(db, job_id),
+            lambda: application_repository.find_for_job_seeker(db, user_id, job_id)
+        )
         if job:
             # Convert the job to a JSON serializable format
             job_data = {
@@ -555,14 +567,14 @@ def get_single_job(job_id):
                 "appDeadline": job.get('appDeadline').isoformat() if job.get('appDeadline') else None,
                 "createdAt": job.get('createdAt').isoformat() if job.get('createdAt') else None,
             }
-            # Get the current user's ID
-            user_id = current_user.get_id()
-
-            # Find an application by the current user for this job
-            application = db.applications.find_one({
-                'user_id': ObjectId(user_id),
-                'job_id': ObjectId(job_id)
-            })
+            # Derive the validators from the job timestamps and the application state
+            job_modified, job_token = job_validator(job)
+            application_modified, application_token = application_validator(application)
+            store_validators(job_id, job_token, user_id, application_token)
+            etag = build_etag('user', job_token, application_token)
+            last_modified = latest(job_modified, application_modified)
+            if request_is_fresh(etag, last_modified):
+                return not_modified(etag, last_modified)
             
             # Check and add application statuses
             if application:
@@ -579,7 +591,7 @@ def get_single_job(job_id):
                 })
 
 
-            return jsonify(job_data), 200
+            return add_validators(jsonify(job_data), etag, last_modified), 200
         else:
             return jsonify({"error": "Job not found"}), 404
     except pymongo.errors.PyMongoError as e:
@@ -591,40 +603,41 @@ def get_single_job(job_id):
 @app.route('/api/user/applyjobs/<job_id>', methods=['POST'])
 @login_required
 def apply_jobs(job_id):
+    """
+    Apply the current user to a job.
+
+    The job must exist and still take applications. The application is created
+    with a single upsert against the unique (user_id, job_id) index, so repeated
+    submits and retried requests never create a second application.
+
+    Args:
+        job_id (str): The ID of the job to apply for.
+    """
     user_id = current_user._id
+    if not ObjectId.is_valid(job_id):
+        return jsonify({"error": "Invalid job ID", "applied_status": False}), 400
+
     try:
-        # Check for an existing application
-        existing_application = db.applications.find_one({
-            "user_id": ObjectId(user_id),
-            "job_id": ObjectId(job_id)
-        })
+        if not job_repository.find_open_by_id(db, job_id):
+            return jsonify({
+                "error": "This job does not exist or is no longer accepting applications",
+                "applied_status": False
+            }), 404
 
-        if existing_application:
+        if not application_repository.apply(db, user_id, job_id):
             logging.info(f"User {user_id} has already applied for job {job_id}.")
-            # You can return the existing application status here if needed
             return jsonify({
                 "message": "You have already applied for this job!",
                 "applied_status": True
             }), 400
 
-        # Insert new application
-        application = {
-            "user_id": ObjectId(user_id),
-            "job_id": ObjectId(job_id),
-            "applied_on": datetime.now(timezone.utc),
-            "applied_status": True,  # User has applied
-            "under_review_status": False,  # Initially not under review
-            "rejected_status": False,  # Initially not rejected
-            "accepted_status": False
-        }
-        result = db.applications.insert_one(application)
-        application_id = result.inserted_id
-        logging.info(f"User {user_id} applied for job {job_id}. Application ID: {application_id}")
+        invalidate_application_validator(user_id, job_id)
+        logging.info(f"User {user_id} applied for job {job_id}.")
 
         # Returning applied status to reflect the new state
         return jsonify({
             "message": "Successfully applied for the job!",
-            "applied_status": application["applied_status"]
+            "applied_status": True
         }), 200
     except Exception as e:
         logging.error(f"Error applying for job {job_id} by user {user_id}: {str(e)}")
@@ -640,55 +653,31 @@ def apply_jobs(job_id):
 def applied_jobs():
     """
     Fetching all the jobs that the current user has applied  for
+
+    Query parameters:
+        fields (str): Comma separated job fields to return (default is all fields).
+        view (str): "full" (default) or "list" to truncate long text fields to snippets.
     """
-    # Fetch all the applications of the current user
+    fields, view = parse_fields(request.args)
+
+    # Fetch all the applications of the current user, including those closed with an archived job
     try:
-        applications = db.applications.find({'user_id': ObjectId(current_user._id)})
+        applications = application_repository.find_by_user(db, current_user._id, include_archived=True)
+        # Read the jobs applied to at once, through the job document cache
+        jobs = job_repository.find_cached(db, [application['job_id'] for application in applications],
+                                          include_archived=True)
         job_list = []
 
         for application in applications:
-            # Add the fields you want to retrieve in the projection parameter of find_one
-            job = db.jobs.find_one(
-                {'_id': ObjectId(application['job_id'])},
-                {
-                'reqId': 1, 'companyName': 1, 'jobTitle': 1, 'jobDescription': 1, 'jobSkills': 1,  'jobQualifications': 1,
-                'jobCategory': 1, 'employmentType': 1, 'noOfopening': 1, 'jobAdress': 1,
-                'jobCity': 1, 'jobState': 1, 'jobZip': 1, 'jobSalary': 1, 'companyDescription': 1, 'companyIndustry': 1,
-                'startDate': 1, 'appDeadline': 1, 'createdAt': 1, '_id': 1
-                # add other fields you want to include
-                }
-            )
-            if job:
-                # Add the additional fields to the job_data dictionary
-                job_data = {
-                   "_id": str(job['_id']),
-                    "reqId": job.get('reqId'),
-                    "jobTitle": job.get('jobTitle'),
-                    "jobCategory": job.get('jobCategory'),
-                    "employmentType": job.get('employmentType'),
-                    "noOfopening": job.get('noOfopening'),
-                    "jobAdress": job.get('jobAdress'),
-                    "jobCity": job.get('jobCity'),
-                    "jobState": job.get('jobState'),
-                    "jobZip": job.get('jobZip'),
-                    "jobDescription": job.get('jobDescription'),
-                    "jobQualifications": job.get('jobQualifications'),
-                    "jobSkills": job.get('jobSkills'),
-                    "jobSalary": job.get('jobSalary'),
-                    "companyName": job.get('companyName'),
-                    "companyDescription": job.get('companyDescription'),
-                    "companyIndustry": job.get('companyIndustry'),
-                    "startDate": job.get('startDate').isoformat() if job.get('startDate') else None,
-                    "appDeadline": job.get('appDeadline').isoformat() if job.get('appDeadline') else None,
-                    "createdAt": job.get('createdAt').isoformat() if job.get('createdAt') else None,
-                    "applied_status": bool(application.get('applied_status')),
-                    "under_review_status": bool(application.get('under_review_status')),
-                    "rejected_status": bool(application.get('rejected_status')),
-                    "accepted_status": bool(application.get('accepted_status'))
-                }
+            if application['job_id'] in jobs:
+                job, archived = jobs[application['job_id']]
+                # Add the application statuses to the job_data dictionary
+                job_data = serialize_job(apply_view(job, view), fields)
+                job_data.update(application_statuses(application))
+                job_data['archived'] = archived
                 job_list.append(job_data)
             else:
-                print(f"Job {application['job_id']} not found")
+                logging.warning(f"Job {application['job_id']} not found")
 
         return jsonify({"jobs_applied": job_list}), 200
     except pymongo.errors.PyMongoError as e:
@@ -698,58 +687,161 @@ def applied_jobs():
 @app.route('/api/user/saved-jobs', methods=['GET'])
 @login_required
 def get_saved_jobs():
+    """
+    Fetch a page of the jobs saved by the current user, most recently saved first.
+
+    Query parameters:
+        page (int): The page number of the results to return (default is 1).
+        limit (int): The maximum number of results to return per page (default is 20, at most MAX_PAGE_SIZE).
+        fields (str): Comma separated job fields to return (default is all fields).
+        view (str): "full" (default) or "list" to truncate long text fields to snippets.
+
+    Returns:
+        A JSON object with the page of saved jobs, each with the user's application
+        statuses, the total number of saved jobs and whether more pages follow.
+    """
     user_id = current_user._id
+    # Invalid values fall back to the defaults, out of range ones are clamped
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), Config.MAX_PAGE_SIZE)
+    fields, view = parse_fields(request.args)
 
     try:
-        # Find the user document by _id
-        user = db.user.find_one({'_id': ObjectId(user_id)})
-        if user:
-            # Get the saved job IDs from the user document
-            saved_jobs_ids = [ObjectId(job_id) for job_id in user.get('jobSeekerSavedJobs', [])]
-            # Find all job documents whose _id is in the saved_jobs_ids list
-            saved_jobs_cursor = db.jobs.find({"_id": {"$in": saved_jobs_ids}})
-
-            saved_jobs = []
-            for job in saved_jobs_cursor:
-                # Check if the user has applied for this job
-                application = db.applications.find_one({
-                    "user_id": ObjectId(current_user._id),  # Assuming this is the logged in user's ID
-                    "job_id": job.get('_id')
-                })
-
+        job_ids, total = run_concurrently(
+            lambda: saved_job_repository.find_page(db, user_id, (page - 1) * limit, limit),
+            lambda: saved_job_repository.count(db, user_id)
+        )
+        # Join the jobs of the page, read through the job document cache, and the user's applications to them
+        jobs, applications = run_concurrently(
+            lambda: job_repository.find_cached(db, job_ids),
+            lambda: application_repository.find_for_jobs(db, user_id, job_ids)
+        )
 
-                job_dict = {
-                    "_id": str(job['_id']),
-                    "reqId": job.get('reqId'),
-                    "jobTitle": job.get('jobTitle'),
-                    "jobCategory": job.get('jobCategory'),
-                    "employmentType": job.get('employmentType'),
-                    "noOfopening": job.get('noOfopening'),
-                    "jobAdress": job.get('jobAdress'),
-                    "jobCity": job.get('jobCity'),
-                    "jobState": job.get('jobState'),
-                    "jobZip": job.get('jobZip'),
-                    "jobDescription": job.get('jobDescription'),
-                    "jobQualifications": job.get('jobQualifications'),
-                    "jobSkills": job.get('jobSkills'),
-                    "jobSalary": job.get('jobSalary'),
-                    "companyName": job.get('companyName'),
-                    "companyDescription": job.get('companyDescription'),
-                    "companyIndustry": job.get('companyIndustry'),
-                    "startDate": job.get('startDate').isoformat() if job.get('startDate') else None,
-                    "appDeadline": job.get('appDeadline').isoformat() if job.get('appDeadline') else None,
-                    "createdAt": job.get('createdAt').isoformat() if job.get('createdAt') else None,
-                    
-                    "applied_status": bool(application and application.get('applied_status')),
-                    "under_review_status": bool(application and application.get('under_review_status')),
-                    "rejected_status": bool(application and application.get('rejected_status')),
-                    "accepted_status": bool(application and application.get('accepted_status'))
-                }
+        saved_jobs = []
+        for job_id in job_ids:
+            # Jobs deleted since they were saved are skipped
+            if job_id in jobs:
+                job_dict = serialize_job(apply_view(jobs[job_id][0], view), fields)
+                job_dict.update(application_statuses(applications.get(job_id)))
                 saved_jobs.append(job_dict)
 
-            return jsonify(saved_jobs), 200
-        else:
-            return jsonify({"error": "User not found"}), 404
+        return jsonify({
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "has_more": (page * limit) < total,
+            "saved_jobs": saved_jobs
+        }), 200
     except Exception as e:
         logging.error(f"Failed to fetch saved jobs: {e}", exc_info=True)
-        return jsonify({"error": "An error occurred while fetching the saved jobs"}), 500
\ No newline at end of file
+        return jsonify({"error": "An error occurred while fetching the saved jobs"}), 500
+
+
+@app.route('/api/user/saved-jobs/ids', methods=['GET'])
+@login_required
+def get_saved_job_ids():
+    """
+    Fetch the ids of all the jobs saved by the current user, to flag saved jobs in job lists.
+    """
+    try:
+        job_ids = saved_job_repository.find_job_ids(db, current_user._id)
+        return jsonify({"saved_job_ids": [str(job_id) for job_id in job_ids]}), 200
+    except pymongo.errors.PyMongoError as e:
+        logging.error(f"Failed to fetch saved job ids: {e}")
+        return jsonify({"error": "An error occurred while fetching the saved jobs"}), 500
+
+
+@app.route('/api/user/saved-jobs/<job_id>', methods=['PUT'])
+@login_required
+def save_job(job_id):
+    """
+    Save a job for the current user. Saving a job that is already saved changes nothing.
+
+    Args:
+        job_id (str): The ID of the job to save.
+
+    Returns:
+        201 when the job was saved, 200 when it already was, 404 if the job does not exist.
+    """
+    if not ObjectId.is_valid(job_id):
+        return jsonify({"error": "Invalid job ID"}), 400
+
+    try:
+        if not job_repository.find_by_id(db, job_id, job_repository.ID_PROJECTION):
+            return jsonify({"error": "Job not found"}), 404
+
+        created = saved_job_repository.save(db, current_user._id, job_id)
+        return jsonify({"message": "Job saved", "saved": True}), 201 if created else 200
+    except pymongo.errors.PyMongoError as e:
+        logging.error(f"Failed to save job {job_id}: {e}")
+        return jsonify({"error": "An error occurred while saving the job"}), 500
+
+
+@app.route('/api/user/saved-jobs/<job_id>', methods=['DELETE'])
+@login_required
+def unsave_job(job_id):
+    """
+    Remove a job from the current user's saved jobs. Removing a job that is not saved changes nothing.
+
+    Args:
+        job_id (str): The ID of the job to remove.
+    """
+    if not ObjectId.is_valid(job_id):
+        return jsonify({"error": "Invalid job ID"}), 400
+
+    try:
+        saved_job_repository.unsave(db, current_user._id, job_id)
+        return jsonify({"message": "Job removed from saved jobs", "saved": False}), 200
+    except pymongo.errors.PyMongoError as e:
+        logging.error(f"Failed to unsave job {job_id}: {e}")
+        return jsonify({"error": "An error occurred while removing the saved job"}), 500
+
+
+@app.route('/api/user/saved-jobs/apply', methods=['POST'])
+@login_required
+def apply_saved_jobs():
+    """
+    Apply the current user to several of their saved jobs at once.
+
+    Request body format:
+    {
+        "job_ids": ["job id", ...]  # At most BULK_APPLY_LIMIT saved jobs
+    }
+
+    Returns:
+        A JSON object listing the job ids that were applied to, those already
+        applied to, and those skipped because they are not saved or no longer
+        accepting applications.
+    """
+    user_id = current_user._id
+    data = request.json or {}
+    job_ids = data.get('job_ids')
+    if not isinstance(job_ids, list) or not job_ids:
+        return jsonify({"error": "job_ids must be a non-empty list"}), 400
+    if len(job_ids) > Config.BULK_APPLY_LIMIT:
+        return jsonify({"error": f"At most {Config.BULK_APPLY_LIMIT} jobs can be applied to at once"}), 400
+    if not all(isinstance(job_id, str) and ObjectId.is_valid(job_id) for job_id in job_ids):
+        return jsonify({"error": "Invalid job ID"}), 400
+    job_ids = list(dict.fromkeys(ObjectId(job_id) for job_id in job_ids))
+
+    try:
+        open_jobs, saved = run_concurrently(
+            lambda: {job['_id'] for job in job_repository.find_open_by_ids(db, job_ids)},
+            lambda: saved_job_repository.find_saved(db, user_id, job_ids)
+        )
+        eligible = [job_id for job_id in job_ids if job_id in open_jobs and job_id in saved]
+
+        applied = application_repository.apply_many(db, user_id, eligible)
+        for job_id in applied:
+            invalidate_application_validator(user_id, job_id)
+
+        applied_set = set(applied)
+        logging.info(f"User {user_id} applied for {len(applied)} saved jobs.")
+        return jsonify({
+            "applied": [str(job_id) for job_id in applied],
+            "already_applied": [str(job_id) for job_id in eligible if job_id not in applied_set],
+            "skipped": [str(job_id) for job_id in job_ids if job_id not in open_jobs or job_id not in saved]
+        }), 200
+    except Exception as e:
+        logging.error(f"Error applying for saved jobs by user {user_id}: {str(e)}")
+        return jsonify({"error": "An error occurred while applying for the jobs"}), 500
\ No newline at end of file
@@ -57,7 +57,7 @@ if lsof -Pi :8000 -sTCP:LISTEN -t >/dev/null ; then
 fi
 
 # Start Gunicorn server
-gunicorn app:app -b 127.0.0.1:8000 --access-logfile "$SCRIPT_DIR/logs/gunicorn_access.log" --error-logfile "$SCRIPT_DIR/logs/gunicorn_error.log" &
+gunicorn -c "$SCRIPT_DIR/gunicorn.conf.py" app:app -b 127.0.0.1:8000 --access-logfile "$SCRIPT_DIR/logs/gunicorn_access.log" --error-logfile "$SCRIPT_DIR/logs/gunicorn_error.log" &
 
 GUNICORN_PID=$!
 
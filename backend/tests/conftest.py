@@ -0,0 +1,33 @@
+"""
+Shared fixtures. Redis is replaced by fakeredis and MongoDB by mongomock, so
+the tests run without any server:
+
+    cd backend && python -m pytest tests
+"""
+import os
+import sys
+
+# models.config builds the session Redis client from SESSION_REDIS when imported
+os.environ.setdefault('SESSION_REDIS', 'redis://localhost:6379/0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fakeredis
+import mongomock
+import pytest
+from models.config import Config
+from utils import redis_utils
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Make get_redis_connection() return an empty fakeredis client, with the local cache tier off."""
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(redis_utils, '_client', client)
+    monkeypatch.setattr(redis_utils, '_client_pid', os.getpid())
+    monkeypatch.setattr(Config, 'LOCAL_CACHE_ENABLED', False)
+    return client
+
+
+@pytest.fixture
+def mongo_db():
+    return mongomock.MongoClient().jobsnearby
@@ -0,0 +1,42 @@
+from unittest import mock
+from bson import ObjectId
+import pytest
+from pymongo.errors import DuplicateKeyError
+from repositories import application_repository
+from utils.index_utils import APPLICATION_KEY
+
+
+@pytest.fixture
+def db(mongo_db):
+    mongo_db.applications.create_index(APPLICATION_KEY, unique=True)
+    return mongo_db
+
+
+def test_apply_creates_one_application(db):
+    user_id, job_id = ObjectId(), ObjectId()
+    assert application_repository.apply(db, user_id, job_id) is True
+    assert application_repository.apply(db, str(user_id), str(job_id)) is False
+    assert db.applications.count_documents({'user_id': user_id, 'job_id': job_id}) == 1
+    application = db.applications.find_one()
+    assert application['applied_status'] is True
+    assert application['accepted_status'] is False
+
+
+def test_apply_concurrent_duplicate_is_not_created(db):
+    # The other request inserted between the upsert's match and insert
+    with mock.patch.object(db.applications, 'update_one', side_effect=DuplicateKeyError('duplicate')):
+        assert application_repository.apply(db, ObjectId(), ObjectId()) is False
+
+
+def test_apply_many_returns_only_new_applications(db):
+    user_id = ObjectId()
+    applied, first, second = ObjectId(), ObjectId(), ObjectId()
+    application_repository.apply(db, user_id, applied)
+    # The existing application goes last: mongomock numbers upserts in order rather than by operation index
+    assert application_repository.apply_many(db, user_id, [str(first), second, applied]) == [first, second]
+    assert application_repository.apply_many(db, user_id, [applied, first, second]) == []
+    assert db.applications.count_documents({'user_id': user_id}) == 3
+
+
+def test_apply_many_without_jobs(db):
+    assert application_repository.apply_many(db, ObjectId(), []) == []
@@ -0,0 +1,37 @@
+import json
+import pytest
+from models.config import Config
+from utils import cache_codec
+
+
+def test_small_values_are_not_compressed():
+    data = cache_codec.encode({"total": 1, "jobs": ["a"]})
+    assert data[0] == cache_codec.FORMAT_MSGPACK
+    assert cache_codec.decode(data) == {"total": 1, "jobs": ["a"]}
+
+
+def test_large_values_are_compressed(monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_COMPRESSION', 'zlib')
+    value = {"search_job_data": [{"jobDescription": "Make coffee " * 50} for _ in range(20)]}
+    data = cache_codec.encode(value)
+    assert data[0] == cache_codec.FORMAT_MSGPACK_ZLIB
+    assert len(data) < len(json.dumps(value))
+    assert cache_codec.decode(data) == value
+
+
+def test_json_values_are_still_read():
+    assert cache_codec.decode(json.dumps({"total": 2})) == {"total": 2}
+    assert cache_codec.decode(b'[1, 2]') == [1, 2]
+
+
+def test_json_codec(monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_CODEC', 'json')
+    data = cache_codec.encode({"total": 3})
+    assert json.loads(data) == {"total": 3}
+    assert cache_codec.decode(data) == {"total": 3}
+
+
+@pytest.mark.parametrize('data', [b'\x09abc', bytes((cache_codec.FORMAT_MSGPACK_ZLIB,)) + b'not zlib', b'{broken'])
+def test_unknown_or_corrupt_values_raise(data):
+    with pytest.raises(cache_codec.CacheFormatError):
+        cache_codec.decode(data)
@@ -0,0 +1,85 @@
+import threading
+import time
+from models.config import Config
+from utils import cache_utils
+
+
+def test_miss_computes_once_and_caches(fake_redis):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"total": 1}
+
+    assert cache_utils.get_or_compute('search:a', compute, ttl=60) == {"total": 1}
+    assert cache_utils.get_or_compute('search:a', compute, ttl=60) == {"total": 1}
+    assert len(calls) == 1
+    assert fake_redis.exists('search:a')
+    assert not fake_redis.exists(cache_utils._lock_key('search:a'))
+
+
+def test_concurrent_misses_compute_once(fake_redis):
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["job"]
+
+    def read():
+        results.append(cache_utils.get_or_compute('search:b', compute, ttl=60))
+
+    threads = [threading.Thread(target=read) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [["job"]] * 5
+
+
+def test_stale_value_is_served_while_another_caller_refreshes(fake_redis, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_STALE_TTL', 60)
+    cache_utils._store(fake_redis, 'search:c', "old", ttl=-1, duration=0.1)
+    assert cache_utils._acquire(fake_redis, 'search:c') is not None
+
+    def compute():
+        raise AssertionError("computed while the lock is held")
+
+    assert cache_utils.get_or_compute('search:c', compute, ttl=60) == "old"
+
+
+def test_refresh_waits_for_the_value_of_the_lock_holder(fake_redis):
+    cache_utils._store(fake_redis, 'search:d', "old", ttl=60, duration=0.1)
+    token = cache_utils._acquire(fake_redis, 'search:d')
+
+    def holder():
+        time.sleep(0.2)
+        cache_utils._store(fake_redis, 'search:d', "new", ttl=120, duration=0.1)
+        cache_utils._release(fake_redis, 'search:d', token)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    value = cache_utils.get_or_compute('search:d', lambda: "computed", ttl=60, refresh=True)
+    thread.join()
+    assert value == "new"
+
+
+def test_refresh_computes_when_the_lock_is_free(fake_redis):
+    cache_utils._store(fake_redis, 'search:e', "old", ttl=60, duration=0.1)
+    assert cache_utils.get_or_compute('search:e', lambda: "new", ttl=60, refresh=True) == "new"
+    assert cache_utils.get_or_compute('search:e', lambda: "other", ttl=60) == "new"
+
+
+def test_empty_values_use_the_empty_ttl(fake_redis, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_STALE_TTL', 0)
+    cache_utils.get_or_compute('search:f', lambda: [], ttl=600, empty_ttl=30)
+    assert 0 < fake_redis.ttl('search:f') <= 30
+
+
+def test_lock_is_only_released_by_its_owner(fake_redis):
+    token = cache_utils._acquire(fake_redis, 'search:g')
+    cache_utils._release(fake_redis, 'search:g', 'someone else')
+    assert fake_redis.get(cache_utils._lock_key('search:g')) == token.encode()
+    cache_utils._release(fake_redis, 'search:g', token)
+    assert not fake_redis.exists(cache_utils._lock_key('search:g'))
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from flask import Flask
+from werkzeug.http import http_date
+from utils import http_utils
+
+app = Flask(__name__)
+UPDATED_AT = datetime(2026, 5, 1, 12, 30, 15, 123456)
+
+
+def _etag(job, application=None):
+    _, job_token = http_utils.job_validator(job)
+    _, application_token = http_utils.application_validator(application)
+    return http_utils.build_etag('job', job_token, application_token)
+
+
+def test_job_validator_normalises_mongo_timestamps():
+    last_modified, token = http_utils.job_validator({'_id': ObjectId(), 'updatedAt': UPDATED_AT})
+    assert last_modified == datetime(2026, 5, 1, 12, 30, 15, 123000, tzinfo=timezone.utc)
+    assert http_utils.job_validator({'updatedAt': last_modified})[1] == token
+
+
+def test_etag_changes_with_job_and_application():
+    job = {'_id': ObjectId(), 'updatedAt': UPDATED_AT}
+    application = {'applied_status': True, 'applied_on': UPDATED_AT}
+    etag = _etag(job, application)
+    assert etag == _etag(dict(job), dict(application))
+    assert etag != _etag(job)
+    assert etag != _etag({**job, 'updatedAt': UPDATED_AT + timedelta(seconds=1)}, application)
+    assert etag != _etag(job, {**application, 'under_review_status': True})
+
+
+def test_request_is_fresh_with_if_none_match():
+    with app.test_request_context(headers={'If-None-Match': 'W/"abc"'}):
+        assert http_utils.request_is_fresh('abc')
+        assert not http_utils.request_is_fresh('def')
+
+
+def test_request_is_fresh_with_if_modified_since():
+    last_modified = datetime(2026, 5, 1, 12, 30, 15, 123000, tzinfo=timezone.utc)
+    with app.test_request_context(headers={'If-Modified-Since': http_date(last_modified)}):
+        assert http_utils.request_is_fresh('abc', last_modified)
+        assert not http_utils.request_is_fresh('abc', last_modified + timedelta(seconds=1))
+    # If-None-Match takes precedence
+    headers = {'If-None-Match': '"other"', 'If-Modified-Since': http_date(last_modified)}
+    with app.test_request_context(headers=headers):
+        assert not http_utils.request_is_fresh('abc', last_modified)
+
+
+def test_not_modified_response():
+    last_modified = datetime(2026, 5, 1, tzinfo=timezone.utc)
+    with app.test_request_context():
+        response = http_utils.not_modified('abc', last_modified)
+    assert response.status_code == 304
+    assert response.headers['ETag'] == 'W/"abc"'
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    assert response.last_modified == last_modified
+
+
+def test_cached_etag_matches_and_is_invalidated(fake_redis):
+    job_id, user_id = str(ObjectId()), str(ObjectId())
+    assert http_utils.get_cached_etag('job', job_id, user_id) is None
+
+    http_utils.store_validators(job_id, 'job-token', user_id, 'application-token')
+    assert http_utils.get_cached_etag('job', job_id, user_id) == \
+        http_utils.build_etag('job', 'job-token', 'application-token')
+    assert http_utils.get_cached_etag('job', job_id) == http_utils.build_etag('job', 'job-token')
+
+    http_utils.invalidate_application_validator(user_id, job_id)
+    assert http_utils.get_cached_etag('job', job_id, user_id) is None
+    http_utils.invalidate_job_validator(job_id, 'new-token')
+    assert http_utils.get_cached_etag('job', job_id) == http_utils.build_etag('job', 'new-token')
+    http_utils.invalidate_job_validator(job_id)
+    assert http_utils.get_cached_etag('job', job_id) is None
@@ -0,0 +1,63 @@
+import json
+import time
+import pytest
+from models.config import Config
+from utils import invalidation_bus
+from utils.local_cache import LocalCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(invalidation_bus, '_seen_version', 0)
+    monkeypatch.setattr(invalidation_bus, '_behind_version', None)
+    local = LocalCache(max_entries=100, max_bytes=1024 * 1024)
+    for key in ('job:1', 'job:2', 'search:a', 'search:b'):
+        local.set(key, key, ttl=60, size=1)
+    return local
+
+
+def cached_keys(cache):
+    return {key for key in ('job:1', 'job:2', 'search:a', 'search:b') if cache.get(key) is not None}
+
+
+def test_publish_sends_a_versioned_event(fake_redis):
+    pubsub = fake_redis.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(invalidation_bus.CHANNEL)
+    invalidation_bus.publish_invalidation(keys=['job:1'], prefixes=['search:'])
+    invalidation_bus.publish_invalidation(keys=['job:2'])
+
+    events, deadline = [], time.monotonic() + 2
+    while len(events) < 2 and time.monotonic() < deadline:
+        # None is also returned for the subscription confirmation
+        message = pubsub.get_message(timeout=0.1)
+        if message is not None:
+            events.append(json.loads(message['data']))
+    assert events == [{"v": 1, "k": ['job:1'], "p": ['search:']}, {"v": 2, "k": ['job:2'], "p": []}]
+
+
+def test_event_evicts_its_keys_and_prefixes(cache):
+    invalidation_bus._apply(cache, {"v": 1, "k": ['job:1'], "p": ['search:']})
+    assert cached_keys(cache) == {'job:2'}
+    assert invalidation_bus._seen_version == 1
+
+
+def test_missed_event_clears_the_cache(cache):
+    invalidation_bus._apply(cache, {"v": 3, "k": ['job:1'], "p": []})
+    assert cached_keys(cache) == set()
+    assert invalidation_bus._seen_version == 3
+
+
+def test_version_check_clears_a_cache_left_behind(fake_redis, cache, monkeypatch):
+    monkeypatch.setattr(Config, 'LOCAL_CACHE_VERSION_CHECK', 60)
+    fake_redis.set(invalidation_bus.VERSION_KEY, 2)
+
+    # The first check gives the subscriber time to catch up
+    monkeypatch.setattr(invalidation_bus, '_checked_at', time.monotonic() - 61)
+    invalidation_bus._check_version(cache)
+    assert len(cached_keys(cache)) == 4
+
+    # Still behind at the next check: the events were missed
+    monkeypatch.setattr(invalidation_bus, '_checked_at', time.monotonic() - 61)
+    invalidation_bus._check_version(cache)
+    assert cached_keys(cache) == set()
+    assert invalidation_bus._seen_version == 2
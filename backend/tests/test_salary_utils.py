@@ -0,0 +1,48 @@
+import pytest
+from utils.salary_utils import annualize, check_period, parse_salary
+
+
+@pytest.mark.parametrize("text, low, high, period", [
+    ("$45/hr + 401k", 45, 45, 'hour'),
+    ("$28/hr; $500 sign-on bonus", 28, 28, 'hour'),
+    ("25/hr", 25, 25, 'hour'),
+    ("$15-$18/hr", 15, 18, 'hour'),
+    ("80-100k", 80000, 100000, 'year'),
+    ("$80k to $100k per year", 80000, 100000, 'year'),
+    ("$60,000 a year, 9-5 schedule", 60000, 60000, 'year'),
+    ("$2,000 bi-weekly", 2000, 2000, 'biweekly'),
+    ("$2,000 biweekly", 2000, 2000, 'biweekly'),
+    ("$3,000 semi-monthly", 3000, 3000, 'semimonthly'),
+    ("$900 weekly", 900, 900, 'week'),
+    ("$4,500/month", 4500, 4500, 'month'),
+])
+def test_parse_salary(text, low, high, period):
+    salary = parse_salary(text)
+    assert (salary['salaryMin'], salary['salaryMax'], salary['salaryPeriod']) == (low, high, period)
+    assert salary['salaryAnnualMin'] == annualize(low, period)
+    assert salary['salaryAnnualMax'] == annualize(high, period)
+
+
+@pytest.mark.parametrize("text", [
+    "401k match",
+    "5 years experience",
+    "Shifts 9-5, Monday to Friday",
+    "$1,000,000/hr",
+    "",
+    None,
+])
+def test_parse_salary_without_salary(text):
+    assert set(parse_salary(text).values()) == {None}
+
+
+def test_annualize():
+    assert annualize(2000, 'biweekly') == 52000
+    assert annualize(3000, 'semimonthly') == 72000
+    assert annualize(25, 'hour') == 52000
+
+
+def test_unknown_period():
+    with pytest.raises(ValueError):
+        check_period('fortnight')
+    with pytest.raises(ValueError):
+        annualize(100, 'fortnight')
@@ -0,0 +1,79 @@
+import pytest
+from bson import ObjectId
+from models.config import Config
+from utils import search_engine
+from utils.search_engine import BM25Index
+from utils.search_utils import SORT_DATE
+
+
+def job(title, description='', **fields):
+    return {'_id': ObjectId(), 'jobTitle': title, 'jobDescription': description, **fields}
+
+
+def test_title_matches_rank_above_description_matches():
+    in_title = job('Python Developer')
+    in_description = job('Engineer', 'Some python scripting')
+    index = BM25Index.from_documents([in_description, in_title, job('Barista', 'Make coffee')])
+    assert [doc_id for doc_id, _ in index.search('python')] == [str(in_title['_id']), str(in_description['_id'])]
+    assert index.search('') == []
+    assert index.search('the and') == []
+
+
+def test_limit():
+    index = BM25Index.from_documents([job(f'Python {number}') for number in range(5)])
+    assert len(index.search('python', limit=2)) == 2
+    assert len(index.search('python', limit=None)) == 5
+
+
+def test_delta_updates_and_removals():
+    first, second = job('Python Developer'), job('Java Developer')
+    index = BM25Index.from_documents([first, second])
+    index.add({**second, 'jobTitle': 'Python Engineer'})
+    assert {doc_id for doc_id, _ in index.search('python')} == {str(first['_id']), str(second['_id'])}
+    assert index.search('java') == []
+
+    index.remove(first['_id'])
+    assert [doc_id for doc_id, _ in index.search('python')] == [str(second['_id'])]
+    assert len(index) == 1
+
+
+def test_snapshot_round_trip(tmp_path):
+    jobs = [job('Python Developer'), job('Barista', 'Coffee')]
+    index = BM25Index.from_documents(jobs)
+    index.change_id = '5-0'
+    index.save(str(tmp_path / 'index'))
+
+    loaded = BM25Index.load(str(tmp_path / 'index'))
+    assert loaded.search('python') == pytest.approx(index.search('python'))
+    assert loaded.change_id == '5-0'
+    assert search_engine.snapshot_version(str(tmp_path / 'index')) == loaded.version
+
+
+def test_search_page_filters_before_ranking(mongo_db, monkeypatch):
+    monkeypatch.setattr(Config, 'SEARCH_INDEX_FILTER_BATCH_SIZE', 2)
+    jobs = [job('Python Developer', jobState='CA' if number < 6 else 'NY') for number in range(8)]
+    mongo_db.jobs.insert_many(jobs)
+    index = BM25Index.from_documents(jobs)
+
+    page, total, facets = search_engine.search_page(
+        mongo_db, index, 'python', {'jobState': 'NY'}, SORT_DATE, {'jobTitle': 1}, 0, 1, with_facets=True
+    )
+    assert total == 2
+    assert len(page) == 1
+    assert facets['jobState'] == [{'value': 'NY', 'count': 2}]
+
+
+def test_index_changes_reach_other_processes(fake_redis, monkeypatch):
+    monkeypatch.setattr(Config, 'SEARCH_ENGINE', 'bm25')
+    monkeypatch.setattr(Config, 'SEARCH_INDEX_PATH', '/nonexistent/search_index')
+    monkeypatch.setattr(search_engine, '_index', None)
+    other_process = BM25Index.from_documents([])
+
+    new_job = job('Rust Developer')
+    search_engine.index_job(new_job)
+    search_engine._apply_changes(other_process)
+    assert [doc_id for doc_id, _ in other_process.search('rust')] == [str(new_job['_id'])]
+
+    search_engine.unindex_job(new_job['_id'])
+    search_engine._apply_changes(other_process)
+    assert other_process.search('rust') == []
@@ -0,0 +1,87 @@
+import json
+import time
+import pytest
+from models.config import Config
+from utils import task_queue
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    registered = {}
+    monkeypatch.setattr(task_queue, '_handlers', registered)
+    return registered
+
+
+def run_briefly(seconds=0.3):
+    return task_queue.run_worker(None, stop_at=time.time() + seconds, poll_timeout=0.1)
+
+
+def test_task_runs_with_its_arguments(fake_redis, handlers):
+    calls = []
+    task_queue.task('record')(lambda db, **args: calls.append(args))
+    assert task_queue.enqueue('record', job_id='42')
+    assert run_briefly() == 1
+    assert calls == [{'job_id': '42'}]
+    assert fake_redis.llen(task_queue.PROCESSING_KEY) == 0
+    assert fake_redis.zcard(task_queue.LEASES_KEY) == 0
+
+
+def test_failed_task_is_retried_then_dead_lettered(fake_redis, handlers, monkeypatch):
+    monkeypatch.setattr(Config, 'TASK_MAX_ATTEMPTS', 2)
+
+    def fail(db):
+        raise RuntimeError("boom")
+
+    task_queue.task('fail')(fail)
+    task_queue.enqueue('fail')
+    run_briefly()
+    (payload, _), = fake_redis.zrange(task_queue.DELAYED_KEY, 0, -1, withscores=True)
+    assert json.loads(payload)['attempts'] == 1
+
+    # Skip the backoff
+    fake_redis.zadd(task_queue.DELAYED_KEY, {payload: 0})
+    run_briefly()
+    dead = [json.loads(payload) for payload in fake_redis.lrange(task_queue.DEAD_KEY, 0, -1)]
+    assert [(task_data['attempts'], task_data['last_error']) for task_data in dead] == [(2, 'boom')]
+
+
+def test_expired_lease_is_retried(fake_redis):
+    task_queue.enqueue('slow')
+    payload = fake_redis.lmove(task_queue.READY_KEY, task_queue.PROCESSING_KEY, 'RIGHT', 'LEFT')
+    fake_redis.zadd(task_queue.LEASES_KEY, {payload: time.time() - 1})
+    task_queue._requeue_expired(fake_redis, time.time())
+    assert fake_redis.llen(task_queue.PROCESSING_KEY) == 0
+    assert fake_redis.zcard(task_queue.DELAYED_KEY) == 1
+
+
+def test_claimed_task_without_lease_is_leased_then_retried(fake_redis):
+    task_queue.enqueue('orphan')
+    # A worker died between BLMOVE and ZADD
+    payload = fake_redis.lmove(task_queue.READY_KEY, task_queue.PROCESSING_KEY, 'RIGHT', 'LEFT')
+    now = time.time()
+    task_queue._lease_orphans(fake_redis, now)
+    assert fake_redis.zscore(task_queue.LEASES_KEY, payload) == pytest.approx(now + Config.TASK_VISIBILITY_TIMEOUT)
+    task_queue._requeue_expired(fake_redis, now + Config.TASK_VISIBILITY_TIMEOUT + 1)
+    assert fake_redis.zcard(task_queue.DELAYED_KEY) == 1
+
+
+def test_finished_task_with_stray_lease_is_not_retried(fake_redis):
+    fake_redis.zadd(task_queue.LEASES_KEY, {b'{"name": "done"}': 0})
+    task_queue._requeue_expired(fake_redis, time.time())
+    assert fake_redis.zcard(task_queue.LEASES_KEY) == 0
+    assert fake_redis.zcard(task_queue.DELAYED_KEY) == 0
+
+
+def test_long_handler_extends_its_lease(fake_redis, handlers):
+    leases = []
+
+    def long_task(db):
+        before = fake_redis.zscore(task_queue.LEASES_KEY, task_queue._current_payload)
+        time.sleep(0.05)
+        leases.append((task_queue.extend_lease(), fake_redis.zscore(task_queue.LEASES_KEY, task_queue._current_payload) > before))
+
+    task_queue.task('long')(long_task)
+    task_queue.enqueue('long')
+    run_briefly()
+    assert leases == [(True, True)]
+    assert not task_queue.extend_lease()
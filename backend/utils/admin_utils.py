@@ -0,0 +1,23 @@
+import hmac
+from functools import wraps
+from flask import request, jsonify
+from models.config import Config
+
+
+def admin_required(view):
+    """
+    Restrict a route to callers sending the ADMIN_TOKEN in the X-Admin-Token header,
+    or as a bearer token in the Authorization header as Prometheus does.
+    Every call is refused while ADMIN_TOKEN is not configured.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('X-Admin-Token', '')
+        authorization = request.headers.get('Authorization', '')
+        if not token and authorization.startswith('Bearer '):
+            token = authorization[len('Bearer '):]
+        # Compared as bytes: compare_digest raises TypeError on non-ASCII strings
+        if not Config.ADMIN_TOKEN or not hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode()):
+            return jsonify({"error": "Unauthorized"}), 401
+        return view(*args, **kwargs)
+    return wrapper
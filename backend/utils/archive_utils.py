@@ -0,0 +1,107 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from pymongo import ReplaceOne
+from models.config import Config
+from utils.date_utils import start_of_today
+from utils.http_utils import invalidate_job_validator
+from utils.job_cache import invalidate_jobs
+from utils.search_engine import unindex_job
+from utils.suggest_utils import update_suggestions
+
+ARCHIVED_JOBS = 'jobs_archive'
+ARCHIVED_APPLICATIONS = 'applications_archive'
+
+# Applications an employer has decided on. Others stay in the applications
+# collection, where they can still be reviewed after the job is archived
+CLOSED_APPLICATIONS = {"$or": [{"accepted_status": True}, {"rejected_status": True}]}
+
+
+def expired_jobs_query(grace_days=0):
+    """
+    Match the jobs whose application deadline passed more than grace_days ago.
+    Soft deleted jobs are left to the purge task.
+    """
+    return {"appDeadline": {"$lt": start_of_today() - timedelta(days=grace_days)}, "deleted": {"$ne": True}}
+
+
+def _move(source, target, documents, archived_at):
+    """Copy documents into the archive, then remove them from the hot collection.
+
+    The copy is an upsert by _id, so a run interrupted between both steps is
+    completed by the next one instead of duplicating documents.
+    """
+    target.bulk_write(
+        [ReplaceOne({"_id": doc["_id"]}, {**doc, "archivedAt": archived_at}, upsert=True) for doc in documents],
+        ordered=False
+    )
+    source.delete_many({"_id": {"$in": [doc["_id"] for doc in documents]}})
+
+
+def _archive_applications(db, job_ids, batch_size, archived_at):
+    """
+    Move the closed applications of jobs to applications_archive, batch_size at a time in _id order.
+
+    Returns:
+        int: Number of applications archived.
+    """
+    query = {"job_id": {"$in": job_ids}, **CLOSED_APPLICATIONS}
+    archived = 0
+    while True:
+        applications = list(db.applications.find(query).sort("_id", 1).limit(batch_size))
+        if not applications:
+            return archived
+        _move(db.applications, db[ARCHIVED_APPLICATIONS], applications, archived_at)
+        archived += len(applications)
+        query["_id"] = {"$gt": applications[-1]["_id"]}
+
+
+def archive_expired_jobs(db, batch_size=None, grace_days=None, include_applications=None, max_batches=None,
+                         stop_at=None):
+    """
+    Move expired jobs out of the jobs collection into jobs_archive.
+
+    Jobs are moved in batches of batch_size, oldest deadline first, so every run
+    does a bounded amount of work and can be stopped at any time. With
+    include_applications, the closed (accepted or rejected) applications of the
+    archived jobs move to applications_archive first, in batches of batch_size.
+
+    Args:
+        batch_size (int): Jobs moved per batch, defaults to ARCHIVE_BATCH_SIZE.
+        grace_days (int): Days a job stays after its deadline, defaults to ARCHIVE_GRACE_DAYS.
+        include_applications (bool): Defaults to ARCHIVE_APPLICATIONS.
+        max_batches (int): Stop after this many batches, None to archive everything.
+        stop_at (float): Start no batch after this time.time() value, None for no deadline.
+
+    Returns:
+        tuple: (number of jobs archived, number of applications archived)
+    """
+    batch_size = batch_size or Config.ARCHIVE_BATCH_SIZE
+    grace_days = Config.ARCHIVE_GRACE_DAYS if grace_days is None else grace_days
+    include_applications = Config.ARCHIVE_APPLICATIONS if include_applications is None else include_applications
+
+    query = expired_jobs_query(grace_days)
+    jobs_archived = applications_archived = batches = 0
+    while (max_batches is None or batches < max_batches) and (stop_at is None or time.time() < stop_at):
+        jobs = list(db.jobs.find(query).sort("appDeadline", 1).limit(batch_size))
+        if not jobs:
+            break
+
+        archived_at = datetime.now(timezone.utc)
+        if include_applications:
+            applications_archived += _archive_applications(db, [job["_id"] for job in jobs], batch_size, archived_at)
+        _move(db.jobs, db[ARCHIVED_JOBS], jobs, archived_at)
+        # Archived jobs can no longer be applied to, so they are dropped from the saved jobs
+        db.saved_jobs.delete_many({"job_id": {"$in": [job["_id"] for job in jobs]}})
+        jobs_archived += len(jobs)
+        batches += 1
+
+        invalidate_jobs([job["_id"] for job in jobs])
+        for job in jobs:
+            invalidate_job_validator(str(job["_id"]))
+            unindex_job(str(job["_id"]))
+            update_suggestions(job, None)
+
+    logging.info(f"Archived {jobs_archived} expired jobs and {applications_archived} applications")
+    return jobs_archived, applications_archived
+
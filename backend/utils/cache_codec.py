@@ -0,0 +1,78 @@
+"""
+Encoding of cached values in Redis.
+
+Values are encoded with MessagePack (msgspec) and compressed with zstd or zlib
+once they reach CACHE_COMPRESSION_MIN_SIZE bytes. The first byte of every
+value names its format, so formats can be added and mixed while older values
+expire. Values written as JSON text before the codec existed, or with
+CACHE_CODEC=json, start with a printable character and are still read.
+"""
+import json
+import zlib
+import msgspec
+from models.config import Config
+
+try:
+    import zstandard  # Optional, only used when installed
+except ImportError:
+    zstandard = None
+
+FORMAT_MSGPACK = 0x01
+FORMAT_MSGPACK_ZLIB = 0x02
+FORMAT_MSGPACK_ZSTD = 0x03
+
+_encoder = msgspec.msgpack.Encoder()
+_decoder = msgspec.msgpack.Decoder()
+
+
+class CacheFormatError(ValueError):
+    """Raised for a cached value in an unknown format, which callers treat as a miss."""
+
+
+def _compression():
+    if Config.CACHE_COMPRESSION == 'zstd' and zstandard is not None:
+        return FORMAT_MSGPACK_ZSTD
+    if Config.CACHE_COMPRESSION in ('zstd', 'zlib'):
+        return FORMAT_MSGPACK_ZLIB
+    return FORMAT_MSGPACK
+
+
+def encode(value):
+    """Encode a JSON compatible value for Redis."""
+    if Config.CACHE_CODEC == 'json':
+        return json.dumps(value).encode('utf-8')
+
+    data = _encoder.encode(value)
+    if len(data) < Config.CACHE_COMPRESSION_MIN_SIZE:
+        return bytes((FORMAT_MSGPACK,)) + data
+
+    compression = _compression()
+    if compression == FORMAT_MSGPACK_ZSTD:
+        data = zstandard.ZstdCompressor(level=Config.CACHE_COMPRESSION_LEVEL).compress(data)
+    elif compression == FORMAT_MSGPACK_ZLIB:
+        data = zlib.compress(data, min(Config.CACHE_COMPRESSION_LEVEL, 9))
+    return bytes((compression,)) + data
+
+
+def decode(data):
+    """
+    Decode a value read from Redis, in any format encode wrote now or earlier.
+
+    Raises:
+        CacheFormatError: If the value is in an unknown format.
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    fmt, payload = data[0], data[1:]
+    try:
+        if fmt == FORMAT_MSGPACK:
+            return _decoder.decode(payload)
+        if fmt == FORMAT_MSGPACK_ZLIB:
+            return _decoder.decode(zlib.decompress(payload))
+        if fmt == FORMAT_MSGPACK_ZSTD and zstandard is not None:
+            return _decoder.decode(zstandard.ZstdDecompressor().decompress(payload))
+        if fmt >= 0x20:
+            return json.loads(data)
+    except (msgspec.DecodeError, zlib.error, ValueError) as e:
+        raise CacheFormatError(f"Corrupt cached value: {e}") from e
+    raise CacheFormatError(f"Unknown cache format {fmt:#04x}")
@@ -0,0 +1,217 @@
+"""
+Read-through caching that protects MongoDB from cache stampedes.
+
+Values are stored in an envelope recording when they were computed, how long
+they stay fresh and how long computing them took, encoded by utils/cache_codec.py.
+
+- Single flight: on a miss, one caller takes a Redis lock (SET NX with a lease
+  of CACHE_LOCK_LEASE seconds) and computes the value. The other callers wait
+  for it instead of running the same queries. If the lock holder dies, its
+  lease expires and another caller takes over.
+- Stale while revalidate: an expired value is kept for CACHE_STALE_TTL more
+  seconds. While one caller refreshes it, the others are served the stale
+  value.
+- Probabilistic early expiry: each read may refresh a fresh value ahead of its
+  expiry, with a probability that rises as expiry nears and with the time the
+  value takes to compute (Vattani et al., "Optimal Probabilistic Cache Stampede
+  Prevention"). Refreshes are then spread out instead of all happening when
+  the value expires.
+- Negative caching: empty results are cached too, for a shorter empty_ttl, so
+  searches without matches do not reach MongoDB on every request.
+
+Fresh values are also kept in the in-process tier of utils/local_cache.py, so
+hot keys are served without a Redis round trip.
+"""
+import logging
+import math
+import random
+import time
+import uuid
+import redis
+from models.config import Config
+from utils import cache_codec
+from utils.invalidation_bus import publish_invalidation
+from utils.local_cache import get_local_cache, local_ttl
+from utils.metrics import record_cache_lookup
+from utils.redis_utils import get_redis_connection
+
+LOCK_POLL_INTERVAL = 0.05  # Seconds between checks while waiting for another caller's computation
+
+_MISSING = object()
+
+
+def _lock_key(key):
+    return f"lock:{key}"
+
+
+def _acquire(r, key):
+    """Take the computation lock of a key, returning its token, or None if another caller holds it."""
+    token = uuid.uuid4().hex
+    if r.set(_lock_key(key), token, nx=True, px=int(Config.CACHE_LOCK_LEASE * 1000)):
+        return token
+    return None
+
+
+def _release(r, key, token):
+    """Release the lock only if it is still ours, it may have expired and been taken by another caller."""
+    with r.pipeline() as pipe:
+        try:
+            pipe.watch(_lock_key(key))
+            if pipe.get(_lock_key(key)) == token.encode():
+                pipe.multi()
+                pipe.delete(_lock_key(key))
+                pipe.execute()
+            else:
+                pipe.unwatch()
+        except redis.WatchError:
+            pass
+
+
+def _keep_local(key, entry, size):
+    local = get_local_cache()
+    if local is not None:
+        local.set(key, entry["value"], local_ttl(entry["fresh_until"]), size)
+
+
+def _read(r, key):
+    data = r.get(key)
+    if not data:
+        return None
+    try:
+        entry = cache_codec.decode(data)
+    except cache_codec.CacheFormatError as e:
+        logging.warning(f"Ignoring cached value of {key}: {e}")
+        return None
+    if entry["fresh_until"] > time.time():
+        _keep_local(key, entry, len(data))
+    return entry
+
+
+def _store(r, key, value, ttl, duration):
+    entry = {"value": value, "fresh_until": time.time() + ttl, "duration": duration}
+    data = cache_codec.encode(entry)
+    r.set(key, data, ex=ttl + Config.CACHE_STALE_TTL)
+    _keep_local(key, entry, len(data))
+
+
+def _compute_and_store(r, key, compute, ttl, empty_ttl, is_empty):
+    started = time.time()
+    value = compute()
+    duration = time.time() - started
+    if empty_ttl is not None and is_empty(value):
+        ttl = empty_ttl
+    try:
+        _store(r, key, value, ttl, duration)
+    except redis.RedisError as e:
+        logging.error(f"Error setting cache for key {key}: {e}")
+    return value
+
+
+def _expires_early(entry, now):
+    # -log(random()) is exponentially distributed, so an early refresh becomes likely
+    # only within a few computation durations of the expiry
+    gap = entry["duration"] * Config.CACHE_EARLY_EXPIRY_BETA * -math.log(1.0 - random.random())
+    return now + gap >= entry["fresh_until"]
+
+
+def get_or_compute(key, compute, ttl, empty_ttl=None, is_empty=lambda value: not value, refresh=False):
+    """
+    Return the cached value of key, computing and caching it when needed.
+
+    Args:
+        key (str): Redis key of the value.
+        compute (callable): Computes the value, which must be JSON serializable.
+        ttl (int): Seconds the value is fresh.
+        empty_ttl (int): Seconds an empty value is fresh, empty values use ttl when None.
+        is_empty (callable): Tells whether a value is empty.
+        refresh (bool): Compute and cache the value even if a fresh one is cached.
+            When another caller holds the lock, wait for its new value instead
+            of returning the cached one.
+    """
+    local = get_local_cache()
+    if local is not None and not refresh:
+        value = local.get(key, _MISSING)
+        if value is not _MISSING:
+            record_cache_lookup(key, 'local')
+            return value
+
+    try:
+        r = get_redis_connection()
+    except redis.RedisError:
+        r = None
+    if r is None:
+        logging.warning(f"Redis connection not established. Computing {key} without the cache")
+        return compute()
+
+    def compute_and_store():
+        return _compute_and_store(r, key, compute, ttl, empty_ttl, is_empty)
+
+    try:
+        entry = _read(r, key)
+        if entry is not None and not refresh and not _expires_early(entry, time.time()):
+            record_cache_lookup(key, 'redis')
+            return entry["value"]
+
+        token = _acquire(r, key)
+        if token is None and entry is not None and not refresh:
+            # Another caller is refreshing the value, serve the one we have meanwhile
+            record_cache_lookup(key, 'redis' if entry["fresh_until"] > time.time() else 'stale')
+            return entry["value"]
+    except redis.RedisError as e:
+        logging.error(f"Error fetching data from cache for key {key}: {e}")
+        record_cache_lookup(key, 'miss')
+        return compute()
+
+    if not refresh:
+        # Recomputing a value that is still cached, ahead of its expiry or stale, counts as a refresh
+        record_cache_lookup(key, 'miss' if entry is None else 'refresh')
+
+    if token is None:
+        # Cache miss, or refresh, while another caller computes the value: wait
+        # for its result. A refresh does not take the value cached before.
+        previous = entry["fresh_until"] if entry is not None else None
+        deadline = time.time() + Config.CACHE_LOCK_WAIT
+        try:
+            while time.time() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                entry = _read(r, key)
+                if entry is not None and entry["fresh_until"] != previous:
+                    return entry["value"]
+                token = _acquire(r, key)
+                if token is not None:
+                    break
+        except redis.RedisError as e:
+            logging.error(f"Error waiting for the cached value of key {key}: {e}")
+        if token is None:
+            logging.warning(f"Gave up waiting for the computation of {key}")
+            return compute_and_store()
+
+    try:
+        return compute_and_store()
+    finally:
+        try:
+            _release(r, key, token)
+        except redis.RedisError as e:
+            logging.error(f"Error releasing the cache lock of key {key}: {e}")
+
+
+def invalidate(*keys):
+    """Drop cached values from Redis and from the local tier of every process."""
+    local = get_local_cache()
+    if local is not None:
+        local.invalidate(*keys)
+    try:
+        r = get_redis_connection()
+        if r is not None:
+            r.delete(*keys)
+    except redis.RedisError as e:
+        logging.error(f"Error invalidating cache keys {keys}: {e}")
+    publish_invalidation(keys=keys)
+
+
+def invalidate_local(prefix):
+    """Drop the local copies of the keys starting with prefix in every process, e.g. after they were refreshed in Redis."""
+    local = get_local_cache()
+    if local is not None:
+        local.invalidate_prefix(prefix)
+    publish_invalidation(prefixes=(prefix,))
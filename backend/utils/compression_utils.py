@@ -0,0 +1,62 @@
+import gzip
+from flask import request
+from utils.tracing import span
+
+try:
+    import brotli  # Optional, only used when installed
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+# Bodies of these types may be compressed, or are binary (profile downloads), so
+# Lambda has to return them base64 encoded rather than decode them as UTF-8 text
+BINARY_CONTENT_TYPES = frozenset(COMPRESSIBLE_MIMETYPES + ('application/octet-stream',))
+
+
+def _supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def _compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=min(level, 9))
+
+
+def init_compression(app):
+    """
+    Compress responses with brotli or gzip, negotiated by the Accept-Encoding header.
+
+    Config:
+        COMPRESSION_ENABLED (bool): Turn response compression on or off.
+        COMPRESSION_MIN_SIZE (int): Responses smaller than this many bytes are sent as is.
+        COMPRESSION_LEVEL (int): Compression level, capped to what each encoder supports.
+    """
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+
+    min_size = app.config.get('COMPRESSION_MIN_SIZE', 500)
+    level = app.config.get('COMPRESSION_LEVEL', 6)
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code >= 300
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = request.accept_encodings.best_match(_supported_encodings())
+        if not encoding:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        with span('compress', encoding=encoding, bytes=len(data)):
+            response.set_data(_compress(data, encoding, level))
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,53 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from models.config import Config
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the process wide thread pool used for concurrent I/O.
+
+    The pool is created lazily and recreated after a fork, since worker threads
+    do not survive into a forked gunicorn worker.
+    """
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=Config.IO_POOL_SIZE, thread_name_prefix='io')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def run_concurrently(*calls):
+    """
+    Run independent blocking calls at the same time and return their results in order.
+
+    pymongo and redis release the GIL while waiting on the network, so the calls
+    overlap their round trips. The first call runs on the calling thread, the
+    others in a copy of its context, so they count towards the metrics of the
+    request (see utils/metrics.py). The first exception raised by a call is
+    re-raised once all calls are done.
+
+    Args:
+        calls: Callables taking no arguments.
+
+    Returns:
+        list: The result of every call.
+    """
+    if len(calls) < 2:
+        return [call() for call in calls]
+
+    futures = [get_executor().submit(contextvars.copy_context().run, call) for call in calls[1:]]
+    try:
+        first = calls[0]()
+    finally:
+        # Never leave calls running behind the request, even when the first one failed
+        wait(futures)
+    return [first, *(future.result() for future in futures)]
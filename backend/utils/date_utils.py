@@ -1,5 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 def serialize_date(d):
     """Convert datetime object to string."""
     return d.isoformat() if isinstance(d, datetime) else d
+
+
+def start_of_today():
+    """Return midnight of the current UTC day, as stored in the job dates."""
+    return datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
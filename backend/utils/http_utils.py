@@ -0,0 +1,176 @@
+import logging
+import hashlib
+from datetime import timezone
+from flask import request, make_response
+import redis
+from utils.redis_utils import get_redis_connection
+
+# Validators are cached in Redis so a revalidation can be answered without touching MongoDB
+VALIDATOR_EXPIRE_TIME = 86400  # 1 day
+NO_APPLICATION = "none"
+
+
+def _job_validator_key(job_id):
+    return f"validator:job:{job_id}"
+
+
+def _application_validator_key(user_id, job_id):
+    return f"validator:application:{user_id}:{job_id}"
+
+
+def _as_utc(d):
+    """
+    MongoDB hands back naive datetimes that are already in UTC and only keeps
+    millisecond precision, so normalise both sides to compare equal.
+    """
+    if d is None:
+        return None
+    d = d.replace(tzinfo=timezone.utc) if d.tzinfo is None else d.astimezone(timezone.utc)
+    return d.replace(microsecond=d.microsecond // 1000 * 1000)
+
+
+def job_validator(job):
+    """
+    Derive the validator of a job document from its timestamps.
+
+    Returns:
+        tuple: (last modified datetime, validator token)
+    """
+    last_modified = _as_utc(job.get('updatedAt') or job.get('createdAt'))
+    token = last_modified.isoformat() if last_modified else str(job.get('_id'))
+    return last_modified, token
+
+
+def application_validator(application):
+    """
+    Derive the validator of the caller's application for a job.
+
+    Returns:
+        tuple: (last modified datetime or None, validator token)
+    """
+    if not application:
+        return None, NO_APPLICATION
+
+    statuses = ''.join(
+        '1' if application.get(field) else '0'
+        for field in ('applied_status', 'under_review_status', 'rejected_status', 'accepted_status')
+    )
+    last_modified = _as_utc(application.get('status_updated_on') or application.get('applied_on'))
+    token = f"{statuses}@{last_modified.isoformat() if last_modified else ''}"
+    return last_modified, token
+
+
+def build_etag(*tokens):
+    """Build an opaque entity tag from validator tokens."""
+    return hashlib.sha1('|'.join(tokens).encode('utf-8')).hexdigest()
+
+
+def store_validators(job_id, job_token, user_id=None, application_token=None):
+    """Cache the validator tokens of a job (and optionally the caller's application)."""
+    try:
+        r = get_redis_connection()
+        if r is None:
+            return
+        pipe = r.pipeline(transaction=False)
+        pipe.set(_job_validator_key(job_id), job_token, ex=VALIDATOR_EXPIRE_TIME)
+        if user_id is not None and application_token is not None:
+            pipe.set(_application_validator_key(user_id, job_id), application_token, ex=VALIDATOR_EXPIRE_TIME)
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.error(f"Error storing validators for job {job_id}: {e}")
+
+
+def get_cached_etag(scope, job_id, user_id=None):
+    """
+    Rebuild the entity tag of a job representation from the cached validators.
+
+    Returns None when any of the validators is missing, in which case the caller
+    has to load the job from MongoDB.
+    """
+    keys = [_job_validator_key(job_id)]
+    if user_id is not None:
+        keys.append(_application_validator_key(user_id, job_id))
+    try:
+        r = get_redis_connection()
+        if r is None:
+            return None
+        tokens = r.mget(keys)
+    except redis.RedisError as e:
+        logging.error(f"Error fetching validators for job {job_id}: {e}")
+        return None
+
+    if any(token is None for token in tokens):
+        return None
+    return build_etag(scope, *(token.decode('utf-8') for token in tokens))
+
+
+def invalidate_job_validator(job_id, job_token=None):
+    """Write through the new validator of an updated job, or drop it when the job is gone."""
+    try:
+        r = get_redis_connection()
+        if r is None:
+            return
+        if job_token is None:
+            r.delete(_job_validator_key(job_id))
+        else:
+            r.set(_job_validator_key(job_id), job_token, ex=VALIDATOR_EXPIRE_TIME)
+    except redis.RedisError as e:
+        logging.error(f"Error invalidating validator for job {job_id}: {e}")
+
+
+def invalidate_application_validator(user_id, job_id):
+    """Drop the cached validator of an application after its state changed."""
+    try:
+        r = get_redis_connection()
+        if r is not None:
+            r.delete(_application_validator_key(user_id, job_id))
+    except redis.RedisError as e:
+        logging.error(f"Error invalidating validator for application {user_id}:{job_id}: {e}")
+
+
+def invalidate_application_validators(applications):
+    """Drop the cached validators of several applications in one round trip."""
+    if not applications:
+        return
+    try:
+        r = get_redis_connection()
+        if r is not None:
+            with r.pipeline(transaction=False) as pipe:
+                for application in applications:
+                    pipe.delete(_application_validator_key(application['user_id'], application['job_id']))
+                pipe.execute()
+    except redis.RedisError as e:
+        logging.error(f"Error invalidating the validators of {len(applications)} applications: {e}")
+
+
+def request_is_fresh(etag, last_modified=None):
+    """
+    Evaluate the conditional headers of the current request.
+
+    If-None-Match takes precedence over If-Modified-Since, as required by RFC 9110.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def add_validators(response, etag, last_modified=None):
+    """Attach ETag/Last-Modified headers and ask clients to always revalidate."""
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    """Build an empty 304 Not Modified response."""
+    return add_validators(make_response('', 304), etag, last_modified)
+
+
+def latest(*timestamps):
+    """Return the most recent of the given timestamps, ignoring missing ones."""
+    present = [t for t in timestamps if t is not None]
+    return max(present) if present else None
@@ -0,0 +1,192 @@
+import hashlib
+import logging
+import pymongo
+from models.config import Config
+from utils.search_utils import FACET_FIELDS
+
+# Text index weights used when TEXT_INDEX_WEIGHTS is not configured.
+# companyDescription is left out: it is long, shared by every job of a company
+# and says little about the job itself, so it mostly inflates the index.
+DEFAULT_TEXT_INDEX_WEIGHTS = {
+    'jobTitle': 10,
+    'jobSkills': 8,
+    'jobCategory': 5,
+    'companyName': 4,
+    'companyIndustry': 3,
+    'employmentType': 2,
+    'jobQualifications': 2,
+    'jobDescription': 1,
+}
+TEXT_INDEX_PREFIX = 'jobs_text_'
+
+# One application per job seeker and job
+APPLICATION_KEY = [("user_id", pymongo.ASCENDING), ("job_id", pymongo.ASCENDING)]
+
+
+def parse_weights(spec):
+    """
+    Parse a text index weight specification.
+
+    Args:
+        spec (str): Comma separated field:weight pairs, e.g. "jobTitle:10,jobSkills:8".
+
+    Returns:
+        dict: Field weights, or the default weights when spec is empty.
+    """
+    if not spec:
+        return dict(DEFAULT_TEXT_INDEX_WEIGHTS)
+
+    weights = {}
+    for pair in spec.split(','):
+        field, _, weight = pair.partition(':')
+        if field.strip():
+            weights[field.strip()] = int(weight or 1)
+    return weights
+
+
+def text_index_weights():
+    return parse_weights(Config.TEXT_INDEX_WEIGHTS)
+
+
+def text_index_name(weights):
+    """Name the text index after its definition so a changed definition is detectable."""
+    definition = ','.join(f"{field}:{weight}" for field, weight in sorted(weights.items()))
+    return TEXT_INDEX_PREFIX + hashlib.sha1(definition.encode('utf-8')).hexdigest()[:10]
+
+
+def current_text_index(collection):
+    """Return the name of the text index of a collection, or None if there is none."""
+    for index in collection.list_indexes():
+        if 'textIndexVersion' in index:
+            return index['name']
+    return None
+
+
+def _create_text_index(collection, weights):
+    return collection.create_index(
+        [(field, pymongo.TEXT) for field in weights],
+        weights=weights,
+        name=text_index_name(weights),
+        default_language='english'
+    )
+
+
+def ensure_indexes(db):
+    """
+    Create the indexes the application relies on.
+
+    An existing text index with a different definition is left in place, since
+    MongoDB allows a single text index per collection; use rebuild_text_index
+    (flask rebuild-text-index) to switch it over.
+    """
+    db.user.create_index("jobSeekerEmail", unique = True)
+    db.employer.create_index("employerEmail", unique = True)
+
+    # Applications are unique per applicant and job, and listed per job by date
+    _ensure_unique_applications_index(db)
+    db.applications.create_index([("job_id", pymongo.ASCENDING), ("applied_on", pymongo.ASCENDING)])
+
+    # Saved jobs are unique per user and job, and listed per user, last saved first
+    db.saved_jobs.create_index([("user_id", pymongo.ASCENDING), ("job_id", pymongo.ASCENDING)], unique=True)
+    db.saved_jobs.create_index([("user_id", pymongo.ASCENDING), ("savedAt", pymongo.DESCENDING)])
+    db.saved_jobs.create_index("job_id")
+
+    # Facet filters narrow searches on one of these fields, newest jobs first
+    for field in FACET_FIELDS:
+        db.jobs.create_index([(field, pymongo.ASCENDING), ("createdAt", pymongo.DESCENDING)])
+
+    # Salary range filters and salary sorts
+    db.jobs.create_index([("salaryAnnualMax", pymongo.DESCENDING), ("createdAt", pymongo.DESCENDING)])
+    db.jobs.create_index([("salaryAnnualMin", pymongo.ASCENDING), ("createdAt", pymongo.DESCENDING)])
+
+    # Seeker queries only return open jobs, newest first; the archive job scans by deadline
+    db.jobs.create_index([("createdAt", pymongo.DESCENDING), ("appDeadline", pymongo.ASCENDING)])
+    db.jobs.create_index("appDeadline")
+
+    # Archived jobs and applications are only read per employer, job or applicant
+    db.jobs_archive.create_index([("employer_id", pymongo.ASCENDING), ("createdAt", pymongo.DESCENDING)])
+    db.applications_archive.create_index("job_id")
+    db.applications_archive.create_index("user_id")
+
+    weights = text_index_weights()
+    existing = current_text_index(db.jobs)
+    if existing is None:
+        _create_text_index(db.jobs, weights)
+    elif existing != text_index_name(weights):
+        logging.warning(f"Text index {existing} does not match the configured weights. "
+                        f"Run 'flask rebuild-text-index' to rebuild it.")
+
+
+def _find_index(collection, keys):
+    for index in collection.list_indexes():
+        if list(index['key'].items()) == keys:
+            return index
+    return None
+
+
+def _ensure_unique_applications_index(db):
+    index = _find_index(db.applications, APPLICATION_KEY)
+    if index is not None and index.get('unique'):
+        return
+    if index is None:
+        try:
+            db.applications.create_index(APPLICATION_KEY, unique=True)
+            return
+        except pymongo.errors.DuplicateKeyError:
+            pass
+    logging.warning("Applications are not unique per user and job. "
+                    "Run 'flask dedupe-applications' to remove duplicates and add the unique index.")
+
+
+def dedupe_applications(db):
+    """
+    Remove duplicate applications and make (user_id, job_id) unique.
+
+    The earliest application of every user and job is kept. A non-unique index
+    on the same keys is replaced by the unique one.
+
+    Returns:
+        int: Number of duplicate applications removed.
+    """
+    duplicates = db.applications.aggregate([
+        {"$sort": {"applied_on": 1, "_id": 1}},
+        {"$group": {"_id": {"user_id": "$user_id", "job_id": "$job_id"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+
+    removed = 0
+    for duplicate in duplicates:
+        removed += db.applications.delete_many({"_id": {"$in": duplicate['ids'][1:]}}).deleted_count
+
+    index = _find_index(db.applications, APPLICATION_KEY)
+    if index is not None and not index.get('unique'):
+        db.applications.drop_index(index['name'])
+    db.applications.create_index(APPLICATION_KEY, unique=True)
+    logging.info(f"Removed {removed} duplicate applications")
+    return removed
+
+
+def rebuild_text_index(db, weights=None):
+    """
+    Replace the jobs text index with one built from the configured weights.
+
+    MongoDB only allows one text index per collection, so the old index is
+    dropped before the new one is built. Index builds do not block reads or
+    writes, and while no text index exists search_jobs falls back to matching
+    the keyword against the job title and skills, so searches keep working
+    throughout the rebuild.
+
+    Returns:
+        bool: True if the index was rebuilt, False if it was already current.
+    """
+    weights = weights or text_index_weights()
+    existing = current_text_index(db.jobs)
+    if existing == text_index_name(weights):
+        return False
+
+    if existing:
+        logging.info(f"Dropping text index {existing}")
+        db.jobs.drop_index(existing)
+    name = _create_text_index(db.jobs, weights)
+    logging.info(f"Built text index {name}")
+    return True
@@ -0,0 +1,130 @@
+"""
+Invalidation of the in-process caches of every worker and Lambda container.
+
+Writers publish the keys and key prefixes they invalidate on a Redis channel,
+and every process runs a subscriber thread evicting them from its local cache.
+
+Each event carries a version from a Redis counter. A process that receives an
+event out of sequence may have missed some, and clears its whole local cache.
+Processes also compare their last version with the counter every
+LOCAL_CACHE_VERSION_CHECK seconds. This catches subscribers that missed the
+tail of the events, e.g. while their connection was down or their Lambda
+container was frozen.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import redis
+from models.config import Config
+from utils.redis_utils import get_redis_connection
+
+CHANNEL = 'cache:invalidations'
+VERSION_KEY = 'cache:invalidation_version'
+
+_lock = threading.Lock()
+_pid = None
+_seen_version = None   # Version of the last event applied by this process
+_behind_version = None  # Counter value found ahead of _seen_version by the previous check
+_checked_at = 0.0
+
+
+def publish_invalidation(keys=(), prefixes=()):
+    """Evict keys and every key starting with one of prefixes from the local caches of all processes."""
+    try:
+        r = get_redis_connection()
+        if r is None:
+            logging.warning("Redis connection not established. Cannot publish cache invalidation")
+            return
+        version = r.incr(VERSION_KEY)
+        r.publish(CHANNEL, json.dumps({"v": version, "k": list(keys), "p": list(prefixes)}))
+    except redis.RedisError as e:
+        logging.error(f"Error publishing cache invalidation: {e}")
+
+
+def _apply(cache, event):
+    global _seen_version
+    with _lock:
+        if _seen_version is not None and event["v"] > _seen_version + 1:
+            logging.info(f"Missed cache invalidations {_seen_version + 1} to {event['v'] - 1}, clearing the local cache")
+            cache.clear()
+        else:
+            cache.invalidate(*event["k"])
+            for prefix in event["p"]:
+                cache.invalidate_prefix(prefix)
+        _seen_version = max(_seen_version or 0, event["v"])
+
+
+def _resync(cache, r):
+    """Start over from the current version, e.g. after the subscription was interrupted."""
+    global _seen_version, _behind_version
+    with _lock:
+        cache.clear()
+        _seen_version = int(r.get(VERSION_KEY) or 0)
+        _behind_version = None
+
+
+def _subscribe(cache):
+    while True:
+        try:
+            r = get_redis_connection()
+            if r is None:
+                time.sleep(5)
+                continue
+            pubsub = r.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CHANNEL)
+            # Subscribe before reading the version, so no event falls in between
+            _resync(cache, r)
+            while True:
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    _apply(cache, json.loads(message["data"]))
+        except (redis.RedisError, ValueError) as e:
+            logging.warning(f"Cache invalidation subscriber interrupted: {e}")
+            time.sleep(1)
+
+
+def _check_version(cache):
+    global _seen_version, _behind_version, _checked_at
+    now = time.monotonic()
+    if now - _checked_at < Config.LOCAL_CACHE_VERSION_CHECK:
+        return
+    try:
+        r = get_redis_connection()
+        version = int(r.get(VERSION_KEY) or 0) if r is not None else None
+    except redis.RedisError as e:
+        logging.error(f"Error checking the cache invalidation version: {e}")
+        version = None
+    with _lock:
+        # After a long pause, e.g. a frozen Lambda container, the subscriber cannot
+        # be trusted to catch up before this request reads the cache
+        paused = now - _checked_at > 2 * Config.LOCAL_CACHE_VERSION_CHECK
+        _checked_at = now
+        if version is None or _seen_version is None:
+            return
+        if version <= _seen_version:
+            _behind_version = None
+        elif paused or (_behind_version is not None and _seen_version < _behind_version):
+            # Still behind the version the previous check found, the events were missed
+            logging.info(f"Local cache is behind invalidation {version}, clearing it")
+            cache.clear()
+            _seen_version, _behind_version = version, None
+        else:
+            # Give the subscriber until the next check to receive the events
+            _behind_version = version
+
+
+def sync(cache):
+    """Start the subscriber of this process if needed and check that it is up to date."""
+    global _pid
+    if _pid != os.getpid():
+        with _lock:
+            if _pid != os.getpid():
+                threading.Thread(target=_subscribe, args=(cache,), name='cache-invalidations', daemon=True).start()
+                _pid = os.getpid()
+    _check_version(cache)
+
+
+def status():
+    return {"version": _seen_version, "subscribed": _pid == os.getpid()}
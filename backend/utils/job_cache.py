@@ -0,0 +1,145 @@
+"""
+Cache of job documents, shared by every viewer of a job.
+
+Jobs are cached under job:<id> for JOB_CACHE_EXPIRE_TIME seconds, with every
+job field, their timestamps, the employer and whether the job is archived.
+Per user state such as application statuses is never cached here, callers add
+it on top. Hot jobs are also kept in the in-process tier of utils/local_cache.py.
+
+Reads fill the cache with SET NX, while updates write the new job through and
+deletes write a tombstone. A read that loaded a job from MongoDB just before it
+changed therefore cannot overwrite the newer entry. Every write is broadcast
+over the invalidation bus so other processes drop their local copies.
+
+Reads go through job_repository.find_cached, this module only knows the cache.
+"""
+import logging
+from datetime import datetime
+import redis
+from bson import ObjectId
+from models.config import Config
+from utils import cache_codec
+from utils.cache_utils import invalidate
+from utils.invalidation_bus import publish_invalidation
+from utils.job_utils import DATE_FIELDS
+from utils.local_cache import get_local_cache, local_ttl
+from utils.metrics import record_cache_lookup
+from utils.redis_utils import get_redis_connection
+
+ID_FIELDS = ('_id', 'employer_id')
+TIMESTAMP_FIELDS = DATE_FIELDS + ('updatedAt',)
+TOMBSTONE = {"deleted": True}
+
+
+def job_cache_key(job_id):
+    return f"job:{job_id}"
+
+
+def _to_cached(job, archived):
+    """Store ids and dates as strings, so the entry survives every cache codec."""
+    job = dict(job)
+    for field in ID_FIELDS:
+        if job.get(field) is not None:
+            job[field] = str(job[field])
+    for field in TIMESTAMP_FIELDS:
+        if isinstance(job.get(field), datetime):
+            job[field] = job[field].isoformat()
+    return {"job": job, "archived": archived}
+
+
+def _from_cached(entry):
+    """Rebuild the job as MongoDB returns it. Always a new dict, so callers may modify it."""
+    job = dict(entry["job"])
+    for field in ID_FIELDS:
+        if job.get(field) is not None:
+            job[field] = ObjectId(job[field])
+    for field in TIMESTAMP_FIELDS:
+        if isinstance(job.get(field), str):
+            job[field] = datetime.fromisoformat(job[field])
+    return job, entry["archived"]
+
+
+def get_jobs(job_ids):
+    """
+    Look jobs up in the local tier, then in Redis with a single MGET.
+
+    Returns:
+        tuple: (dict of job ObjectId -> (job, archived) for the cached jobs,
+        list of the job ObjectIds that are not cached). Deleted jobs are in neither.
+    """
+    local = get_local_cache()
+    entries, remaining = {}, []
+    for job_id in job_ids:
+        entry = local.get(job_cache_key(job_id)) if local is not None else None
+        if entry is None:
+            remaining.append(job_id)
+        else:
+            entries[job_id] = entry
+            record_cache_lookup(job_cache_key(job_id), 'local')
+
+    missing = []
+    if remaining:
+        try:
+            r = get_redis_connection()
+            values = r.mget([job_cache_key(job_id) for job_id in remaining]) if r is not None else [None] * len(remaining)
+        except redis.RedisError as e:
+            logging.error(f"Error fetching cached jobs: {e}")
+            values = [None] * len(remaining)
+        for job_id, data in zip(remaining, values):
+            try:
+                entry = cache_codec.decode(data) if data else None
+            except cache_codec.CacheFormatError:
+                entry = None
+            if entry is None:
+                missing.append(job_id)
+                record_cache_lookup(job_cache_key(job_id), 'miss')
+                continue
+            entries[job_id] = entry
+            record_cache_lookup(job_cache_key(job_id), 'redis')
+            if local is not None:
+                local.set(job_cache_key(job_id), entry, local_ttl(), len(data))
+
+    found = {job_id: _from_cached(entry) for job_id, entry in entries.items() if entry != TOMBSTONE}
+    return found, missing
+
+
+def _write(entries, overwrite):
+    try:
+        r = get_redis_connection()
+        if r is None:
+            return
+        pipe = r.pipeline(transaction=False)
+        for job_id, entry in entries:
+            pipe.set(job_cache_key(job_id), cache_codec.encode(entry), ex=Config.JOB_CACHE_EXPIRE_TIME, nx=not overwrite)
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.error(f"Error caching jobs: {e}")
+
+
+def fill(jobs):
+    """Cache jobs read from MongoDB, unless a newer entry was written meanwhile. jobs are (job, archived) pairs."""
+    _write([(job['_id'], _to_cached(job, archived)) for job, archived in jobs], overwrite=False)
+
+
+def write_through(job, archived=False):
+    """Replace the cached job after an update."""
+    _write([(job['_id'], _to_cached(job, archived))], overwrite=True)
+    local = get_local_cache()
+    if local is not None:
+        local.invalidate(job_cache_key(job['_id']))
+    publish_invalidation(keys=[job_cache_key(job['_id'])])
+
+
+def mark_deleted(job_id):
+    """Cache a tombstone for a deleted job, so reads neither return nor reload it."""
+    _write([(job_id, TOMBSTONE)], overwrite=True)
+    local = get_local_cache()
+    if local is not None:
+        local.invalidate(job_cache_key(job_id))
+    publish_invalidation(keys=[job_cache_key(job_id)])
+
+
+def invalidate_jobs(job_ids):
+    """Drop jobs from the cache, e.g. when they move to the archive."""
+    if job_ids:
+        invalidate(*[job_cache_key(job_id) for job_id in job_ids])
@@ -0,0 +1,144 @@
+import logging
+import pymongo
+from models.config import Config
+from utils.job_utils import build_projection, serialize_job
+from utils.mongo_utils import for_search
+from utils.cache_utils import get_or_compute, invalidate
+from utils.redis_utils import cache_data, get_cached_data
+from utils.search_engine import get_search_index, search_page
+from utils.tracing import span
+from repositories import job_repository
+from utils.search_utils import (
+    SORT_DATE, canonical_search_key, build_search_query, build_search_pipeline, parse_facet_counts,
+    keyword_fallback_query, is_missing_text_index
+)
+
+
+HOME_FEED_KEY = 'jobs:home'
+SEARCH_CACHE_PREFIX = 'search:'
+
+
+def facets_cache_key(search_key):
+    return f"facets:{search_key}"
+
+
+def _aggregate_search(db, query, sort, projection, skip, limit, cached_counts):
+    if cached_counts is not None:
+        # Total and facets are known, only the page has to be read
+        pipeline = build_search_pipeline(query, sort, projection, skip, limit)
+        jobs = list(db.jobs.aggregate(pipeline, allowDiskUse=True))
+        return jobs, cached_counts['total'], cached_counts['facets']
+
+    pipeline = build_search_pipeline(query, sort, projection, skip, limit, with_facets=True)
+    result = next(db.jobs.aggregate(pipeline, allowDiskUse=True), None) or {}
+    total, facets = parse_facet_counts(result)
+    return result.get('results', []), total, facets
+
+
+def run_search(db, keyword, location, filters, sort, projection, skip, limit, refresh=False):
+    """
+    Run a job search and count its facets.
+
+    The page, the total and the facet counts come back from a single aggregation.
+    The total and facets only depend on the search, not on the page, so they are
+    cached per canonical search and later pages only read their results. With
+    refresh they are counted again even if cached.
+
+    Returns:
+        tuple: (job documents of the page, total number of matches, facet counts)
+    """
+    search_key = canonical_search_key(keyword, location, filters)
+    cached_counts = None if refresh else get_cached_data(facets_cache_key(search_key), local=True)
+    cacheable = True
+
+    search_index = get_search_index() if keyword else None
+    if search_index is not None:
+        # Rank the keyword matches in process instead of scanning the text index
+        with span('search.rank', engine='bm25'):
+            jobs, total, facets = search_page(
+                db, search_index, keyword, build_search_query(None, location, filters), sort,
+                projection, skip, limit, with_facets=cached_counts is None
+            )
+        if cached_counts is not None:
+            total, facets = cached_counts['total'], cached_counts['facets']
+    else:
+        query = build_search_query(keyword, location, filters)
+        try:
+            jobs, total, facets = _aggregate_search(db, query, sort, projection, skip, limit, cached_counts)
+        except pymongo.errors.OperationFailure as e:
+            if not keyword or not is_missing_text_index(e):
+                raise
+            # The text index is being rebuilt, match the keyword without it in the meantime
+            logging.warning(f"Text index unavailable, falling back to keyword matching: {e}")
+            cacheable = False
+            jobs, total, facets = _aggregate_search(
+                db, keyword_fallback_query(query, keyword), SORT_DATE, projection, skip, limit, None
+            )
+
+    if cached_counts is None and cacheable:
+        cache_data(facets_cache_key(search_key), {"total": total, "facets": facets},
+                   expire_time=Config.FACET_CACHE_EXPIRE_TIME)
+    return jobs, total, facets
+
+
+def search_cache_key(search, page, limit):
+    """
+    Key of a cached page of search results.
+
+    Args:
+        search (dict): keyword, location, filters, sort, fields and view of the search.
+    """
+    search_key = canonical_search_key(search['keyword'], search['location'], search['filters'])
+    return (f"{SEARCH_CACHE_PREFIX}{search_key}:page={page}:limit={limit}:fields={','.join(search['fields'])}"
+            f":view={search['view']}:sort={search['sort']}")
+
+
+def search_results(db, search, page, limit, refresh=False):
+    """
+    Return a page of search results, from the cache when possible.
+
+    The cached page is shared by all users, so it holds no application statuses.
+    Callers add those for the current user. The search reads MongoDB with
+    MONGO_SEARCH_READ_PREFERENCE. Concurrent misses of the same page
+    are computed once, see utils/cache_utils.py, and pages without results are
+    cached for SEARCH_EMPTY_CACHE_EXPIRE_TIME only.
+
+    Args:
+        search (dict): keyword, location, filters, sort, fields and view of the search.
+        refresh (bool): Run the search again, counting the total and facets again too.
+    """
+    fields = tuple(search['fields'])
+
+    def compute():
+        jobs, total, facets = run_search(
+            for_search(db), search['keyword'], search['location'], search['filters'], search['sort'],
+            build_projection(fields, search['view']), (page - 1) * limit, limit, refresh=refresh
+        )
+        with span('serialize.jobs', jobs=len(jobs)):
+            search_job_data = [serialize_job(job, fields) for job in jobs]
+        return {
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "has_more": (page * limit) < total,
+            "search_job_data": search_job_data,
+            "facets": facets
+        }
+
+    return get_or_compute(
+        search_cache_key(search, page, limit), compute, Config.SEARCH_CACHE_EXPIRE_TIME,
+        empty_ttl=Config.SEARCH_EMPTY_CACHE_EXPIRE_TIME,
+        is_empty=lambda result: not result["search_job_data"], refresh=refresh
+    )
+
+
+def home_feed(db, limit=10):
+    """Return the open jobs of the home page, cached for all visitors."""
+    return get_or_compute(
+        HOME_FEED_KEY, lambda: [serialize_job(job) for job in job_repository.find_open(for_search(db), limit=limit)],
+        Config.HOME_CACHE_EXPIRE_TIME
+    )
+
+
+def invalidate_home_feed():
+    invalidate(HOME_FEED_KEY)
@@ -0,0 +1,90 @@
+from utils.date_utils import serialize_date
+
+# Fields of a job that list endpoints send to the front end, in response order
+JOB_FIELDS = (
+    'reqId', 'jobTitle', 'jobCategory', 'employmentType', 'noOfopening', 'jobAdress',
+    'jobCity', 'jobState', 'jobZip', 'jobDescription', 'jobQualifications', 'jobSkills',
+    'jobSalary', 'companyName', 'companyDescription', 'companyIndustry',
+    'startDate', 'appDeadline', 'createdAt', 'salaryMin', 'salaryMax', 'salaryPeriod'
+)
+DATE_FIELDS = ('startDate', 'appDeadline', 'createdAt')
+
+# Long free-text fields that dominate the size of list payloads
+LARGE_TEXT_FIELDS = ('jobDescription', 'jobQualifications', 'companyDescription')
+SNIPPET_LENGTH = 200
+
+APPLICATION_STATUS_FIELDS = ('applied_status', 'under_review_status', 'rejected_status', 'accepted_status')
+
+VIEW_FULL = 'full'
+VIEW_LIST = 'list'
+
+
+def parse_fields(args):
+    """
+    Read the field selection of a list request.
+
+    Query parameters:
+        fields (str): Comma separated job fields to return, e.g. "jobTitle,jobCity".
+        view (str): "full" (default) returns every field, "list" truncates the
+            large text fields to snippets of SNIPPET_LENGTH characters.
+
+    Returns:
+        tuple: (selected fields as a tuple, view name). Unknown fields are ignored.
+    """
+    view = args.get('view', VIEW_FULL)
+    if view not in (VIEW_FULL, VIEW_LIST):
+        view = VIEW_FULL
+
+    requested = args.get('fields')
+    if requested:
+        wanted = {field.strip() for field in requested.split(',')}
+        fields = tuple(field for field in JOB_FIELDS if field in wanted)
+    else:
+        fields = JOB_FIELDS
+    return fields, view
+
+
+def build_projection(fields=JOB_FIELDS, view=VIEW_FULL):
+    """
+    Build the MongoDB projection for the selected fields.
+
+    In the list view, large text fields are cut down to snippets by the server
+    so the full text never leaves MongoDB.
+    """
+    projection = {'_id': 1}
+    for field in fields:
+        if view == VIEW_LIST and field in LARGE_TEXT_FIELDS:
+            projection[field] = {'$substrCP': [{'$ifNull': [f'${field}', '']}, 0, SNIPPET_LENGTH]}
+        else:
+            projection[field] = 1
+    return projection
+
+
+def apply_view(job, view):
+    """Cut the large text fields of a job read without build_projection, e.g. from a cache, like the list view does."""
+    if view != VIEW_LIST:
+        return job
+    return {**job, **{field: (job.get(field) or '')[:SNIPPET_LENGTH] for field in LARGE_TEXT_FIELDS if field in job}}
+
+
+def serialize_job(job, fields=JOB_FIELDS, serialize_dates=True):
+    """
+    Convert a job document into the JSON serializable format used by list endpoints.
+
+    Args:
+        job (dict): The job document.
+        fields (tuple): The job fields to include.
+        serialize_dates (bool): Whether dates are converted to ISO strings.
+    """
+    job_data = {"_id": str(job.get('_id'))}
+    for field in fields:
+        value = job.get(field)
+        if serialize_dates and field in DATE_FIELDS:
+            value = serialize_date(value)
+        job_data[field] = value
+    return job_data
+
+
+def application_statuses(application):
+    """Return the application status flags of a job for the current user."""
+    return {status: bool(application and application.get(status)) for status in APPLICATION_STATUS_FIELDS}
@@ -0,0 +1,137 @@
+"""
+In-process cache tier in front of Redis.
+
+Each gunicorn worker or warm Lambda container keeps the hottest cached values
+in memory, so reading them costs neither a Redis round trip nor JSON parsing.
+Entries are evicted least recently used first, beyond LOCAL_CACHE_MAX_ENTRIES
+entries or LOCAL_CACHE_MAX_BYTES bytes of serialized values.
+
+Entries live at most LOCAL_CACHE_TTL seconds. Invalidations are broadcast to
+every process by utils/invalidation_bus.py, and the short TTL bounds how long a
+copy can be served should an invalidation still be missed.
+
+Cached values are shared between requests and must not be modified.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from models.config import Config
+
+_MISSING = object()
+
+
+class LocalCache:
+    """Thread safe LRU cache with per entry expiry, bounded by entry count and size."""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl, size):
+        """
+        Store a value for ttl seconds.
+
+        Args:
+            size (int): Size of the value in bytes, usually the length of its serialized form.
+        """
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+
+    def invalidate_prefix(self, prefix):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+
+
+def get_local_cache():
+    """
+    Return the cache of this process, or None when LOCAL_CACHE_ENABLED is off.
+
+    A forked gunicorn worker starts with an empty cache of its own, kept in
+    sync with the other processes by the invalidation bus.
+    """
+    # Imported here since the bus reads Redis through redis_utils, which imports this module
+    from utils import invalidation_bus
+
+    global _cache, _cache_pid
+    if not Config.LOCAL_CACHE_ENABLED:
+        return None
+    if _cache is None or _cache_pid != os.getpid():
+        with _cache_lock:
+            if _cache is None or _cache_pid != os.getpid():
+                _cache = LocalCache(Config.LOCAL_CACHE_MAX_ENTRIES, Config.LOCAL_CACHE_MAX_BYTES)
+                _cache_pid = os.getpid()
+    invalidation_bus.sync(_cache)
+    return _cache
+
+
+def local_ttl(fresh_until=None):
+    """Seconds a value may stay in the local tier, never past the freshness of its Redis copy."""
+    if fresh_until is None:
+        return Config.LOCAL_CACHE_TTL
+    return min(Config.LOCAL_CACHE_TTL, fresh_until - time.time())
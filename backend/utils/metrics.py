@@ -0,0 +1,338 @@
+"""
+Request metrics, exported in the Prometheus text format.
+
+- A pymongo CommandListener and a Redis client subclass time every command.
+- Commands issued while a request is served are also added to that request's
+  RequestStats, including those run on the I/O thread pool, which copies the
+  request's context.
+- When a request ends, its latency and its MongoDB and Redis costs are recorded
+  against its route, and requests slower than SLOW_REQUEST_THRESHOLD_MS are
+  logged with that breakdown.
+- Cache lookups are counted by cache (the key prefix) and result: "local" and
+  "redis" hits, "stale" values served while being refreshed, "refresh" when a
+  cached value is recomputed, and misses.
+
+Every process counts in memory and adds its counts to the METRICS_KEY hash in
+Redis every METRICS_FLUSH_INTERVAL seconds. The hash therefore holds the totals
+of all gunicorn workers and Lambda containers, whichever of them is scraped.
+"""
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+import redis
+from flask import g, request
+from pymongo import monitoring
+from models.config import Config
+from utils import tracing
+
+METRICS_KEY = 'metrics'
+PREFIX = 'jobsnearby_'
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    'http_requests_total': ('counter', "Requests served, by route, method and status."),
+    'http_request_duration_seconds': ('histogram', "Request latency, by route and method."),
+    'http_request_mongodb_commands_total': ('counter', "MongoDB commands issued by requests, by route."),
+    'http_request_mongodb_seconds_total': ('counter', "Time requests spent in MongoDB commands, by route."),
+    'http_request_redis_commands_total': ('counter', "Redis round trips of requests, by route."),
+    'http_request_redis_seconds_total': ('counter', "Time requests spent in Redis round trips, by route."),
+    'mongodb_commands_total': ('counter', "MongoDB commands, by command."),
+    'mongodb_command_failures_total': ('counter', "Failed MongoDB commands, by command."),
+    'mongodb_command_seconds_total': ('counter', "Time spent in MongoDB commands, by command."),
+    'redis_commands_total': ('counter', "Redis round trips, by command, PIPELINE for a pipeline."),
+    'redis_command_failures_total': ('counter', "Failed Redis round trips, by command."),
+    'redis_command_seconds_total': ('counter', "Time spent in Redis round trips, by command."),
+    'cache_lookups_total': ('counter', "Cache lookups, by cache and result (local, redis, stale, refresh or miss)."),
+}
+
+
+class RequestStats:
+    """MongoDB and Redis commands of one request and the time spent in them."""
+    __slots__ = ('mongo_commands', 'mongo_seconds', 'redis_commands', 'redis_seconds', '_lock')
+
+    def __init__(self):
+        self.mongo_commands = self.redis_commands = 0
+        self.mongo_seconds = self.redis_seconds = 0.0
+        # Commands of one request may run on several threads at once
+        self._lock = threading.Lock()
+
+    def add_mongo(self, seconds):
+        with self._lock:
+            self.mongo_commands += 1
+            self.mongo_seconds += seconds
+
+    def add_redis(self, seconds):
+        with self._lock:
+            self.redis_commands += 1
+            self.redis_seconds += seconds
+
+
+_request_stats = contextvars.ContextVar('request_stats', default=None)
+
+
+class Registry:
+    """Counts of this process not yet added to Redis, by (metric name, labels)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(float)
+        self.flushed_at = time.monotonic()
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            self._pending[(name, labels)] += value
+
+    def observe(self, name, labels, value):
+        """Count a value in a histogram: its bucket, the sum and the count."""
+        bound = next((str(bound) for bound in BUCKETS if value <= bound), '+Inf')
+        with self._lock:
+            self._pending[(name + '_bucket', labels + (('le', bound),))] += 1
+            self._pending[(name + '_sum', labels)] += value
+            self._pending[(name + '_count', labels)] += 1
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self.flushed_at = time.monotonic()
+        return pending
+
+    def restore(self, pending):
+        """Put back counts that could not be flushed."""
+        with self._lock:
+            for series, value in pending.items():
+                self._pending[series] += value
+
+
+registry = Registry()
+
+
+def _record_command(system, command, seconds, failed, attributes=None):
+    labels = (('command', command),)
+    registry.inc(f'{system}_commands_total', labels)
+    registry.inc(f'{system}_command_seconds_total', labels, seconds)
+    if failed:
+        registry.inc(f'{system}_command_failures_total', labels)
+    stats = _request_stats.get()
+    if stats is not None:
+        if system == 'mongodb':
+            stats.add_mongo(seconds)
+        else:
+            stats.add_redis(seconds)
+    tracing.add_span(f'{system} {command}', seconds, attributes, failed)
+
+
+class CommandListener(monitoring.CommandListener):
+    """
+    Times every MongoDB command, registered on the client by utils/mongo_utils.py.
+    While a request is traced, the collection of each command is kept for its span.
+    """
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        if tracing.is_recording():
+            target = event.command.get(event.command_name)
+            collection = target if isinstance(target, str) else event.command.get('collection')
+            self._collections[event.request_id] = {'db.collection': collection} if collection else {}
+
+    def _finished(self, event, failed):
+        attributes = self._collections.pop(event.request_id, None)
+        _record_command('mongodb', event.command_name, event.duration_micros / 1e6, failed, attributes)
+
+    def succeeded(self, event):
+        self._finished(event, False)
+
+    def failed(self, event):
+        self._finished(event, True)
+
+
+def _redis_attributes(args):
+    """Key prefix of a command for its span, e.g. "job" for GET job:<id>."""
+    if len(args) > 1 and isinstance(args[1], (str, bytes)):
+        key = args[1].decode(errors='replace') if isinstance(args[1], bytes) else args[1]
+        return {'redis.key_prefix': key.split(':', 1)[0]}
+    return {}
+
+
+def _timed_redis(command, attributes, call):
+    started = time.perf_counter()
+    try:
+        result = call()
+    except redis.RedisError:
+        _record_command('redis', command, time.perf_counter() - started, True, attributes)
+        raise
+    _record_command('redis', command, time.perf_counter() - started, False, attributes)
+    return result
+
+
+class InstrumentedPipeline(redis.client.Pipeline):
+    """Times a pipeline as one round trip, and commands run right away while WATCHing."""
+
+    def immediate_execute_command(self, *args, **options):
+        attributes = _redis_attributes(args) if tracing.is_recording() else None
+        return _timed_redis(
+            str(args[0]).upper(), attributes, lambda: super(InstrumentedPipeline, self).immediate_execute_command(*args, **options)
+        )
+
+    def execute(self, raise_on_error=True):
+        if not self.command_stack:
+            return super().execute(raise_on_error)
+        attributes = {'redis.commands': len(self.command_stack)} if tracing.is_recording() else None
+        return _timed_redis('PIPELINE', attributes, lambda: super(InstrumentedPipeline, self).execute(raise_on_error))
+
+
+class InstrumentedRedis(redis.Redis):
+    """Redis client timing every command, created by utils/redis_utils.py."""
+
+    def execute_command(self, *args, **options):
+        attributes = _redis_attributes(args) if tracing.is_recording() else None
+        return _timed_redis(
+            str(args[0]).upper(), attributes, lambda: super(InstrumentedRedis, self).execute_command(*args, **options)
+        )
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+def record_cache_lookup(key, result):
+    """Count a lookup of a cache key, the cache being the key prefix, e.g. "search" or "job"."""
+    if Config.METRICS_ENABLED:
+        registry.inc('cache_lookups_total', (('cache', key.split(':', 1)[0]), ('result', result)))
+
+
+def flush():
+    """Add the counts of this process to the totals in Redis."""
+    # Imported here since utils/redis_utils.py creates its client with InstrumentedRedis
+    from utils.redis_utils import get_redis_connection
+    pending = registry.drain()
+    if not pending:
+        return
+    # The flush itself is not part of any request
+    token = _request_stats.set(None)
+    try:
+        r = get_redis_connection()
+        if r is None:
+            registry.restore(pending)
+            return
+        with r.pipeline(transaction=False) as pipe:
+            for (name, labels), value in pending.items():
+                pipe.hincrbyfloat(METRICS_KEY, json.dumps([name, labels]), value)
+            pipe.execute()
+    except redis.RedisError as e:
+        logging.error(f"Error flushing metrics: {e}")
+        registry.restore(pending)
+    finally:
+        _request_stats.reset(token)
+
+
+def flush_if_due():
+    if Config.METRICS_ENABLED and time.monotonic() - registry.flushed_at >= Config.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def render():
+    """
+    Flush this process's counts, then render the totals of every process in the
+    Prometheus text format.
+    """
+    from utils.redis_utils import get_redis_connection
+    flush()
+    r = get_redis_connection()
+    if r is None:
+        raise redis.ConnectionError("Redis connection not established")
+
+    series = defaultdict(dict)
+    for field, value in r.hgetall(METRICS_KEY).items():
+        name, labels = json.loads(field)
+        series[name][tuple(tuple(label) for label in labels)] = float(value)
+
+    lines = []
+    for metric, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {PREFIX}{metric} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{metric} {kind}")
+        if kind == 'histogram':
+            counts = series.get(metric + '_count', {})
+            buckets = series.get(metric + '_bucket', {})
+            for labels in sorted(counts):
+                cumulative = 0
+                for bound in BUCKETS:
+                    cumulative += buckets.get(labels + (('le', str(bound)),), 0)
+                    lines.append(f"{PREFIX}{metric}_bucket{_format_labels(labels + (('le', str(bound)),))} {_format_value(cumulative)}")
+                lines.append(f"{PREFIX}{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {_format_value(counts[labels])}")
+                lines.append(f"{PREFIX}{metric}_sum{_format_labels(labels)} {_format_value(series[metric + '_sum'].get(labels, 0))}")
+                lines.append(f"{PREFIX}{metric}_count{_format_labels(labels)} {_format_value(counts[labels])}")
+        else:
+            for labels, value in sorted(series.get(metric, {}).items()):
+                lines.append(f"{PREFIX}{metric}{_format_labels(labels)} {_format_value(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """
+    Record the latency and the MongoDB and Redis costs of every request, by route.
+
+    Config:
+        METRICS_ENABLED (bool): Turn the instrumentation on or off.
+        METRICS_FLUSH_INTERVAL (float): Seconds between flushes of the counts to Redis.
+        SLOW_REQUEST_THRESHOLD_MS (float): Requests slower than this are logged, 0 to log none.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_request_stats():
+        g.request_started = time.perf_counter()
+        g.request_stats = RequestStats()
+        g.request_stats_token = _request_stats.set(g.request_stats)
+
+    @app.teardown_request
+    def record_request_stats(error=None):
+        stats = g.pop('request_stats', None)
+        if stats is None:
+            return
+        duration = time.perf_counter() - g.pop('request_started')
+        _request_stats.reset(g.pop('request_stats_token'))
+
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = getattr(g, 'response_status', 500 if error is not None else 200)
+        registry.inc('http_requests_total', (('route', route), ('method', request.method), ('status', str(status))))
+        registry.observe('http_request_duration_seconds', (('route', route), ('method', request.method)), duration)
+        route_labels = (('route', route),)
+        registry.inc('http_request_mongodb_commands_total', route_labels, stats.mongo_commands)
+        registry.inc('http_request_mongodb_seconds_total', route_labels, stats.mongo_seconds)
+        registry.inc('http_request_redis_commands_total', route_labels, stats.redis_commands)
+        registry.inc('http_request_redis_seconds_total', route_labels, stats.redis_seconds)
+
+        threshold = app.config.get('SLOW_REQUEST_THRESHOLD_MS', 1000)
+        if threshold and duration * 1000 >= threshold:
+            logging.warning(
+                f"Slow request {request.method} {request.path} {status} (trace {g.get('trace_id')}): {duration * 1000:.1f} ms, "
+                f"MongoDB {stats.mongo_commands} commands {stats.mongo_seconds * 1000:.1f} ms, "
+                f"Redis {stats.redis_commands} round trips {stats.redis_seconds * 1000:.1f} ms"
+            )
+        flush_if_due()
+
+    @app.after_request
+    def remember_status(response):
+        g.response_status = response.status_code
+        return response
@@ -0,0 +1,127 @@
+"""
+MongoDB client settings and read routing.
+
+See the "MongoDB connection tuning" section of the README for how to size the
+pool for gunicorn workers and for Lambda.
+"""
+import importlib.util
+import os
+import threading
+from pymongo import MongoClient
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest
+from models.config import Config
+from utils.metrics import CommandListener
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest,
+}
+
+# Python packages the wire compressors need, zlib ships with Python
+COMPRESSOR_PACKAGES = {'zstd': 'zstandard', 'snappy': 'snappy'}
+
+_read_databases = {}
+
+
+def available_compressors(names):
+    """Keep the configured compressors whose package is installed, in order of preference."""
+    compressors = []
+    for name in (name.strip() for name in names.split(',')):
+        package = COMPRESSOR_PACKAGES.get(name)
+        if name and (package is None or importlib.util.find_spec(package) is not None):
+            compressors.append(name)
+    return compressors
+
+
+def client_options():
+    options = {
+        'serverSelectionTimeoutMS': 5000,
+        'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+    }
+    if Config.MONGO_MAX_IDLE_TIME_MS:
+        options['maxIdleTimeMS'] = Config.MONGO_MAX_IDLE_TIME_MS
+    compressors = available_compressors(Config.MONGO_COMPRESSORS)
+    if compressors:
+        options['compressors'] = compressors
+        if 'zlib' in compressors:
+            options['zlibCompressionLevel'] = Config.MONGO_ZLIB_COMPRESSION_LEVEL
+    if Config.METRICS_ENABLED:
+        options['event_listeners'] = [CommandListener()]
+    return options
+
+
+def create_client(uri, **overrides):
+    """Create the MongoClient with the pool, compression, timeout and metrics settings of Config."""
+    return MongoClient(uri, **{**client_options(), **overrides})
+
+
+class ForkSafeDatabase:
+    """
+    Database handle opening its own MongoClient in every process.
+
+    MongoClient is not fork safe: its sockets and monitor threads belong to the
+    process that created it. The application creates this handle at import,
+    which with gunicorn --preload happens in the master. Each worker then
+    connects on first use instead of sharing the master's client. Everything
+    else is delegated to the pymongo Database of the current process.
+    """
+
+    def __init__(self, uri, name, **options):
+        self._uri = uri
+        self._name = name
+        self._options = options
+        self._database = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._database = create_client(self._uri, **self._options)[self._name]
+                    self._pid = os.getpid()
+        return self._database
+
+    def close(self):
+        """Close the client of this process, e.g. in the gunicorn master before it forks workers."""
+        with self._lock:
+            if self._database is not None and self._pid == os.getpid():
+                self._database.client.close()
+            self._database, self._pid = None, None
+
+    def __getattr__(self, name):
+        return getattr(self._current(), name)
+
+    def __getitem__(self, name):
+        return self._current()[name]
+
+
+def read_preference(mode, max_staleness_seconds=-1):
+    """
+    Build a read preference from its name, e.g. "secondaryPreferred".
+
+    max_staleness_seconds bounds the replication lag of the secondaries read
+    from, -1 for no bound. MongoDB requires at least 90 seconds.
+    """
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference {mode!r}, expected one of {', '.join(READ_PREFERENCES)}")
+    if mode == 'primary':
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=max_staleness_seconds)
+
+
+def for_search(db):
+    """
+    Return db routed by MONGO_SEARCH_READ_PREFERENCE, for reads that tolerate a
+    little replication lag. Search results and the home feed are cached for
+    minutes anyway.
+    """
+    key = (id(db.client), db.name)
+    if key not in _read_databases:
+        preference = read_preference(Config.MONGO_SEARCH_READ_PREFERENCE, Config.MONGO_SEARCH_MAX_STALENESS_SECONDS)
+        _read_databases[key] = db.client.get_database(db.name, read_preference=preference)
+    return _read_databases[key]
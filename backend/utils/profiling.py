@@ -0,0 +1,276 @@
+"""
+On-demand profiling of single production requests.
+
+Off unless PROFILING_ENABLED is set: no hook is registered then, so requests
+pay nothing. When on, a request is profiled when:
+- it sends an X-Profile header signed with the ADMIN_TOKEN, as returned by
+  POST /api/admin/profiles/token, until the signature expires;
+- its route is listed in PROFILE_SAMPLE_RATES, with that probability.
+
+One request per process is profiled at a time, others are served as usual.
+The profile covers the thread serving the request, reads it runs on the I/O
+thread pool show up as waits.
+
+PROFILER chooses the profiler:
+- "cprofile": deterministic, every call counted. Stored as a pstats file, for
+  `python -m pstats` or snakeviz. Slows the profiled request down noticeably.
+- "sampling": the request's stack is sampled every PROFILE_SAMPLING_INTERVAL_MS.
+  Stored as collapsed stacks, for flamegraph.pl or speedscope. Low overhead.
+
+Profiles are kept in Redis for PROFILE_TTL seconds, the latest PROFILE_MAX_KEPT
+of them, so the admin endpoints of any process can list and fetch them.
+"""
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+import redis
+from flask import g, request
+from models.config import Config
+from utils.redis_utils import get_redis_connection
+
+PROFILES_KEY = 'profiles'
+PROFILE_HEADER = 'X-Profile'
+
+# Only one request per process is profiled at a time: cProfile cannot nest and
+# a second profile would skew the first
+_busy = threading.Lock()
+
+
+def _profile_key(profile_id):
+    return f"profile:{profile_id}"
+
+
+def _meta_key(profile_id):
+    return f"profile:{profile_id}:meta"
+
+
+def _signature(expires):
+    return hmac.new(Config.ADMIN_TOKEN.encode(), f"profile:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def sign_profile_header(ttl):
+    """Return the X-Profile header value that profiles requests for the next ttl seconds."""
+    expires = int(time.time()) + ttl
+    return f"{expires}.{_signature(expires)}", expires
+
+
+def _valid_signature(value):
+    if not value or not Config.ADMIN_TOKEN:
+        return False
+    expires, _, signature = value.partition('.')
+    # isdigit() alone accepts digits int() rejects, e.g. superscripts
+    if not (expires.isascii() and expires.isdigit()) or int(expires) < time.time():
+        return False
+    # Compared as bytes: compare_digest raises TypeError on non-ASCII strings
+    return hmac.compare_digest(signature.encode(), _signature(int(expires)).encode())
+
+
+def parse_sample_rates(rates):
+    """Parse "route=rate,route=rate", e.g. "/api/user/searchjobs=0.01"."""
+    parsed = {}
+    for item in filter(None, (item.strip() for item in rates.split(','))):
+        route, _, rate = item.rpartition('=')
+        parsed[route] = float(rate)
+    return parsed
+
+
+class CProfiler:
+    kind = 'cprofile'
+    extension = 'prof'
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        # The pstats file format, as written by Stats.dump_stats
+        return marshal.dumps(pstats.Stats(self._profile).stats)
+
+
+class SamplingProfiler:
+    """Samples the stack of the thread that started it from a background thread."""
+    kind = 'sampling'
+    extension = 'collapsed'
+
+    def __init__(self, interval):
+        self._interval = interval
+        self._thread_id = threading.get_ident()
+        self._stacks = Counter()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        filename = '/'.join(code.co_filename.split(os.sep)[-2:])
+        return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self._stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._sampler.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._sampler.join()
+        return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.most_common()).encode()
+
+
+def _create_profiler():
+    if Config.PROFILER == 'sampling':
+        return SamplingProfiler(Config.PROFILE_SAMPLING_INTERVAL_MS / 1000)
+    return CProfiler()
+
+
+def save_profile(profiler, data, meta):
+    """Store a profile and its metadata, keeping the latest PROFILE_MAX_KEPT."""
+    profile_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    meta = {**meta, "id": profile_id, "profiler": profiler.kind, "extension": profiler.extension, "size": len(data)}
+    r = get_redis_connection()
+    if r is None:
+        logging.warning("Redis connection not established. Cannot store the profile")
+        return None
+    with r.pipeline(transaction=False) as pipe:
+        pipe.set(_profile_key(profile_id), zlib.compress(data), ex=Config.PROFILE_TTL)
+        pipe.set(_meta_key(profile_id), json.dumps(meta), ex=Config.PROFILE_TTL)
+        pipe.zadd(PROFILES_KEY, {profile_id: time.time()})
+        pipe.execute()
+    # Forget the oldest profiles beyond PROFILE_MAX_KEPT
+    evicted = r.zrange(PROFILES_KEY, 0, -Config.PROFILE_MAX_KEPT - 1)
+    if evicted:
+        ids = [profile_id.decode() for profile_id in evicted]
+        r.delete(*[key for old_id in ids for key in (_profile_key(old_id), _meta_key(old_id))])
+        r.zrem(PROFILES_KEY, *ids)
+    return profile_id
+
+
+def list_profiles(limit=50):
+    """Metadata of the latest profiles, newest first."""
+    r = get_redis_connection()
+    if r is None:
+        raise redis.ConnectionError("Redis connection not established")
+    ids = [profile_id.decode() for profile_id in r.zrevrange(PROFILES_KEY, 0, limit - 1)]
+    if not ids:
+        return []
+    metas = r.mget([_meta_key(profile_id) for profile_id in ids])
+    expired = [profile_id for profile_id, meta in zip(ids, metas) if meta is None]
+    if expired:
+        r.zrem(PROFILES_KEY, *expired)
+    return [json.loads(meta) for meta in metas if meta is not None]
+
+
+def get_profile(profile_id):
+    """Return (metadata, profile bytes) of a stored profile, or (None, None)."""
+    r = get_redis_connection()
+    if r is None:
+        raise redis.ConnectionError("Redis connection not established")
+    meta, data = r.mget([_meta_key(profile_id), _profile_key(profile_id)])
+    if meta is None or data is None:
+        return None, None
+    return json.loads(meta), zlib.decompress(data)
+
+
+def format_pstats(data, sort='cumulative', limit=50):
+    """Render a cProfile profile as the pstats text report."""
+    stream = io.StringIO()
+    stats = pstats.Stats(stream=stream)
+    stats.stats = marshal.loads(data)
+    stats.get_top_level_stats()
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def init_profiling(app):
+    """
+    Profile requests carrying a signed X-Profile header or sampled by PROFILE_SAMPLE_RATES.
+
+    Config:
+        PROFILING_ENABLED (bool): Register the profiling hooks at all.
+        PROFILE_SAMPLE_RATES (str): Comma separated route=rate pairs profiled without the header.
+        PROFILER (str): "cprofile" or "sampling".
+    """
+    if not app.config.get('PROFILING_ENABLED', False):
+        return
+
+    sample_rates = parse_sample_rates(app.config.get('PROFILE_SAMPLE_RATES', ''))
+
+    def wanted():
+        if _valid_signature(request.headers.get(PROFILE_HEADER)):
+            return 'header'
+        rate = sample_rates.get(request.url_rule.rule) if request.url_rule is not None else None
+        if rate and random.random() < rate:
+            return 'sampled'
+        return None
+
+    @app.before_request
+    def start_profile():
+        reason = wanted()
+        if reason is None or not _busy.acquire(blocking=False):
+            return
+        try:
+            profiler = _create_profiler()
+            profiler.start()
+        except Exception as e:
+            # e.g. another profiler is already attached to the thread
+            _busy.release()
+            logging.warning(f"Could not profile {request.path}: {e}")
+            return
+        g.profiler, g.profile_reason, g.profile_started = profiler, reason, time.perf_counter()
+
+    @app.after_request
+    def remember_profile_status(response):
+        if 'profiler' in g:
+            g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_profile(error=None):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return
+        try:
+            data = profiler.stop()
+        finally:
+            _busy.release()
+        duration = time.perf_counter() - g.pop('profile_started')
+        meta = {
+            "method": request.method,
+            "route": request.url_rule.rule if request.url_rule is not None else 'unmatched',
+            "path": request.path,
+            "status": g.get('profile_status', 500 if error is not None else 200),
+            "duration_ms": round(duration * 1000, 3),
+            "reason": g.pop('profile_reason'),
+            "trace_id": g.get('trace_id'),
+            "pid": os.getpid(),
+            "created": time.time(),
+        }
+        try:
+            profile_id = save_profile(profiler, data, meta)
+            if profile_id:
+                logging.info(f"Profiled {request.method} {request.path} as {profile_id}")
+        except redis.RedisError as e:
+            logging.error(f"Error storing the profile of {request.path}: {e}")
@@ -1,44 +1,81 @@
+import logging
+import os
 import redis
 from models.config import Config
-import json
+from utils.local_cache import get_local_cache
+from utils import cache_codec
+from utils.metrics import InstrumentedRedis, record_cache_lookup
 import time
 
-# Create a Redis connection with a retry mechanism
+_client = None
+_client_pid = None
+
+# Return the Redis client of this process, created on first use with a retry mechanism.
+# The client and its connection pool are reused by every call instead of connecting
+# again, and a forked gunicorn worker creates its own
 def get_redis_connection(max_retries=3, retry_delay=2):
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
     retry_count = 0
     while retry_count < max_retries:
         try:
-            return redis.Redis.from_url(Config.REDIS_URL)
+            client_class = InstrumentedRedis if Config.METRICS_ENABLED else redis.Redis
+            _client = client_class.from_url(Config.REDIS_URL)
+            _client_pid = os.getpid()
+            return _client
         except redis.RedisError as e:
-            print(f"Attempt {retry_count + 1} failed to connect to Redis: {e}")
+            logging.warning(f"Attempt {retry_count + 1} failed to connect to Redis: {e}")
             time.sleep(retry_delay)  # Wait before retrying
             retry_count += 1
-    print("Redis connection could not be established after several attempts.")
+    logging.error("Redis connection could not be established after several attempts.")
     return None  # Return None if all retries fail
 
-# Cache data in Redis with JSON serialization
+# Cache data in Redis, encoded by utils/cache_codec.py
 def cache_data(key, data, expire_time=3600):
+    tier = get_local_cache()
+    if tier is not None:
+        tier.invalidate(key)  # Read back from Redis by the next get_cached_data
     try:
         r = get_redis_connection()
         if r is not None:
-            r.set(key, json.dumps(data), ex=expire_time)
+            r.set(key, cache_codec.encode(data), ex=expire_time)
         else:
-            print(f"Redis connection not established. Cannot cache data for key: {key}")
+            logging.warning(f"Redis connection not established. Cannot cache data for key: {key}")
     except redis.RedisError as e:
-        print(f"Error setting cache for key {key}: {e}")
+        logging.error(f"Error setting cache for key {key}: {e}")
 
-# Fetch cached data from Redis with JSON deserialization
-def get_cached_data(key):
+# Fetch cached data from Redis, decoded by utils/cache_codec.py. With local, hits are also
+# kept in the in-process tier for LOCAL_CACHE_TTL seconds and read from there first
+def get_cached_data(key, local=False):
+    tier = get_local_cache() if local else None
+    if tier is not None:
+        value = tier.get(key)
+        if value is not None:
+            record_cache_lookup(key, 'local')
+            return value
     try:
         r = get_redis_connection()
         if r is not None:
             data = r.get(key)
-            return json.loads(data) if data else None
+            if not data:
+                record_cache_lookup(key, 'miss')
+                return None
+            try:
+                value = cache_codec.decode(data)
+            except cache_codec.CacheFormatError as e:
+                logging.warning(f"Ignoring cached value of key {key}: {e}")
+                record_cache_lookup(key, 'miss')
+                return None
+            record_cache_lookup(key, 'redis')
+            if tier is not None:
+                tier.set(key, value, Config.LOCAL_CACHE_TTL, len(data))
+            return value
         else:
-            print(f"Redis connection not established. Cannot fetch data for key: {key}")
+            logging.warning(f"Redis connection not established. Cannot fetch data for key: {key}")
             return None
     except redis.RedisError as e:
-        print(f"Error fetching data from cache for key {key}: {e}")
+        logging.error(f"Error fetching data from cache for key {key}: {e}")
         return None
 
 # Check if a key exists in Redis
@@ -48,8 +85,8 @@ def key_exists(key):
         if r is not None:
             return r.exists(key) == 1
         else:
-            print(f"Redis connection not established. Cannot check existence for key: {key}")
+            logging.warning(f"Redis connection not established. Cannot check existence for key: {key}")
             return False
     except redis.RedisError as e:
-        print(f"Error checking existence for key {key}: {e}")
+        logging.error(f"Error checking existence for key {key}: {e}")
         return False
@@ -0,0 +1,176 @@
+import re
+from pymongo import UpdateOne
+
+# Working periods per year, used to compare salaries quoted per hour, week, ...
+PERIODS_PER_YEAR = {
+    'hour': 2080,
+    'day': 260,
+    'week': 52,
+    'biweekly': 26,
+    'semimonthly': 24,
+    'month': 12,
+    'year': 1,
+}
+
+PERIOD_PATTERNS = (
+    ('hour', re.compile(r"(/\s*h(ou)?r|per\s+h(ou)?r|an\s+hour|hourly|p/?h\b)", re.I)),
+    ('day', re.compile(r"(/\s*day|per\s+day|a\s+day|daily)", re.I)),
+    ('biweekly', re.compile(r"(bi-?weekly|fortnight(ly)?|every\s+(two|2)\s+weeks)", re.I)),
+    ('semimonthly', re.compile(r"(semi-?monthly|twice\s+a\s+month)", re.I)),
+    ('week', re.compile(r"(/\s*w(ee)?k|per\s+w(ee)?k|a\s+week|weekly)", re.I)),
+    ('month', re.compile(r"(/\s*mo(nth)?|per\s+month|a\s+month|monthly)", re.I)),
+    ('year', re.compile(r"(/\s*y(ea)?r|per\s+y(ea)?r|a\s+year|annual(ly)?|yearly|p\.?a\.?\b)", re.I)),
+)
+
+# An amount, with its currency symbol and thousand or million suffix if any
+_AMOUNT = r"([$€£]|\b(?:usd|eur|gbp|cad|aud)\b)?\s*(\d[\d,]*(?:\.\d+)?)\s*([km])?\b"
+# A range of two amounts, "80-100k", "$25 to $30"
+RANGE_PATTERN = re.compile(_AMOUNT + r"\s*(?:-|–|—|to)\s*" + _AMOUNT, re.I)
+AMOUNT_PATTERN = re.compile(_AMOUNT, re.I)
+# A period right after an amount quoted without a currency symbol, e.g. "25/hr"
+PERIOD_AFTER_AMOUNT = re.compile(
+    r"\s*(/|per\b|an?\s+(hour|day|week|month|year)\b|hourly|daily|weekly|monthly|yearly|annually)", re.I
+)
+SUFFIXES = {'': 1, 'k': 1000, 'm': 1000000}
+
+# Yearly amounts outside this range are parsing mistakes rather than salaries
+PLAUSIBLE_ANNUAL_SALARY = (1000, 5000000)
+
+SALARY_FIELDS = ('salaryMin', 'salaryMax', 'salaryPeriod', 'salaryAnnualMin', 'salaryAnnualMax')
+
+
+def _guess_period(amount):
+    """Guess the period of a salary quoted without one from its size."""
+    if amount < 500:
+        return 'hour'
+    if amount < 20000:
+        return 'month'
+    return 'year'
+
+
+def _amount(number, suffix):
+    return float(number.replace(',', '')) * SUFFIXES[(suffix or '').lower()]
+
+
+def _find_amounts(text):
+    """
+    Find the salary in a text: the first range or amount with a currency symbol,
+    a thousand suffix (ranges only, "80-100k") or followed by a period ("25/hr").
+    Other numbers, e.g. "401k", "9-5" or "2 years", are ignored.
+
+    Returns:
+        tuple: (list of one or two amounts, end of the salary in text), or (None, 0).
+    """
+    for match in AMOUNT_PATTERN.finditer(text):
+        range_match = RANGE_PATTERN.match(text, match.start())
+        if range_match:
+            low_currency, low_number, low_suffix, high_currency, high_number, high_suffix = range_match.groups()
+            if low_currency or high_currency or high_suffix or PERIOD_AFTER_AMOUNT.match(text, range_match.end()):
+                low, high = _amount(low_number, low_suffix), _amount(high_number, high_suffix)
+                # "80-100k" means 80k to 100k: the suffix of the high end applies to a bare low end
+                if not low_suffix and high_suffix and low * SUFFIXES[high_suffix.lower()] <= high:
+                    low *= SUFFIXES[high_suffix.lower()]
+                return [low, high], range_match.end()
+
+        currency, number, suffix = match.groups()
+        if currency or PERIOD_AFTER_AMOUNT.match(text, match.end()):
+            return [_amount(number, suffix)], match.end()
+    return None, 0
+
+
+def _find_period(text, start):
+    """The period named first after the salary, or else anywhere in the text."""
+    for section in (text[start:], text):
+        found = [(match.start(), name) for name, pattern in PERIOD_PATTERNS for match in [pattern.search(section)] if match]
+        if found:
+            return min(found)[1]
+    return None
+
+
+def parse_salary(text):
+    """
+    Parse a free text salary into a numeric range.
+
+    Examples:
+        "$80k-$100k/yr"          -> 80000 to 100000 per year
+        "25/hr"                  -> 25 per hour
+        "$3,000 a month"         -> 3000 per month
+        "$45/hr + 401k"          -> 45 per hour
+        "$2,000 bi-weekly"       -> 2000 every two weeks
+
+    Args:
+        text (str): The salary as entered by the employer.
+
+    Returns:
+        dict: salaryMin, salaryMax, salaryPeriod and the range converted to a
+        yearly amount (salaryAnnualMin, salaryAnnualMax). All values are None
+        when no salary is found or its yearly amount is implausible.
+    """
+    parsed = dict.fromkeys(SALARY_FIELDS)
+    if not text:
+        return parsed
+    text = str(text)
+
+    amounts, end = _find_amounts(text)
+    if not amounts:
+        return parsed
+
+    low, high = min(amounts), max(amounts)
+    period = _find_period(text, end) or _guess_period(high)
+    annual_min, annual_max = round(low * PERIODS_PER_YEAR[period], 2), round(high * PERIODS_PER_YEAR[period], 2)
+    if annual_min < PLAUSIBLE_ANNUAL_SALARY[0] or annual_max > PLAUSIBLE_ANNUAL_SALARY[1]:
+        return parsed
+
+    parsed.update(
+        salaryMin=low,
+        salaryMax=high,
+        salaryPeriod=period,
+        salaryAnnualMin=annual_min,
+        salaryAnnualMax=annual_max,
+    )
+    return parsed
+
+
+def check_period(period):
+    """Return period if it is one of PERIODS_PER_YEAR, raise ValueError otherwise."""
+    if period not in PERIODS_PER_YEAR:
+        raise ValueError(f"Unknown salary period {period!r}, expected one of: {', '.join(PERIODS_PER_YEAR)}")
+    return period
+
+
+def annualize(amount, period='year'):
+    """
+    Convert an amount quoted per period into a yearly amount.
+
+    Raises:
+        ValueError: If period is not one of PERIODS_PER_YEAR.
+    """
+    return amount * PERIODS_PER_YEAR[check_period(period)]
+
+
+def backfill_salaries(db, batch_size=500):
+    """
+    Parse the salary of every job that has not been parsed yet.
+
+    Jobs are read in _id order and updated with one bulk write per batch, so the
+    backfill can run on a live collection and be resumed at any time.
+
+    Returns:
+        int: Number of jobs updated.
+    """
+    updated = 0
+    last_id = None
+    while True:
+        query = {"salaryPeriod": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(db.jobs.find(query, {"jobSalary": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            return updated
+
+        db.jobs.bulk_write(
+            [UpdateOne({"_id": job["_id"]}, {"$set": parse_salary(job.get("jobSalary"))}) for job in batch],
+            ordered=False
+        )
+        updated += len(batch)
+        last_id = batch[-1]["_id"]
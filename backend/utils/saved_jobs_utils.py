@@ -0,0 +1,36 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from repositories import saved_job_repository
+
+LEGACY_FIELD = 'jobSeekerSavedJobs'
+
+
+def migrate_saved_jobs(db, batch_size=500):
+    """
+    Move the saved job arrays of the user documents into the saved_jobs collection.
+
+    The array order is kept by giving every job a savedAt a millisecond apart,
+    last saved first. The array is removed from a user once its jobs are saved,
+    so the migration can be interrupted and run again.
+
+    Returns:
+        int: Number of users migrated.
+    """
+    migrated = 0
+    query = {LEGACY_FIELD: {'$exists': True}}
+    while True:
+        users = list(db.user.find(query, {LEGACY_FIELD: 1}).limit(batch_size))
+        if not users:
+            break
+        now = datetime.now(timezone.utc)
+        for user in users:
+            job_ids = [job_id for job_id in user.get(LEGACY_FIELD) or [] if ObjectId.is_valid(job_id)]
+            saved_job_repository.save_many(db, user['_id'], {
+                job_id: now - timedelta(milliseconds=len(job_ids) - position)
+                for position, job_id in enumerate(job_ids)
+            })
+            db.user.update_one({'_id': user['_id']}, {'$unset': {LEGACY_FIELD: ''}})
+            migrated += 1
+    logging.info(f"Migrated the saved jobs of {migrated} users")
+    return migrated
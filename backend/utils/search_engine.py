@@ -0,0 +1,501 @@
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+import redis
+from bson import ObjectId
+from models.config import Config
+from utils.redis_utils import get_redis_connection
+from utils.search_utils import (
+    FACET_FIELDS, SORT_DATE, SORT_BEST, SORT_SALARY_HIGH, SORT_SALARY_LOW, MILLISECONDS_PER_DAY, count_facets,
+    parse_facet_counts
+)
+
+# Weight of each indexed field in the term frequencies (a simple BM25F)
+FIELD_WEIGHTS = {
+    'jobTitle': 3.0,
+    'jobSkills': 2.0,
+    'jobQualifications': 1.0,
+    'jobDescription': 1.0,
+}
+INDEXED_FIELDS = tuple(FIELD_WEIGHTS)
+
+K1 = 1.2
+B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'our', 'that', 'the', 'this', 'to', 'we', 'will', 'with', 'you', 'your'
+))
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_ARRAYS = ('terms', 'offsets', 'postings_docs', 'postings_tf', 'doc_ids', 'doc_lengths')
+
+
+def tokenize(text):
+    """Lowercase the text and split it into index terms."""
+    if not text:
+        return []
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOP_WORDS]
+
+
+def document_terms(job):
+    """
+    Compute the weighted term frequencies and length of a job document.
+
+    Returns:
+        tuple: (dict of term -> weighted frequency, weighted document length)
+    """
+    frequencies = defaultdict(float)
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(job.get(field)):
+            frequencies[token] += weight
+    return dict(frequencies), float(sum(frequencies.values()))
+
+
+class BM25Index:
+    """
+    Inverted index over the jobs collection with BM25 scoring.
+
+    The index has two parts:
+      - a compacted base, stored as sorted numpy arrays (terms, CSR postings,
+        document lengths) that can be memory-mapped straight from a snapshot, and
+      - an in-memory delta holding documents added or changed since the base was
+        built. Changed and deleted base documents are masked by tombstones.
+
+    Snapshots compact both parts into a new base. Loading one only maps the
+    files, so a new worker or Lambda container is ready without rebuilding.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._set_base(
+            terms=np.array([], dtype='<U1'),
+            offsets=np.zeros(1, dtype=np.int64),
+            postings_docs=np.array([], dtype=np.int32),
+            postings_tf=np.array([], dtype=np.float32),
+            doc_ids=np.array([], dtype='<U24'),
+            doc_lengths=np.array([], dtype=np.float32),
+        )
+        self.version = None
+        # Last entry of the change stream applied to the index
+        self.change_id = '0-0'
+
+    def _set_base(self, terms, offsets, postings_docs, postings_tf, doc_ids, doc_lengths):
+        self._terms = terms
+        self._offsets = offsets
+        self._postings_docs = postings_docs
+        self._postings_tf = postings_tf
+        self._doc_ids = doc_ids
+        self._doc_lengths = doc_lengths
+        self._base_positions = {doc_id: position for position, doc_id in enumerate(doc_ids.tolist())}
+        self._base_length_total = float(doc_lengths.sum()) if len(doc_lengths) else 0.0
+        self._tombstones = np.zeros(len(doc_ids), dtype=bool)
+        self._tombstone_length_total = 0.0
+        self._delta_postings = defaultdict(dict)
+        self._delta_docs = {}
+
+    # Building and incremental updates
+
+    @classmethod
+    def from_documents(cls, jobs):
+        """Build an index from an iterable of job documents."""
+        index = cls()
+        for job in jobs:
+            index.add(job)
+        index.compact()
+        return index
+
+    def add(self, job):
+        """Index a new job, or re-index a job that changed."""
+        doc_id = str(job['_id'])
+        frequencies, length = document_terms(job)
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, frequency in frequencies.items():
+                self._delta_postings[term][doc_id] = frequency
+            self._delta_docs[doc_id] = (length, tuple(frequencies))
+
+    def remove(self, job_id):
+        """Drop a job from the index."""
+        with self._lock:
+            self._remove_locked(str(job_id))
+
+    def _remove_locked(self, doc_id):
+        position = self._base_positions.get(doc_id)
+        if position is not None and not self._tombstones[position]:
+            self._tombstones[position] = True
+            self._tombstone_length_total += float(self._doc_lengths[position])
+
+        delta = self._delta_docs.pop(doc_id, None)
+        if delta:
+            for term in delta[1]:
+                postings = self._delta_postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self._delta_postings[term]
+
+    def __len__(self):
+        return len(self._doc_ids) - int(self._tombstones.sum()) + len(self._delta_docs)
+
+    # Scoring
+
+    def _base_postings(self, term):
+        position = int(np.searchsorted(self._terms, term))
+        if position >= len(self._terms) or self._terms[position] != term:
+            return None, None
+        start, end = int(self._offsets[position]), int(self._offsets[position + 1])
+        return self._postings_docs[start:end], self._postings_tf[start:end]
+
+    def search(self, query, limit=100):
+        """
+        Rank the jobs matching any of the query terms.
+
+        Args:
+            limit (int): Number of best matches returned, None for all of them.
+
+        Returns:
+            list: (job id, score) tuples, best match first.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            doc_count = len(self)
+            if doc_count == 0:
+                return []
+            length_total = self._base_length_total - self._tombstone_length_total
+            length_total += sum(length for length, _ in self._delta_docs.values())
+            average_length = length_total / doc_count or 1.0
+
+            base_scores = np.zeros(len(self._doc_ids), dtype=np.float32)
+            delta_scores = defaultdict(float)
+
+            for term in terms:
+                base_docs, base_tf = self._base_postings(term)
+                delta_postings = self._delta_postings.get(term, {})
+                live_base_docs = int((~self._tombstones[base_docs]).sum()) if base_docs is not None else 0
+                document_frequency = live_base_docs + len(delta_postings)
+                if document_frequency == 0:
+                    continue
+                idf = math.log(1 + (doc_count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+                if base_docs is not None and len(base_docs):
+                    lengths = self._doc_lengths[base_docs]
+                    norms = K1 * (1 - B + B * lengths / average_length)
+                    np.add.at(base_scores, base_docs, idf * base_tf * (K1 + 1) / (base_tf + norms))
+
+                for doc_id, frequency in delta_postings.items():
+                    norm = K1 * (1 - B + B * self._delta_docs[doc_id][0] / average_length)
+                    delta_scores[doc_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+
+            base_scores[self._tombstones] = 0
+            matches = np.flatnonzero(base_scores)
+            if limit is not None and len(matches) > limit:
+                matches = matches[np.argpartition(-base_scores[matches], limit - 1)[:limit]]
+            results = [(str(self._doc_ids[position]), float(base_scores[position])) for position in matches]
+            results.extend(delta_scores.items())
+
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results if limit is None else results[:limit]
+
+    # Snapshots
+
+    def compact(self):
+        """Merge the delta and tombstones into a new base."""
+        with self._lock:
+            postings = defaultdict(dict)
+            doc_ids, doc_lengths = [], []
+
+            for term_position, term in enumerate(self._terms.tolist()):
+                start, end = int(self._offsets[term_position]), int(self._offsets[term_position + 1])
+                for position, frequency in zip(self._postings_docs[start:end].tolist(), self._postings_tf[start:end].tolist()):
+                    if not self._tombstones[position]:
+                        postings[term][str(self._doc_ids[position])] = frequency
+            for position, doc_id in enumerate(self._doc_ids.tolist()):
+                if not self._tombstones[position]:
+                    doc_ids.append(doc_id)
+                    doc_lengths.append(float(self._doc_lengths[position]))
+
+            for term, term_postings in self._delta_postings.items():
+                postings[term].update(term_postings)
+            for doc_id, (length, _) in self._delta_docs.items():
+                doc_ids.append(doc_id)
+                doc_lengths.append(length)
+
+            positions = {doc_id: position for position, doc_id in enumerate(doc_ids)}
+            terms = sorted(postings)
+            offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            postings_docs, postings_tf = [], []
+            for term_position, term in enumerate(terms):
+                for doc_id, frequency in postings[term].items():
+                    postings_docs.append(positions[doc_id])
+                    postings_tf.append(frequency)
+                offsets[term_position + 1] = len(postings_docs)
+
+            self._set_base(
+                terms=np.array(terms, dtype=str) if terms else np.array([], dtype='<U1'),
+                offsets=offsets,
+                postings_docs=np.array(postings_docs, dtype=np.int32),
+                postings_tf=np.array(postings_tf, dtype=np.float32),
+                doc_ids=np.array(doc_ids, dtype='<U24'),
+                doc_lengths=np.array(doc_lengths, dtype=np.float32),
+            )
+
+    def save(self, path):
+        """
+        Compact the index and write it as a snapshot directory.
+
+        The snapshot is written next to the target and swapped in with a rename,
+        so readers never see a half written snapshot.
+        """
+        with self._lock:
+            self.compact()
+            tmp_path = f"{path}.tmp-{os.getpid()}"
+            os.makedirs(tmp_path, exist_ok=True)
+            for name in SNAPSHOT_ARRAYS:
+                np.save(os.path.join(tmp_path, f"{name}.npy"), getattr(self, f"_{name}"))
+            self.version = f"{time.time():.6f}"
+            with open(os.path.join(tmp_path, 'meta.json'), 'w') as meta_file:
+                json.dump({'format': SNAPSHOT_FORMAT_VERSION, 'version': self.version, 'change_id': self.change_id,
+                           'documents': len(self)}, meta_file)
+
+            old_path = f"{path}.old-{os.getpid()}"
+            if os.path.exists(path):
+                os.rename(path, old_path)
+            os.rename(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path):
+        """Load a snapshot, memory-mapping its arrays instead of reading them."""
+        with open(os.path.join(path, 'meta.json')) as meta_file:
+            meta = json.load(meta_file)
+        if meta.get('format') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported search index snapshot format: {meta.get('format')}")
+
+        index = cls()
+        index._set_base(**{name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in SNAPSHOT_ARRAYS})
+        index.version = meta['version']
+        index.change_id = meta.get('change_id') or '0-0'
+        return index
+
+
+def snapshot_version(path):
+    """Return the version of the snapshot at path, or None if there is none."""
+    try:
+        with open(os.path.join(path, 'meta.json')) as meta_file:
+            return json.load(meta_file).get('version')
+    except (OSError, ValueError):
+        return None
+
+
+"""
+Process wide index used by the routes
+"""
+_index = None
+_index_lock = threading.Lock()
+_last_reload_check = 0.0
+_last_change_check = 0.0
+
+# Redis stream of the jobs indexed and removed by every process since the last snapshots
+CHANGES_KEY = 'search:index_changes'
+
+
+def search_index_enabled():
+    return Config.SEARCH_ENGINE == 'bm25'
+
+
+def get_search_index():
+    """
+    Return the process wide search index, loading the snapshot on first use.
+
+    The snapshot is re-checked every SEARCH_INDEX_RELOAD_SECONDS so workers pick
+    up snapshots written by `flask build-search-index`. Writes are published on
+    the CHANGES_KEY stream, and every SEARCH_INDEX_SYNC_SECONDS each process
+    applies the ones made since its snapshot, by itself or by other processes,
+    to its in-memory delta.
+    Returns None when the BM25 engine is disabled or no snapshot exists, in
+    which case searches go through the MongoDB text index.
+    """
+    global _index, _last_reload_check, _last_change_check
+    if not search_index_enabled():
+        return None
+
+    now = time.monotonic()
+    reload_due = _index is None or now - _last_reload_check >= Config.SEARCH_INDEX_RELOAD_SECONDS
+    sync_due = _index is not None and now - _last_change_check >= Config.SEARCH_INDEX_SYNC_SECONDS
+    if not reload_due and not sync_due:
+        return _index
+
+    with _index_lock:
+        if reload_due:
+            _last_reload_check = now
+            version = snapshot_version(Config.SEARCH_INDEX_PATH)
+            if version is not None and (_index is None or _index.version != version):
+                try:
+                    _index = BM25Index.load(Config.SEARCH_INDEX_PATH)
+                except (OSError, ValueError) as e:
+                    logging.error(f"Failed to load search index snapshot: {e}")
+        if _index is not None:
+            _last_change_check = now
+            _apply_changes(_index)
+    return _index
+
+
+def _stream_id(entry_id):
+    entry_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+    milliseconds, _, sequence = entry_id.partition('-')
+    return int(milliseconds), int(sequence or 0)
+
+
+def _apply_changes(index, batch_size=1000):
+    """Apply the entries of the change stream added after index.change_id."""
+    try:
+        r = get_redis_connection()
+        if r is None:
+            return
+        first = r.xrange(CHANGES_KEY, count=1)
+        if first and index.change_id != '0-0' and _stream_id(first[0][0]) > _stream_id(index.change_id):
+            # The stream was trimmed past the snapshot, only a newer snapshot has the missing writes
+            logging.warning(f"Search index changes after {index.change_id} were trimmed, rebuild the snapshot")
+        while True:
+            streams = r.xread({CHANGES_KEY: index.change_id}, count=batch_size)
+            entries = streams[0][1] if streams else []
+            for entry_id, fields in entries:
+                change = json.loads(fields[b'change'])
+                if change['op'] == 'add':
+                    index.add(change['job'])
+                else:
+                    index.remove(change['id'])
+                index.change_id = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            if len(entries) < batch_size:
+                return
+    except redis.RedisError as e:
+        logging.error(f"Error reading the search index changes: {e}")
+
+
+def _publish_change(change):
+    try:
+        r = get_redis_connection()
+        if r is None:
+            logging.warning("Redis connection not established. Other processes miss the search index change")
+            return
+        r.xadd(CHANGES_KEY, {'change': json.dumps(change, default=str)},
+               maxlen=Config.SEARCH_INDEX_CHANGES_MAXLEN, approximate=True)
+    except redis.RedisError as e:
+        logging.error(f"Error publishing the search index change: {e}")
+
+
+def build_search_index(db, path=None, batch_size=1000):
+    """Build the search index from the jobs collection and write a snapshot."""
+    # Remember the stream position first: the changes made while reading the
+    # collection are applied again on load, which is harmless
+    change_id = '0-0'
+    try:
+        r = get_redis_connection()
+        last = r.xrevrange(CHANGES_KEY, count=1) if r is not None else None
+        if last:
+            change_id = last[0][0].decode()
+    except redis.RedisError as e:
+        logging.error(f"Error reading the search index change stream position: {e}")
+
+    projection = {field: 1 for field in INDEXED_FIELDS}
+    index = BM25Index.from_documents(db.jobs.find({"deleted": {"$ne": True}}, projection, batch_size=batch_size))
+    index.change_id = change_id
+    index.save(path or Config.SEARCH_INDEX_PATH)
+    return index
+
+
+def index_job(job):
+    """Add or refresh a job in the search index of every process after a write."""
+    if not search_index_enabled():
+        return
+    index = get_search_index()
+    if index is not None:
+        index.add(job)
+    _publish_change({'op': 'add', 'job': {'_id': str(job['_id']), **{field: job.get(field) for field in INDEXED_FIELDS}}})
+
+
+def unindex_job(job_id):
+    """Remove a job from the search index of every process after a delete."""
+    if not search_index_enabled():
+        return
+    index = get_search_index()
+    if index is not None:
+        index.remove(job_id)
+    _publish_change({'op': 'remove', 'id': str(job_id)})
+
+
+# Fields needed to order the candidates of a search
+CANDIDATE_PROJECTION = {"createdAt": 1, "salaryAnnualMin": 1, "salaryAnnualMax": 1}
+
+
+def _candidate_sort_key(sort, scores):
+    """Build the sort key of search candidates, matching the orders of build_sort_stage."""
+    def created_at(job):
+        return job.get('createdAt').timestamp() if job.get('createdAt') else 0.0
+
+    if sort == SORT_DATE:
+        return created_at
+    if sort == SORT_SALARY_HIGH:
+        return lambda job: (job.get('salaryAnnualMax') or float('-inf'), created_at(job))
+    if sort == SORT_SALARY_LOW:
+        # Sorted ascending, jobs without a salary last and newer jobs first on ties
+        return lambda job: (job.get('salaryAnnualMin') if job.get('salaryAnnualMin') is not None else float('inf'),
+                            -created_at(job))
+    if sort == SORT_BEST:
+        now = time.time()
+        half_life = Config.SEARCH_RECENCY_HALF_LIFE_DAYS * MILLISECONDS_PER_DAY / 1000
+        return lambda job: scores[str(job['_id'])] * 0.5 ** (max(now - (created_at(job) or now), 0) / half_life)
+    return lambda job: scores[str(job['_id'])]
+
+
+def search_page(db, index, keyword, query, sort, projection, skip, limit, with_facets=False):
+    """
+    Answer a keyword search from the BM25 index instead of a MongoDB $text scan.
+
+    The index scores every job matching the keyword, MongoDB applies the
+    remaining filters to them through their _id, SEARCH_INDEX_FILTER_BATCH_SIZE
+    ids per query, and the matches left are ordered and counted, facets
+    included, before a last query loads the requested page. Filtering before
+    ranking keeps the page, total and facets exact however many jobs match the
+    keyword alone.
+
+    Returns:
+        tuple: (list of job documents for the page, total number of matches,
+        facet counts or None)
+    """
+    ranked = index.search(keyword, limit=None)
+    if not ranked:
+        return [], 0, (parse_facet_counts({})[1] if with_facets else None)
+    scores = dict(ranked)
+
+    candidate_projection = CANDIDATE_PROJECTION
+    if with_facets:
+        candidate_projection = {**CANDIDATE_PROJECTION, **{field: 1 for field in FACET_FIELDS}}
+    ids = [ObjectId(doc_id) for doc_id, _ in ranked]
+    candidates = []
+    for start in range(0, len(ids), Config.SEARCH_INDEX_FILTER_BATCH_SIZE):
+        batch_query = {"_id": {"$in": ids[start:start + Config.SEARCH_INDEX_FILTER_BATCH_SIZE]}}
+        if query:
+            batch_query = {"$and": [batch_query, query]}
+        candidates.extend(db.jobs.find(batch_query, candidate_projection))
+
+    facets = count_facets(candidates) if with_facets else None
+    candidates.sort(key=_candidate_sort_key(sort, scores), reverse=sort != SORT_SALARY_LOW)
+
+    page_ids = [job['_id'] for job in candidates[skip:skip + limit]]
+    if not page_ids:
+        return [], len(candidates), facets
+    jobs = {job['_id']: job for job in db.jobs.find({"_id": {"$in": page_ids}}, projection)}
+    return [jobs[job_id] for job_id in page_ids if job_id in jobs], len(candidates), facets
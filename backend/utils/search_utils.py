@@ -0,0 +1,249 @@
+import hashlib
+import json
+import re
+from collections import Counter
+from models.config import Config
+from utils.date_utils import start_of_today
+from utils.salary_utils import annualize, check_period
+
+SORT_DATE = 'date'
+SORT_RELEVANCE = 'relevance'
+SORT_BEST = 'best'
+SORT_SALARY_HIGH = 'salary_desc'
+SORT_SALARY_LOW = 'salary_asc'
+SORT_OPTIONS = (SORT_DATE, SORT_RELEVANCE, SORT_BEST, SORT_SALARY_HIGH, SORT_SALARY_LOW)
+KEYWORD_SORTS = (SORT_RELEVANCE, SORT_BEST)
+
+# MongoDB error code raised when $text is used without a text index
+INDEX_NOT_FOUND = 27
+
+# Fields the keyword is matched against while the text index is being rebuilt
+FALLBACK_KEYWORD_FIELDS = ('jobTitle', 'jobSkills')
+
+MILLISECONDS_PER_DAY = 86400000
+
+# Fields that can be filtered on and are counted in the search facets
+FACET_FIELDS = ('jobCategory', 'employmentType', 'companyIndustry', 'jobState')
+FACET_LIMIT = 20
+
+# Key of the salary range in the search filters, holding [annual minimum, annual maximum]
+SALARY_FILTER = 'salary'
+
+
+def parse_sort(args, keyword):
+    """
+    Read the sort order of a search request.
+
+    Relevance based orders need a keyword, otherwise results are sorted by date.
+    """
+    sort = args.get('sort', SORT_DATE)
+    if sort not in SORT_OPTIONS or (sort in KEYWORD_SORTS and not keyword):
+        return SORT_DATE
+    return sort
+
+
+def parse_filters(args):
+    """
+    Read the facet filters of a search request.
+
+    Every facet field can be given as a query parameter with one or more comma
+    separated values, e.g. "?jobCategory=Retail,Food&jobState=TX".
+
+    The salary range is given with salary_min and salary_max, quoted per
+    salary_period (hour, day, week, biweekly, semimonthly, month or year, default
+    is year). It matches jobs whose salary range overlaps it.
+
+    Returns:
+        dict: Facet field -> sorted list of selected values, and SALARY_FILTER ->
+        [annual minimum, annual maximum] when a salary range is given.
+
+    Raises:
+        ValueError: If salary_period is not a known period.
+    """
+    filters = {}
+    for field in FACET_FIELDS:
+        values = args.get(field)
+        if values:
+            selected = sorted({value.strip() for value in values.split(',') if value.strip()})
+            if selected:
+                filters[field] = selected
+
+    salary_min, salary_max = args.get('salary_min', type=float), args.get('salary_max', type=float)
+    period = check_period(args.get('salary_period', 'year').strip().lower())
+    if salary_min is not None or salary_max is not None:
+        filters[SALARY_FILTER] = [
+            annualize(salary_min, period) if salary_min is not None else None,
+            annualize(salary_max, period) if salary_max is not None else None
+        ]
+    return filters
+
+
+def canonical_search_key(keyword=None, location=None, filters=None):
+    """
+    Identify a search independently of the page, the user and the parameter order.
+
+    Searches that only differ in letter case or whitespace share the same key.
+    """
+    canonical = {
+        'keyword': ' '.join((keyword or '').lower().split()),
+        'location': ' '.join((location or '').lower().split()),
+        'filters': {field: values for field, values in sorted((filters or {}).items())},
+    }
+    return hashlib.sha1(json.dumps(canonical, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def open_jobs_query():
+    """Match the jobs still taking applications, i.e. whose deadline has not passed and that are not deleted."""
+    return {"appDeadline": {"$gte": start_of_today()}, "deleted": {"$ne": True}}
+
+
+def build_search_query(keyword=None, location=None, filters=None):
+    """
+    Build the MongoDB filter for a keyword and location search.
+
+    Jobs past their application deadline are never returned to job seekers.
+
+    Args:
+        keyword (str): Text searched in the job text index.
+        location (str): Matched against the job address, city, state and zip.
+        filters (dict): Facet field -> list of accepted values.
+    """
+    conditions = [open_jobs_query()]
+    if keyword:
+        conditions.append({"$text": {"$search": keyword}})
+
+    location = location.strip() if location else ''
+    if location:
+        conditions.append({"$or": [
+            {"jobAddress": {"$regex": location, "$options": "i"}},
+            {"jobCity": {"$regex": location, "$options": "i"}},
+            {"jobState": {"$regex": location, "$options": "i"}},
+            {"jobZip": {"$regex": location, "$options": "i"}}
+        ]})
+
+    for field, values in (filters or {}).items():
+        if field == SALARY_FILTER:
+            salary_min, salary_max = values
+            if salary_min is not None:
+                conditions.append({"salaryAnnualMax": {"$gte": salary_min}})
+            if salary_max is not None:
+                conditions.append({"salaryAnnualMin": {"$lte": salary_max}})
+        else:
+            conditions.append({field: values[0] if len(values) == 1 else {"$in": values}})
+
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+def keyword_fallback_query(query, keyword):
+    """
+    Rewrite a search filter so it works without a text index.
+
+    Used while the text index is being rebuilt: the $text clause is replaced by
+    a case insensitive match on the job title and skills.
+    """
+    pattern = re.escape(keyword.strip())
+    fallback = {"$or": [{field: {"$regex": pattern, "$options": "i"}} for field in FALLBACK_KEYWORD_FIELDS]}
+
+    if "$text" in query:
+        return fallback
+    if "$and" in query:
+        return {"$and": [fallback if "$text" in condition else condition for condition in query["$and"]]}
+    return query
+
+
+def is_missing_text_index(error):
+    return getattr(error, 'code', None) == INDEX_NOT_FOUND or 'text index required' in str(error)
+
+
+def build_score_stages(sort):
+    """
+    Build the aggregation stages that score search results.
+
+    relevance: text score, the weights of the text index decide which fields count most.
+    best:      text score decayed by the age of the job, halving every
+               SEARCH_RECENCY_HALF_LIFE_DAYS days, so relevant and recent jobs come first.
+    """
+    if sort == SORT_RELEVANCE:
+        return [{"$addFields": {"score": {"$meta": "textScore"}}}]
+    if sort == SORT_BEST:
+        age_in_days = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$createdAt", "$$NOW"]}]}, MILLISECONDS_PER_DAY]}
+        recency = {"$pow": [0.5, {"$divide": [age_in_days, Config.SEARCH_RECENCY_HALF_LIFE_DAYS]}]}
+        return [{"$addFields": {"score": {"$multiply": [{"$meta": "textScore"}, recency]}}}]
+    if sort == SORT_SALARY_LOW:
+        # Ascending sorts put missing values first, jobs without a parsed salary go last instead
+        return [{"$addFields": {"salarySort": {"$ifNull": ["$salaryAnnualMin", float('inf')]}}}]
+    return []
+
+
+def build_sort_stage(sort):
+    """Sort scored results best first, salaries by their yearly amount, and the rest newest first."""
+    if sort in KEYWORD_SORTS:
+        return {"$sort": {"score": -1, "createdAt": -1}}
+    if sort == SORT_SALARY_HIGH:
+        return {"$sort": {"salaryAnnualMax": -1, "createdAt": -1}}
+    if sort == SORT_SALARY_LOW:
+        return {"$sort": {"salarySort": 1, "createdAt": -1}}
+    return {"$sort": {"createdAt": -1}}
+
+
+def build_facet_stages():
+    """Build the $facet sub-pipelines counting the total and the values of every facet field."""
+    stages = {"total": [{"$count": "count"}]}
+    for field in FACET_FIELDS:
+        stages[field] = [
+            {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+            {"$limit": FACET_LIMIT}
+        ]
+    return stages
+
+
+def build_search_pipeline(query, sort, projection, skip, limit, with_facets=False):
+    """
+    Build the aggregation pipeline returning one page of search results.
+
+    With with_facets, the page, the total and the facet counts are all computed
+    by one $facet stage, so a single round trip answers the whole search.
+    Without it the page is read on its own and the sort can use an index.
+    """
+    page = [build_sort_stage(sort), {"$skip": skip}, {"$limit": limit}, {"$project": projection}]
+    if not with_facets:
+        return [{"$match": query}, *build_score_stages(sort), *page]
+    return [
+        {"$match": query},
+        *build_score_stages(sort),
+        {"$facet": {"results": page, **build_facet_stages()}}
+    ]
+
+
+def parse_facet_counts(facet_result):
+    """
+    Convert the counting branches of a $facet result.
+
+    Returns:
+        tuple: (total number of matches, dict of facet field -> list of value counts)
+    """
+    total = facet_result['total'][0]['count'] if facet_result.get('total') else 0
+    facets = {
+        field: [{"value": bucket['_id'], "count": bucket['count']} for bucket in facet_result.get(field, [])
+                if bucket['_id'] is not None]
+        for field in FACET_FIELDS
+    }
+    return total, facets
+
+
+def count_facets(jobs):
+    """
+    Count the facet values of already fetched jobs, like the $facet branches of build_facet_stages.
+
+    Returns:
+        dict: facet field -> list of value counts, most frequent first
+    """
+    facets = {}
+    for field in FACET_FIELDS:
+        counts = Counter(job.get(field) for job in jobs if job.get(field) is not None)
+        buckets = sorted(counts.items(), key=lambda bucket: (-bucket[1], str(bucket[0])))[:FACET_LIMIT]
+        facets[field] = [{"value": value, "count": count} for value, count in buckets]
+    return facets
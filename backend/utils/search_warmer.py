@@ -0,0 +1,124 @@
+"""
+Popular search tracking and cache warming.
+
+Every first page request of a search adds one to its score in a Redis sorted
+set. Scores decay with a half life of POPULAR_SEARCH_HALF_LIFE_HOURS, applied
+each time the warmer runs, so the ranking follows what is searched now. The
+parameters of each search are kept in a hash next to it.
+
+The warmer runs the SEARCH_WARM_TOP_N most popular searches again and caches
+their first page with freshly counted facets. It runs shortly after job writes
+and every SEARCH_WARM_INTERVAL seconds, see utils/tasks.py, so the popular
+searches are served from the cache.
+"""
+import json
+import logging
+import time
+import pymongo
+import redis
+from models.config import Config
+from utils.cache_utils import invalidate_local
+from utils.job_search import SEARCH_CACHE_PREFIX, search_cache_key, search_results
+from utils.redis_utils import get_redis_connection
+
+POPULAR_KEY = 'popular_searches'
+POPULAR_PARAMS_KEY = 'popular_searches:params'
+DECAYED_AT_KEY = 'popular_searches:decayed_at'
+
+
+def record_search(search, limit):
+    """Count a request for the first page of a search."""
+    key = search_cache_key(search, 1, limit)
+    try:
+        r = get_redis_connection()
+        if r is None:
+            logging.warning("Redis connection not established. Cannot record search")
+            return
+        pipe = r.pipeline(transaction=False)
+        pipe.zincrby(POPULAR_KEY, 1, key)
+        pipe.hsetnx(POPULAR_PARAMS_KEY, key, json.dumps({"search": search, "limit": limit}))
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.error(f"Error recording search {key}: {e}")
+
+
+def _decay_factor(elapsed):
+    return 0.5 ** (elapsed / (Config.POPULAR_SEARCH_HALF_LIFE_HOURS * 3600))
+
+
+def decay_popular_searches(r):
+    """Apply the decay since the previous run to the scores, and forget the least popular searches."""
+    now = time.time()
+    # SET ... GET swaps the timestamp atomically, so concurrent runs do not decay twice
+    decayed_at = r.set(DECAYED_AT_KEY, now, get=True)
+    if decayed_at is not None:
+        r.zunionstore(POPULAR_KEY, {POPULAR_KEY: _decay_factor(now - float(decayed_at))})
+
+    dropped = r.zrange(POPULAR_KEY, 0, -(Config.POPULAR_SEARCH_TRACKED + 1))
+    if dropped:
+        r.zrem(POPULAR_KEY, *dropped)
+        r.hdel(POPULAR_PARAMS_KEY, *dropped)
+
+
+def popular_searches(limit=20):
+    """
+    List the most popular searches.
+
+    Returns:
+        list: Dicts with the search parameters, the page size, the decayed score and
+        the seconds its cached first page stays fresh (None when not cached).
+    """
+    r = get_redis_connection()
+    if r is None:
+        raise redis.ConnectionError("Redis connection not established. Cannot read popular searches.")
+
+    ranked = r.zrevrange(POPULAR_KEY, 0, limit - 1, withscores=True)
+    if not ranked:
+        return []
+    decayed_at = r.get(DECAYED_AT_KEY)
+    factor = _decay_factor(time.time() - float(decayed_at)) if decayed_at else 1
+
+    keys = [key for key, _ in ranked]
+    pipe = r.pipeline(transaction=False)
+    pipe.hmget(POPULAR_PARAMS_KEY, keys)
+    for key in keys:
+        pipe.ttl(key)
+    params, *ttls = pipe.execute()
+
+    searches = []
+    for (key, score), entry, ttl in zip(ranked, params, ttls):
+        if entry is None:
+            continue
+        entry = json.loads(entry)
+        searches.append({
+            **entry,
+            "score": round(score * factor, 3),
+            # Cached pages outlive their freshness by the stale period
+            "cache_ttl": max(ttl - Config.CACHE_STALE_TTL, 0) if ttl >= 0 else None
+        })
+    return searches
+
+
+def warm_search_cache(db, top=None):
+    """
+    Cache the first page and the facets of the most popular searches again.
+
+    Returns:
+        int: Number of searches warmed.
+    """
+    r = get_redis_connection()
+    if r is None:
+        raise redis.ConnectionError("Redis connection not established. Cannot warm the search cache.")
+    decay_popular_searches(r)
+
+    warmed = 0
+    for entry in popular_searches(top or Config.SEARCH_WARM_TOP_N):
+        try:
+            search_results(db, entry['search'], 1, entry['limit'], refresh=True)
+            warmed += 1
+        except pymongo.errors.PyMongoError as e:
+            logging.error(f"Failed to warm search {entry['search']}: {e}")
+    # Other processes read the refreshed pages from Redis instead of their older local copies
+    if warmed:
+        invalidate_local(SEARCH_CACHE_PREFIX)
+    return warmed
@@ -0,0 +1,233 @@
+import logging
+import re
+import uuid
+from collections import Counter
+import redis
+from utils.redis_utils import get_redis_connection
+
+# Suggestion types and the job field each one is built from
+SUGGEST_FIELDS = {
+    'title': 'jobTitle',
+    'skill': 'jobSkills',
+    'company': 'companyName',
+    'city': 'jobCity',
+}
+MIN_PREFIX_LENGTH = 1
+MAX_PREFIX_LENGTH = 15
+MAX_TERM_LENGTH = 60
+MAX_SUGGESTIONS = 25
+
+# Seconds the tables of a rebuild live before they are swapped in, so an
+# interrupted rebuild does not leave them behind
+BUILD_KEY_TTL = 3600
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def _prefix_key(suggest_type, prefix):
+    return f"suggest:{suggest_type}:{prefix}"
+
+
+def _display_key(suggest_type):
+    return f"suggest:display:{suggest_type}"
+
+
+def normalize(text):
+    return WHITESPACE.sub(' ', str(text or '')).strip().lower()
+
+
+def _field_terms(suggest_type, value):
+    """Split a job field into the phrases suggested for it."""
+    if not value:
+        return []
+    # Skills are a comma separated list, every other field is a single phrase
+    parts = str(value).split(',') if suggest_type == 'skill' else [value]
+    terms = []
+    for part in parts:
+        display = WHITESPACE.sub(' ', part).strip()
+        if display and len(display) <= MAX_TERM_LENGTH:
+            terms.append(display)
+    return terms
+
+
+def suggestion_terms(job):
+    """
+    Collect the suggestion phrases of a job.
+
+    Returns:
+        Counter: (type, normalized phrase) -> number of occurrences in the job,
+        plus a dict of the same keys to the phrase as displayed.
+    """
+    counts, displays = Counter(), {}
+    if not job:
+        return counts, displays
+    for suggest_type, field in SUGGEST_FIELDS.items():
+        for display in _field_terms(suggest_type, job.get(field)):
+            key = (suggest_type, normalize(display))
+            counts[key] += 1
+            displays.setdefault(key, display)
+    return counts, displays
+
+
+def _prefixes(term):
+    """
+    Prefixes under which a phrase is found: prefixes of the phrase itself and of
+    every word in it, so "python developer" is suggested for "dev" as well.
+    """
+    prefixes = set()
+    words = term.split(' ')
+    for position in range(len(words)):
+        anchor = ' '.join(words[position:])
+        for length in range(MIN_PREFIX_LENGTH, min(len(anchor), MAX_PREFIX_LENGTH) + 1):
+            prefixes.add(anchor[:length])
+    return prefixes
+
+
+def update_suggestions(old_job=None, new_job=None):
+    """
+    Apply a job write to the suggestion tables.
+
+    Pass the job as it was before the write (None for new jobs) and as it is
+    after the write (None for deleted jobs). Only the phrases that changed are
+    touched, and phrases no longer used by any job are removed.
+    """
+    old_counts, _ = suggestion_terms(old_job)
+    new_counts, displays = suggestion_terms(new_job)
+    changes = Counter(new_counts)
+    changes.subtract(old_counts)
+    changes = {key: change for key, change in changes.items() if change}
+    if not changes:
+        return
+
+    try:
+        r = get_redis_connection()
+        if r is None:
+            return
+        pipe = r.pipeline(transaction=False)
+        touched = set()
+        for (suggest_type, term), change in changes.items():
+            for prefix in _prefixes(term):
+                key = _prefix_key(suggest_type, prefix)
+                pipe.zincrby(key, change, term)
+                touched.add(key)
+            if (suggest_type, term) in displays:
+                pipe.hset(_display_key(suggest_type), term, displays[(suggest_type, term)])
+        for key in touched:
+            pipe.zremrangebyscore(key, '-inf', 0)
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.error(f"Error updating suggestions: {e}")
+
+
+def _build_key(build_id, key):
+    return f"suggest_build:{build_id}:{key}"
+
+
+def rebuild_suggestions(db, batch_size=1000):
+    """
+    Rebuild the suggestion tables from the jobs collection.
+
+    The new tables are written under temporary keys and renamed over the live
+    ones once complete, so suggestions keep being served during the rebuild.
+    Tables no longer used by any job are deleted last.
+    """
+    r = get_redis_connection()
+    if r is None:
+        raise redis.ConnectionError("Redis connection not established. Cannot rebuild suggestions.")
+
+    counts, displays = Counter(), {}
+    projection = {field: 1 for field in SUGGEST_FIELDS.values()}
+    for job in db.jobs.find({"deleted": {"$ne": True}}, projection, batch_size=batch_size):
+        job_counts, job_displays = suggestion_terms(job)
+        counts.update(job_counts)
+        for key, display in job_displays.items():
+            displays.setdefault(key, display)
+
+    build_id = uuid.uuid4().hex
+    keys = set()
+    pipe = r.pipeline(transaction=False)
+    for (suggest_type, term), count in counts.items():
+        for prefix in _prefixes(term):
+            key = _prefix_key(suggest_type, prefix)
+            pipe.zincrby(_build_key(build_id, key), count, term)
+            keys.add(key)
+        display_key = _display_key(suggest_type)
+        pipe.hset(_build_key(build_id, display_key), term, displays[(suggest_type, term)])
+        keys.add(display_key)
+        if len(pipe) >= batch_size:
+            pipe.execute()
+    for key in keys:
+        pipe.expire(_build_key(build_id, key), BUILD_KEY_TTL)
+        if len(pipe) >= batch_size:
+            pipe.execute()
+    pipe.execute()
+
+    for key in keys:
+        pipe.rename(_build_key(build_id, key), key)
+        pipe.persist(key)
+        if len(pipe) >= batch_size:
+            pipe.execute()
+    pipe.execute()
+
+    for key in r.scan_iter(match="suggest:*", count=1000):
+        if key.decode('utf-8') not in keys:
+            pipe.delete(key)
+            if len(pipe) >= batch_size:
+                pipe.execute()
+    pipe.execute()
+    return len(counts)
+
+
+def suggest(prefix, types=None, limit=10):
+    """
+    Return the most frequent phrases starting with prefix.
+
+    Args:
+        prefix (str): What the user typed so far.
+        types (list): Suggestion types to search, defaults to all of them.
+        limit (int): Maximum number of suggestions, clamped to 1 to MAX_SUGGESTIONS.
+
+    Returns:
+        list: Dicts with the suggested text, its type and the number of jobs using it.
+    """
+    prefix = normalize(prefix)
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+    types = [t for t in (types or SUGGEST_FIELDS) if t in SUGGEST_FIELDS]
+    if len(prefix) < MIN_PREFIX_LENGTH or not types:
+        return []
+
+    # Longer prefixes than the stored ones are looked up under the longest
+    # stored prefix and filtered here
+    lookup = prefix[:MAX_PREFIX_LENGTH]
+    fetch = limit if lookup == prefix else limit * 5
+
+    try:
+        r = get_redis_connection()
+        if r is None:
+            return []
+        pipe = r.pipeline(transaction=False)
+        for suggest_type in types:
+            pipe.zrevrange(_prefix_key(suggest_type, lookup), 0, fetch - 1, withscores=True)
+        ranked = pipe.execute()
+
+        candidates = []
+        for suggest_type, members in zip(types, ranked):
+            for member, score in members:
+                term = member.decode('utf-8')
+                if lookup == prefix or term.startswith(prefix) or f" {prefix}" in term:
+                    candidates.append((score, suggest_type, term))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        candidates = candidates[:limit]
+
+        pipe = r.pipeline(transaction=False)
+        for _, suggest_type, term in candidates:
+            pipe.hget(_display_key(suggest_type), term)
+        displays = pipe.execute()
+    except redis.RedisError as e:
+        logging.error(f"Error fetching suggestions for {prefix}: {e}")
+        return []
+
+    return [
+        {"text": display.decode('utf-8') if display else term, "type": suggest_type, "count": int(score)}
+        for (score, suggest_type, term), display in zip(candidates, displays)
+    ]
@@ -0,0 +1,176 @@
+"""
+A small background task queue on Redis lists.
+
+Tasks are JSON payloads pushed on a ready list. A worker claims one by moving
+it atomically onto a processing list and leasing it for TASK_VISIBILITY_TIMEOUT
+seconds. A task is removed when its handler returns. A task whose handler
+fails is retried with exponential backoff, and moves to the dead letter list
+after TASK_MAX_ATTEMPTS attempts. A task whose lease expires, e.g. because its
+worker died, becomes visible again and counts as a failed attempt. A worker
+dying between the claim and the lease leaves a task on the processing list
+without a lease, which the other workers lease in its place. Long handlers
+call extend_lease() as they make progress.
+
+Handlers must be idempotent, since a task can run more than once.
+"""
+import json
+import logging
+import time
+import uuid
+import redis
+from models.config import Config
+from utils.redis_utils import get_redis_connection
+from utils.metrics import flush_if_due
+
+READY_KEY = 'tasks:ready'
+PROCESSING_KEY = 'tasks:processing'
+LEASES_KEY = 'tasks:leases'
+DELAYED_KEY = 'tasks:delayed'
+DEAD_KEY = 'tasks:dead'
+
+_handlers = {}
+_current_payload = None  # Task run by this worker, for extend_lease()
+
+
+def task(name):
+    """Register a function as the handler of a task. Handlers are called as handler(db, **args)."""
+    def register(handler):
+        _handlers[name] = handler
+        return handler
+    return register
+
+
+def enqueue(name, delay=0, **args):
+    """
+    Queue a task for the background worker, to run right away or after delay seconds.
+
+    Returns:
+        bool: True if the task was queued, False if Redis is unavailable.
+    """
+    payload = json.dumps({"id": uuid.uuid4().hex, "name": name, "args": args, "attempts": 0})
+    try:
+        r = get_redis_connection()
+        if r is None:
+            logging.warning(f"Redis connection not established. Cannot queue task {name}")
+            return False
+        if delay > 0:
+            r.zadd(DELAYED_KEY, {payload: time.time() + delay})
+        else:
+            r.lpush(READY_KEY, payload)
+        return True
+    except redis.RedisError as e:
+        logging.error(f"Error queueing task {name}: {e}")
+        return False
+
+
+def _retry(r, payload, reason):
+    """Schedule another attempt of a task, or move it to the dead letter list."""
+    task_data = json.loads(payload)
+    task_data['attempts'] += 1
+    task_data['last_error'] = reason
+    if task_data['attempts'] >= Config.TASK_MAX_ATTEMPTS:
+        logging.error(f"Task {task_data['name']} {task_data['id']} failed {task_data['attempts']} times: {reason}")
+        r.lpush(DEAD_KEY, json.dumps(task_data))
+    else:
+        delay = Config.TASK_RETRY_DELAY * 2 ** (task_data['attempts'] - 1)
+        r.zadd(DELAYED_KEY, {json.dumps(task_data): time.time() + delay})
+
+
+def extend_lease():
+    """
+    Push the lease of the running task TASK_VISIBILITY_TIMEOUT seconds ahead, from a long handler.
+
+    Returns:
+        bool: False if the lease already expired, in which case the task is queued again.
+    """
+    if _current_payload is None:
+        return False
+    try:
+        r = get_redis_connection()
+        if r is None:
+            return False
+        r.zadd(LEASES_KEY, {_current_payload: time.time() + Config.TASK_VISIBILITY_TIMEOUT}, xx=True)
+        return r.zscore(LEASES_KEY, _current_payload) is not None
+    except redis.RedisError as e:
+        logging.error(f"Error extending the task lease: {e}")
+        return False
+
+
+def _lease_orphans(r, now):
+    """
+    Lease the processing tasks that have none, left by a worker that died right after claiming them.
+
+    NX keeps the lease of a worker that claimed the task in the meantime, and a
+    task that finished since the scan gets a stray lease that _requeue_expired
+    drops without retrying it.
+    """
+    for payload in r.lrange(PROCESSING_KEY, 0, -1):
+        r.zadd(LEASES_KEY, {payload: now + Config.TASK_VISIBILITY_TIMEOUT}, nx=True)
+
+
+def _requeue_expired(r, now):
+    """
+    Retry the tasks whose lease expired. ZREM decides which worker handles each
+    one, and LREM skips the tasks that finished in the meantime.
+    """
+    for payload in r.zrangebyscore(LEASES_KEY, 0, now):
+        if r.zrem(LEASES_KEY, payload) and r.lrem(PROCESSING_KEY, 1, payload):
+            _retry(r, payload, "visibility timeout expired")
+
+
+def _promote_delayed(r, now):
+    """Make the retries whose backoff is over ready again."""
+    for payload in r.zrangebyscore(DELAYED_KEY, 0, now):
+        if r.zrem(DELAYED_KEY, payload):
+            r.lpush(READY_KEY, payload)
+
+
+def _run(db, r, payload):
+    global _current_payload
+    task_data = json.loads(payload)
+    handler = _handlers.get(task_data['name'])
+    _current_payload = payload
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for task {task_data['name']}")
+        handler(db, **task_data['args'])
+    except Exception as e:
+        logging.exception(f"Task {task_data['name']} {task_data['id']} failed")
+        _retry(r, payload, str(e))
+    finally:
+        _current_payload = None
+        r.lrem(PROCESSING_KEY, 1, payload)
+        r.zrem(LEASES_KEY, payload)
+
+
+def run_worker(db, stop_at=None, poll_timeout=5):
+    """
+    Process queued tasks until stop_at (a time.time() value), or forever.
+
+    Returns:
+        int: Number of tasks processed.
+    """
+    processed = 0
+    while stop_at is None or time.time() < stop_at:
+        try:
+            r = get_redis_connection()
+            if r is None:
+                time.sleep(poll_timeout)
+                continue
+            now = time.time()
+            _lease_orphans(r, now)
+            _requeue_expired(r, now)
+            _promote_delayed(r, now)
+            flush_if_due()
+
+            timeout = poll_timeout if stop_at is None else max(min(poll_timeout, stop_at - now), 0.1)
+            payload = r.blmove(READY_KEY, PROCESSING_KEY, timeout, 'RIGHT', 'LEFT')
+            if payload is None:
+                continue
+            r.zadd(LEASES_KEY, {payload: time.time() + Config.TASK_VISIBILITY_TIMEOUT})
+            _run(db, r, payload)
+            processed += 1
+        except redis.RedisError as e:
+            logging.error(f"Task queue unavailable: {e}")
+            time.sleep(poll_timeout)
+    return processed
@@ -0,0 +1,90 @@
+"""
+Background task handlers, run by the worker (worker.py).
+"""
+import logging
+import redis
+from models.config import Config
+from utils.redis_utils import get_redis_connection
+from utils.http_utils import invalidate_job_validator, invalidate_application_validators
+from utils.search_engine import unindex_job
+from utils.search_warmer import warm_search_cache
+from utils.suggest_utils import update_suggestions
+from utils.task_queue import task, enqueue, extend_lease
+from repositories import job_repository, application_repository, saved_job_repository
+
+PURGE_JOB = 'purge_job'
+WARM_SEARCH_CACHE = 'warm_search_cache'
+
+# Set while a warmer run is queued, after job writes and periodically
+WARM_PENDING_KEY = 'search_warm:pending'
+WARM_SCHEDULED_KEY = 'search_warm:scheduled'
+
+
+def enqueue_purge_job(job_id):
+    return enqueue(PURGE_JOB, job_id=str(job_id))
+
+
+def schedule_search_warming(periodic=False):
+    """
+    Queue a run of the search cache warmer.
+
+    Job writes queue a run SEARCH_WARM_DEBOUNCE seconds later, and the writes made
+    in the meantime share it. A periodic run queues the next one SEARCH_WARM_INTERVAL
+    seconds later. Starting the chain again while a run is queued changes nothing.
+
+    Returns:
+        bool: True if a run was queued.
+    """
+    key, delay = ((WARM_SCHEDULED_KEY, Config.SEARCH_WARM_INTERVAL) if periodic
+                  else (WARM_PENDING_KEY, Config.SEARCH_WARM_DEBOUNCE))
+    try:
+        r = get_redis_connection()
+        if r is None or not r.set(key, 1, nx=True, ex=delay):
+            return False
+    except redis.RedisError as e:
+        logging.error(f"Error scheduling the search cache warmer: {e}")
+        return False
+    return enqueue(WARM_SEARCH_CACHE, delay=delay, periodic=periodic)
+
+
+@task(PURGE_JOB)
+def purge_job(db, job_id):
+    """
+    Remove a soft deleted job together with its applications and saved entries.
+
+    Applications are deleted in batches of PURGE_BATCH_SIZE, dropping the cached
+    validator of every applicant's view of the job along the way and extending
+    the task lease after each batch. The job
+    document goes last, so a purge that fails part way is simply run again.
+    """
+    job = job_repository.find_deleted(db, job_id, job_repository.SUGGESTION_PROJECTION)
+    if job is None:
+        logging.info(f"Job {job_id} is already purged or not deleted")
+        return
+
+    purged = 0
+    while True:
+        applications = application_repository.find_by_job(
+            db, job_id, application_repository.REFERENCE_PROJECTION, limit=Config.PURGE_BATCH_SIZE
+        )
+        if not applications:
+            break
+        application_repository.delete_by_ids(db, [application['_id'] for application in applications])
+        invalidate_application_validators(applications)
+        purged += len(applications)
+        extend_lease()
+
+    saved_job_repository.delete_by_jobs(db, [job_id])
+    invalidate_job_validator(job_id)
+    unindex_job(job_id)
+    update_suggestions(job, None)
+    job_repository.delete(db, job_id)
+    logging.info(f"Purged job {job_id} and {purged} applications")
+
+
+@task(WARM_SEARCH_CACHE)
+def warm_search_cache_task(db, periodic=False):
+    warmed = warm_search_cache(db)
+    logging.info(f"Warmed {warmed} popular searches")
+    if periodic:
+        schedule_search_warming(periodic=True)
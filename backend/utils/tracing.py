@@ -0,0 +1,498 @@
+"""
+Request traces: a timeline of the MongoDB commands, Redis round trips and
+slow steps (password hashing, password strength checks, search ranking,
+serialization, compression) of one request.
+
+Every request gets a trace id, returned in the X-Trace-Id header and written in
+the slow request log line. A request is traced when:
+- it is sampled, with probability TRACE_SAMPLE_RATE;
+- TRACE_TRUST_TRACEPARENT is on and it sends a W3C traceparent header with
+  the sampled flag. Otherwise the flag is ignored, so clients cannot make the
+  server trace every request, and only the trace id is continued;
+- TRACE_SLOW_REQUESTS is on and it takes SLOW_REQUEST_THRESHOLD_MS or longer.
+  Spans are then recorded for every request and kept only for slow ones.
+
+The MongoDB and Redis spans come from the hooks of utils/metrics.py, so they
+need METRICS_ENABLED. Other steps are timed with span() or @traced(). Commands
+repeated TRACE_REPEAT_THRESHOLD times or more with the same shape (command and
+collection or key prefix) are listed under "repeated" in the trace and logged,
+which points at N+1 query patterns.
+
+Traces are exported from a background thread, to TRACE_FILE as one JSON object
+per line ("jsonl"), rotated past TRACE_FILE_MAX_BYTES, or to an OpenTelemetry collector over OTLP/HTTP JSON
+("otlp"). `flask show-trace <trace id>` prints a trace of TRACE_FILE as a
+timeline.
+"""
+import contextvars
+import fcntl
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+from flask_bcrypt import Bcrypt
+from models.config import Config
+
+SERVICE_NAME = 'jobsnearby'
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+EXPORT_BATCH_SIZE = 50
+EXPORT_QUEUE_SIZE = 1000
+
+_trace = contextvars.ContextVar('trace', default=None)
+_parent_span = contextvars.ContextVar('parent_span', default=None)
+
+_exporter = None
+_exporter_pid = None
+_exporter_lock = threading.Lock()
+
+
+def _new_id(bits):
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Trace:
+    """Spans recorded for one request."""
+    __slots__ = ('trace_id', 'root_id', 'parent_id', 'sampled', 'start_ns', 'spans', 'dropped', '_lock')
+
+    def __init__(self, trace_id, parent_id, sampled):
+        self.trace_id = trace_id
+        self.root_id = _new_id(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.spans = []
+        self.dropped = 0
+        # Spans of one request may end on several threads at once
+        self._lock = threading.Lock()
+
+    def add(self, span_id, parent_id, name, start_ns, end_ns, attributes, error=False):
+        with self._lock:
+            if len(self.spans) >= Config.TRACE_MAX_SPANS:
+                self.dropped += 1
+                return
+            self.spans.append((span_id, parent_id or self.root_id, name, start_ns, end_ns, attributes, error))
+
+
+def is_recording():
+    return _trace.get() is not None
+
+
+def current_trace_id():
+    trace = _trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a step of the current request, nesting the spans started inside it."""
+    trace = _trace.get()
+    if trace is None:
+        yield attributes
+        return
+    span_id, parent_id = _new_id(64), _parent_span.get()
+    token = _parent_span.set(span_id)
+    start_ns = time.time_ns()
+    error = False
+    try:
+        yield attributes
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _parent_span.reset(token)
+        trace.add(span_id, parent_id, name, start_ns, time.time_ns(), attributes, error)
+
+
+def traced(name):
+    """Decorator recording every call of a function as a span."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _trace.get() is None:
+                return function(*args, **kwargs)
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_span(name, seconds, attributes=None, error=False):
+    """Record a step that just ended and took seconds, e.g. a command reported by a driver hook."""
+    trace = _trace.get()
+    if trace is None:
+        return
+    end_ns = time.time_ns()
+    trace.add(_new_id(64), _parent_span.get(), name, end_ns - int(seconds * 1e9), end_ns, attributes or {}, error)
+
+
+class TracedBcrypt(Bcrypt):
+    """Bcrypt recording password hashing and checks, the most CPU heavy steps of a login."""
+
+    def generate_password_hash(self, password, rounds=None, prefix=None):
+        with span('bcrypt.hash'):
+            return super().generate_password_hash(password, rounds, prefix)
+
+    def check_password_hash(self, pw_hash, password):
+        with span('bcrypt.check'):
+            return super().check_password_hash(pw_hash, password)
+
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """JSON provider recording the serialization of response bodies."""
+
+    def dumps(self, obj, **kwargs):
+        if _trace.get() is None:
+            return super().dumps(obj, **kwargs)
+        with span('serialize.json') as attributes:
+            data = super().dumps(obj, **kwargs)
+            attributes['bytes'] = len(data)
+            return data
+
+
+def _span_shape(name, attributes):
+    target = attributes.get('db.collection') or attributes.get('redis.key_prefix')
+    return f"{name} {target}" if target else name
+
+
+def _repeated(spans):
+    """Shapes of the commands repeated TRACE_REPEAT_THRESHOLD times or more, the sign of an N+1 pattern."""
+    counts, durations = defaultdict(int), defaultdict(int)
+    for _, _, name, start_ns, end_ns, attributes, _ in spans:
+        if name.startswith(('mongodb ', 'redis ')):
+            shape = _span_shape(name, attributes)
+            counts[shape] += 1
+            durations[shape] += end_ns - start_ns
+    return [
+        {"shape": shape, "count": count, "total_ms": round(durations[shape] / 1e6, 3)}
+        for shape, count in sorted(counts.items(), key=lambda item: -item[1])
+        if count >= Config.TRACE_REPEAT_THRESHOLD
+    ]
+
+
+def _trace_record(trace, end_ns, route, status, reason):
+    spans = sorted(trace.spans, key=lambda span_data: span_data[3])
+    return {
+        "trace_id": trace.trace_id,
+        "span_id": trace.root_id,
+        "parent_id": trace.parent_id,
+        "name": f"{request.method} {route}",
+        "method": request.method,
+        "route": route,
+        "path": request.path,
+        "status": status,
+        "pid": os.getpid(),
+        "reason": reason,
+        "start": datetime.fromtimestamp(trace.start_ns / 1e9, timezone.utc).isoformat(),
+        "start_ns": trace.start_ns,
+        "duration_ms": round((end_ns - trace.start_ns) / 1e6, 3),
+        "spans": [
+            {
+                "span_id": span_id,
+                "parent_id": parent_id,
+                "name": name,
+                "offset_ms": round((start_ns - trace.start_ns) / 1e6, 3),
+                "duration_ms": round((span_end_ns - start_ns) / 1e6, 3),
+                "attributes": attributes,
+                "error": error,
+            }
+            for span_id, parent_id, name, start_ns, span_end_ns, attributes, error in spans
+        ],
+        "dropped_spans": trace.dropped,
+        "repeated": _repeated(spans),
+    }
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def _otlp_span(trace_id, span_id, parent_id, name, start_ns, duration_ms, attributes, error, kind=1):
+    otlp_span = {
+        "traceId": trace_id,
+        "spanId": span_id,
+        "name": name,
+        "kind": kind,
+        "startTimeUnixNano": str(start_ns),
+        "endTimeUnixNano": str(start_ns + int(duration_ms * 1e6)),
+        "attributes": _otlp_attributes(attributes),
+        "status": {"code": 2 if error else 0},
+    }
+    if parent_id:
+        otlp_span["parentSpanId"] = parent_id
+    return otlp_span
+
+
+def to_otlp(records):
+    """Convert trace records to an OTLP/HTTP JSON export request."""
+    spans = []
+    for record in records:
+        spans.append(_otlp_span(
+            record["trace_id"], record["span_id"], record["parent_id"], record["name"], record["start_ns"],
+            record["duration_ms"],
+            {"http.request.method": record["method"], "http.route": record["route"], "url.path": record["path"],
+             "http.response.status_code": record["status"], "process.pid": record["pid"],
+             "trace.repeated": json.dumps(record["repeated"])},
+            record["status"] >= 500, kind=2
+        ))
+        for span_data in record["spans"]:
+            spans.append(_otlp_span(
+                record["trace_id"], span_data["span_id"], span_data["parent_id"], span_data["name"],
+                record["start_ns"] + int(span_data["offset_ms"] * 1e6), span_data["duration_ms"],
+                span_data["attributes"], span_data["error"]
+            ))
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": SERVICE_NAME}, "spans": spans}],
+        }]
+    }
+
+
+class Exporter:
+    """Writes finished traces from a background thread, so requests never wait on the export."""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self.dropped = 0
+        threading.Thread(target=self._run, name='trace-exporter', daemon=True).start()
+
+    def submit(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                export(batch)
+            except Exception as e:
+                logging.error(f"Error exporting {len(batch)} traces: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def flush(self, timeout):
+        """Wait up to timeout seconds for the queued traces to be exported."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+def trace_files(path=None):
+    """TRACE_FILE followed by its rotated files, newest first."""
+    path = path or Config.TRACE_FILE
+    return [path] + [f"{path}.{number}" for number in range(1, Config.TRACE_FILE_BACKUP_COUNT + 1)]
+
+
+def _rotate(fd):
+    """
+    Shift TRACE_FILE to TRACE_FILE.1 and so on, dropping the oldest.
+
+    The lock is taken on the open file, so the processes reaching the size limit
+    together rotate once: the others find TRACE_FILE already replaced and only
+    reopen it.
+    """
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        try:
+            if os.stat(Config.TRACE_FILE).st_ino != os.fstat(fd).st_ino:
+                return
+        except FileNotFoundError:
+            return
+        files = trace_files()
+        if len(files) == 1:
+            os.truncate(Config.TRACE_FILE, 0)
+            return
+        for older, newer in zip(reversed(files[1:]), reversed(files[:-1])):
+            if os.path.exists(newer):
+                os.replace(newer, older)
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def export(records):
+    """Write trace records to the configured TRACE_EXPORTER."""
+    if Config.TRACE_EXPORTER == 'jsonl':
+        # One write per batch on a file opened in append mode, so the lines of
+        # several worker processes are not interleaved
+        data = ''.join(json.dumps(record, default=str) + '\n' for record in records).encode()
+        fd = os.open(Config.TRACE_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if Config.TRACE_FILE_MAX_BYTES and os.fstat(fd).st_size + len(data) > Config.TRACE_FILE_MAX_BYTES:
+                _rotate(fd)
+                os.close(fd)
+                fd = os.open(Config.TRACE_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+    elif Config.TRACE_EXPORTER == 'otlp':
+        body = json.dumps(to_otlp(records), default=str).encode()
+        export_request = urllib.request.Request(
+            Config.TRACE_OTLP_ENDPOINT, data=body, headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        with urllib.request.urlopen(export_request, timeout=5) as response:
+            response.read()
+
+
+def get_exporter():
+    """Return the exporter of this process, recreated after a fork since its thread does not survive it."""
+    global _exporter, _exporter_pid
+    if _exporter is None or _exporter_pid != os.getpid():
+        with _exporter_lock:
+            if _exporter is None or _exporter_pid != os.getpid():
+                _exporter = Exporter()
+                _exporter_pid = os.getpid()
+    return _exporter
+
+
+def flush(timeout=1.0):
+    """Export the queued traces before returning, e.g. before a Lambda container is frozen."""
+    if _exporter is not None and _exporter_pid == os.getpid():
+        _exporter.flush(timeout)
+
+
+def find_trace(trace_id, path=None):
+    """Return the record of a trace from a JSONL trace file or its rotated files, or None."""
+    for file_path in trace_files(path):
+        try:
+            with open(file_path) as trace_file:
+                for line in trace_file:
+                    if trace_id in line:
+                        record = json.loads(line)
+                        if record["trace_id"] == trace_id:
+                            return record
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def format_timeline(record, width=40):
+    """Render a trace record as text, one span per line, nested under its parent."""
+    children = defaultdict(list)
+    for span_data in record["spans"]:
+        children[span_data["parent_id"]].append(span_data)
+    total_ms = record["duration_ms"] or 1
+    lines = [
+        f"{record['name']} {record['status']} {record['duration_ms']:.1f} ms "
+        f"({record['reason']}, pid {record['pid']}, {record['start']})"
+    ]
+
+    def add(parent_id, depth):
+        for span_data in children.get(parent_id, ()):
+            start = max(int(span_data["offset_ms"] / total_ms * width), 0)
+            length = max(int(span_data["duration_ms"] / total_ms * width), 1)
+            bar = (' ' * start + '#' * length).ljust(width)[:width]
+            attributes = ' '.join(f"{key}={value}" for key, value in span_data["attributes"].items())
+            error = ' ERROR' if span_data["error"] else ''
+            lines.append(
+                f"|{bar}| {span_data['offset_ms']:8.2f} {span_data['duration_ms']:8.2f} ms  "
+                f"{'  ' * depth}{span_data['name']} {attributes}{error}".rstrip()
+            )
+            add(span_data["span_id"], depth + 1)
+
+    add(record["span_id"], 0)
+    for repeated in record["repeated"]:
+        lines.append(f"Repeated: {repeated['shape']} x {repeated['count']} ({repeated['total_ms']} ms)")
+    if record["dropped_spans"]:
+        lines.append(f"{record['dropped_spans']} spans dropped above TRACE_MAX_SPANS")
+    return '\n'.join(lines)
+
+
+def _start_trace():
+    """
+    Decide whether the request is traced, from the sample rate.
+
+    The trace id of an inbound traceparent header is continued, but its sampled
+    flag is only followed with TRACE_TRUST_TRACEPARENT, e.g. behind a gateway
+    that sets the header itself.
+    """
+    match = TRACEPARENT.match(request.headers.get('traceparent', '').strip().lower())
+    if match and match.group(1) != '0' * 32:
+        trace_id, parent_id = match.group(1), match.group(2)
+        if Config.TRACE_TRUST_TRACEPARENT:
+            return trace_id, parent_id, int(match.group(3), 16) & 1 == 1
+    else:
+        trace_id, parent_id = _new_id(128), None
+    return trace_id, parent_id, random.random() < Config.TRACE_SAMPLE_RATE
+
+
+def init_tracing(app):
+    """
+    Trace sampled and slow requests, and return the trace id of every request in X-Trace-Id.
+
+    Config:
+        TRACING_ENABLED (bool): Turn tracing on or off.
+        TRACE_SAMPLE_RATE (float): Share of requests traced, from 0 to 1.
+        TRACE_TRUST_TRACEPARENT (bool): Trace the requests whose traceparent header has the sampled flag.
+        TRACE_SLOW_REQUESTS (bool): Also keep the traces of requests slower than SLOW_REQUEST_THRESHOLD_MS.
+        TRACE_EXPORTER (str): "jsonl" to append to TRACE_FILE, "otlp" to post to TRACE_OTLP_ENDPOINT.
+    """
+    if not app.config.get('TRACING_ENABLED', True):
+        return
+
+    app.json = TracedJSONProvider(app)
+
+    @app.before_request
+    def start_trace():
+        trace_id, parent_id, sampled = _start_trace()
+        g.trace_id = trace_id
+        if sampled or app.config.get('TRACE_SLOW_REQUESTS', True):
+            g.trace = Trace(trace_id, parent_id, sampled)
+            g.trace_token = _trace.set(g.trace)
+
+    @app.after_request
+    def add_trace_header(response):
+        if 'trace_id' in g:
+            response.headers['X-Trace-Id'] = g.trace_id
+        g.trace_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_trace(error=None):
+        trace = g.pop('trace', None)
+        if trace is None:
+            return
+        end_ns = time.time_ns()
+        _trace.reset(g.pop('trace_token'))
+
+        threshold = app.config.get('SLOW_REQUEST_THRESHOLD_MS', 1000)
+        slow = app.config.get('TRACE_SLOW_REQUESTS', True) and threshold and (end_ns - trace.start_ns) / 1e6 >= threshold
+        if not trace.sampled and not slow:
+            return
+
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = g.get('trace_status', 500 if error is not None else 200)
+        record = _trace_record(trace, end_ns, route, status, 'sampled' if trace.sampled else 'slow')
+        for repeated in record["repeated"]:
+            logging.warning(
+                f"{repeated['shape']} ran {repeated['count']} times in {record['name']} "
+                f"({repeated['total_ms']} ms), trace {trace.trace_id}"
+            )
+        get_exporter().submit(record)
@@ -1,5 +1,6 @@
 from email_validator import validate_email, EmailNotValidError
 from zxcvbn import zxcvbn
+from utils.tracing import traced
 import re
 def is_valid_email(email):
     """
@@ -38,6 +39,7 @@ def is_valid_password(password):
     return True
 
 
+@traced('zxcvbn')
 def is_strong_password(password):
     """
     Check if the given password is strong enough
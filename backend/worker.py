@@ -0,0 +1,18 @@
+"""
+Background worker running the queued tasks, e.g. the purge of deleted jobs.
+
+Usage:
+    python worker.py
+
+Run one or more next to the web servers. Tasks left by a worker that stops
+are picked up by another one once their visibility timeout expires.
+"""
+import logging
+from app import app, db
+from utils.task_queue import run_worker
+from utils.tasks import schedule_search_warming  # also registers the task handlers
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    schedule_search_warming(periodic=True)
+    run_worker(db)
@@ -12,7 +12,7 @@ import { useAuth } from "./AuthContext";
 const JobSearchContext = createContext();
 
 export const JobSearchProvider = ({ children }) => {
-  const { userType, profile, updateProfile } = useAuth();
+  const { userType, profile } = useAuth();
 
   const [keyword, setKeyword] = useState("");
   const [location, setLocation] = useState("");
@@ -133,10 +133,14 @@ export const JobSearchProvider = ({ children }) => {
       return;
     }
     try {
-      const response = await httpClient.get(API_USER_SAVED_JOBS);
-      sessionStorage.setItem(cacheKey, JSON.stringify(response.data));
-      setSavedJobData(response.data);
-      setSavedJobIDs(new Set(response.data.map((job) => job._id)));
+      const [pageResponse, idsResponse] = await Promise.all([
+        httpClient.get(API_USER_SAVED_JOBS, { params: { limit: 100 } }),
+        httpClient.get(`${API_USER_SAVED_JOBS}/ids`),
+      ]);
+      const savedData = pageResponse.data.saved_jobs;
+      sessionStorage.setItem(cacheKey, JSON.stringify(savedData));
+      setSavedJobData(savedData);
+      setSavedJobIDs(new Set(idsResponse.data.saved_job_ids));
     } catch (error) {
       console.error("Failed to fetch saved jobs", error);
     }
@@ -158,17 +162,16 @@ export const JobSearchProvider = ({ children }) => {
       newSavedJobs.add(jobId);
     }
 
-    const updatedProfileData = {
-      ...profile,
-      jobSeekerSavedJobs: Array.from(newSavedJobs),
-    };
-
     try {
-      const response = await updateProfile(userType, updatedProfileData);
+      if (isJobAdded) {
+        await httpClient.put(`${API_USER_SAVED_JOBS}/${jobId}`);
+      } else {
+        await httpClient.delete(`${API_USER_SAVED_JOBS}/${jobId}`);
+      }
       setSavedJobIDs(newSavedJobs);
       updateSessionStorage(newSavedJobs, isJobAdded, jobId);
     } catch (error) {
-      console.error("Failed to update profile:", error);
+      console.error("Failed to update saved jobs:", error);
     }
   };
 